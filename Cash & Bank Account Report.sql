@@ -1,5 +1,22 @@
-WITH GL_Summary AS (
+WITH Opening AS (
+  -- Balance brought forward: one aggregate over the history before the range
   SELECT
+    COALESCE(SUM(gl.`debit` - gl.`credit`), 0) AS `Balance`
+  FROM
+    `tabGL Entry` gl
+  WHERE
+    gl.`posting_date` < %(start_date)s
+    AND (%(account)s IS NULL OR gl.`account` = %(account)s)
+    AND gl.`company` = %(company)s
+    AND gl.`is_cancelled` = 0
+),
+
+GL_Range AS (
+  -- The date range is applied here, at the GL Entry scan; the running
+  -- balance is the opening plus a window sum over the range, one step per
+  -- GL row (before the expense rows multiply them)
+  SELECT
+    gl.`name` AS `GL Name`,
     gl.`posting_date` AS `Posting Date`,
     gl.`voucher_no` AS `Voucher No`,
     gl.`account` AS `Account`,
@@ -7,40 +24,45 @@ WITH GL_Summary AS (
     gl.`remarks` AS `Remarks`,
     gl.`debit` AS `Total Debit`,
     gl.`credit` AS `Total Credit`,
-    ecd.`parent` AS `Expense Parent`,
-    ecd.`default_account` AS `Default Account`,
-    REGEXP_REPLACE(ecd.`description`, '<[^>]*>', '') AS `Description`,
-    ecd.`amount` AS `Expense Amount`,
-    ecd.`name` AS `Expense Detail Name`
+    (SELECT `Balance` FROM Opening) + SUM(gl.`debit` - gl.`credit`) OVER (
+      ORDER BY gl.`posting_date`, gl.`voucher_no`, gl.`name`
+      ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+    ) AS `Balance`
   FROM
     `tabGL Entry` gl
-  LEFT JOIN
-    `tabExpense Claim Detail` ecd
-    ON gl.`voucher_no` = ecd.`parent`
   WHERE
-    gl.`posting_date` <= %(end_date)s
+    gl.`posting_date` BETWEEN %(start_date)s AND %(end_date)s
     AND (%(account)s IS NULL OR gl.`account` = %(account)s)
     AND gl.`company` = %(company)s
     AND gl.`is_cancelled` = 0
 ),
 
-Filtered_GL_Summary AS (
+GL_Summary AS (
   SELECT
-    *,
-    CONCAT_WS(' / ', `Against`, `Default Account`) AS `Against / Account`,
-    CONCAT_WS(' | ', `Remarks`, `Description`) AS `Remarks / Description`
+    gl.*,
+    ecd.`parent` AS `Expense Parent`,
+    ecd.`default_account` AS `Default Account`,
+    COALESCE(ecd.`description_text`, REGEXP_REPLACE(ecd.`description`, '<[^>]*>', '')) AS `Description`,
+    ecd.`amount` AS `Expense Amount`,
+    ecd.`name` AS `Expense Detail Name`
   FROM
-    GL_Summary
-  WHERE
-    `Posting Date` BETWEEN %(start_date)s AND %(end_date)s
+    GL_Range gl
+  LEFT JOIN
+    `tabExpense Claim Detail` ecd
+    ON gl.`Voucher No` = ecd.`parent`
 ),
 
 Numbered_Rows AS (
+  -- The expense rows of one GL row stay together, in the order the balance
+  -- was summed, so Balance steps once per GL row instead of alternating
+  -- between the GL rows of a voucher
   SELECT
     *,
-    ROW_NUMBER() OVER (PARTITION BY `Voucher No` ORDER BY `Expense Detail Name`) AS rn
+    CONCAT_WS(' / ', `Against`, `Default Account`) AS `Against / Account`,
+    CONCAT_WS(' | ', `Remarks`, `Description`) AS `Remarks / Description`,
+    ROW_NUMBER() OVER (PARTITION BY `Voucher No` ORDER BY `GL Name`, `Expense Detail Name`) AS rn
   FROM
-    Filtered_GL_Summary
+    GL_Summary
 )
 
 SELECT
@@ -49,34 +71,46 @@ SELECT
   `Against / Account`,
   `Remarks / Description`,
   `Expense Amount`,
-  CASE 
-    WHEN rn = 1 THEN 
-      CASE 
-        WHEN `Voucher No` LIKE 'HR-EXP%%' THEN `Total Credit`
-        ELSE `Total Credit`
-      END
-    WHEN `Voucher No` LIKE 'HR-EXP%%' THEN NULL
-    ELSE `Total Credit`
-  END AS `Payments`,
-  `Total Debit` AS `Receipts`
-FROM
-  Numbered_Rows
-ORDER BY
-  `Posting Date` ASC,
-  `Voucher No` ASC;
-
-
-================================
-Filters:
-
-
-
-  
-
-
-================================
-Columns:
-
-
+  `Payments`,
+  `Receipts`,
+  `Balance`
+FROM (
+  SELECT
+    0 AS sort_order,
+    CAST(%(start_date)s AS DATE) AS `Posting Date`,
+    NULL AS `Voucher No`,
+    NULL AS `Against / Account`,
+    'Opening Balance' AS `Remarks / Description`,
+    NULL AS `Expense Amount`,
+    NULL AS `Payments`,
+    NULL AS `Receipts`,
+    `Balance`,
+    0 AS rn
+  FROM
+    Opening
 
+  UNION ALL
 
+  SELECT
+    1 AS sort_order,
+    `Posting Date`,
+    `Voucher No`,
+    `Against / Account`,
+    `Remarks / Description`,
+    `Expense Amount`,
+    -- An HR-EXP claim's payment is shown once, on its first row
+    CASE
+      WHEN rn > 1 AND `Voucher No` LIKE 'HR-EXP%%' THEN NULL
+      ELSE `Total Credit`
+    END AS `Payments`,
+    `Total Debit` AS `Receipts`,
+    `Balance`,
+    rn
+  FROM
+    Numbered_Rows
+) ledger
+ORDER BY
+  sort_order ASC,
+  `Posting Date` ASC,
+  `Voucher No` ASC,
+  rn ASC;
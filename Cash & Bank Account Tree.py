@@ -0,0 +1,111 @@
+# Drop the cached chart of accounts the cash and bank reports read. Any
+# insert, save, rename or delete can move lft/rgt of other accounts as well,
+# so the whole tree is rebuilt by the next report run. The new version retires
+# the account lists the report filters keep for the session.
+frappe.cache.delete_value("cash_bank_account_tree")
+frappe.cache.set_value("cash_bank_account_tree|version", frappe.utils.now_datetime().strftime("%Y%m%d%H%M%S%f"))
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Account Tree - Insert
+#   Script Type: DocType Event
+#   Reference Document Type: Account
+#   DocType Event: After Insert
+#
+# And three more Server Scripts with the same code above
+#   Name: Cash & Bank Account Tree - Save      DocType Event: After Save
+#   Name: Cash & Bank Account Tree - Rename    DocType Event: After Rename
+#   Name: Cash & Bank Account Tree - Delete    DocType Event: After Delete
+#
+# Every script that needs account metadata starts from the block below
+# (Server Scripts cannot import each other, so it is repeated in each):
+#
+#   tree = frappe.cache.get_value("cash_bank_account_tree")
+#   if not tree:
+#       ... build it exactly as the API script below does ...
+#
+# It holds, for every Account:
+#   tree["accounts"][name] = {name, parent_account, lft, rgt, account_type, company, is_group}
+# and the Cash/Bank ledger accounts sorted by name:
+#   tree["cash_bank"] = [name, ...]
+#
+# The tree also expires after a day, in case tabAccount is changed by SQL.
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Account Tree
+#   Script Type: API
+#   API Method: cash_bank_account_tree
+#
+# Cash/Bank ledger accounts from the cached tree, for report filters: the
+# accounts of Cash & Bank List.sql, narrowed to the user's Account and Company
+# User Permissions and optionally to one company:
+#   frappe.xcall("cash_bank_account_tree")
+#   frappe.xcall("cash_bank_account_tree", {company: "Cash Company Limited"})
+#   -> {etag: "...", accounts: [{value, account_type, company}, ...]}
+#
+# A Server Script cannot set response headers, so the ETag is passed as an
+# argument: a client that sends back the etag it holds gets
+#   {etag: "...", not_modified: 1}
+# until an Account or one of the user's permissions changes.
+
+tree = frappe.cache.get_value("cash_bank_account_tree")
+if not tree:
+    tree = {"accounts": {}, "cash_bank": []}
+    for acc in frappe.db.sql("""
+        SELECT name, parent_account, lft, rgt, account_type, company, is_group
+        FROM `tabAccount`
+        ORDER BY lft
+    """, as_dict=True):
+        tree["accounts"][acc.name] = {
+            "name": acc.name,
+            "parent_account": acc.parent_account,
+            "lft": acc.lft,
+            "rgt": acc.rgt,
+            "account_type": acc.account_type,
+            "company": acc.company,
+            "is_group": acc.is_group,
+        }
+        if not acc.is_group and acc.account_type in ("Cash", "Bank"):
+            tree["cash_bank"].append(acc.name)
+    tree["cash_bank"].sort()
+    frappe.cache.set_value("cash_bank_account_tree", tree, expires_in_sec=86400)
+
+version = frappe.cache.get_value("cash_bank_account_tree|version")
+if not version:
+    version = frappe.utils.now_datetime().strftime("%Y%m%d%H%M%S%f")
+    frappe.cache.set_value("cash_bank_account_tree|version", version)
+
+company = frappe.form_dict.get("company")
+permissions = frappe.db.sql("""
+    SELECT allow, for_value, modified
+    FROM `tabUser Permission`
+    WHERE user = %(user)s
+      AND allow IN ('Account', 'Company')
+      AND (apply_to_all_doctypes = 1 OR applicable_for = 'Account')
+""", {"user": frappe.session.user}, as_dict=True)
+permissions_modified = max([str(p.modified) for p in permissions] or [""])
+etag = f"{version}|{frappe.session.user}|{company or ''}|{len(permissions)}|{permissions_modified}"
+
+if frappe.form_dict.get("etag") == etag:
+    frappe.response["message"] = {"etag": etag, "not_modified": 1}
+else:
+    allowed_accounts = set(p.for_value for p in permissions if p.allow == "Account")
+    allowed_companies = set(p.for_value for p in permissions if p.allow == "Company")
+    accounts = []
+    for name in tree["cash_bank"]:
+        acc = tree["accounts"][name]
+        if company and acc["company"] != company:
+            continue
+        if allowed_accounts and name not in allowed_accounts:
+            continue
+        if allowed_companies and acc["company"] not in allowed_companies:
+            continue
+        accounts.append({"value": name, "account_type": acc["account_type"], "company": acc["company"]})
+    frappe.response["message"] = {"etag": etag, "accounts": accounts}
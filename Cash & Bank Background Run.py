@@ -0,0 +1,103 @@
+# Add in Server Script
+#   Name: Cash & Bank Background Run
+#   Script Type: API
+#   API Method: cash_bank_background_run
+#
+# Worker side of the reports' background mode. Cash & Bank Report (V3) and
+# Cash Flow Statement queue it themselves for heavy filters (see the
+# background block in each). The report stores the job under its key with the
+# caller as its user, and a one-time token that leads to that key:
+#   frappe.cache.set_value("cash_bank_background_token|<token>", <job key>)
+#   frappe.enqueue("cash_bank_background_run", queue="long", timeout=3600, token=<token>)
+# Only the token travels with the job; the report name and the filters are
+# read from the stored job, and the token is spent once the run ends, so a
+# caller cannot start a run or write a job under a key of their choosing.
+# The job runs the report again with the token as filters.background_token,
+# so it is worked out in full and leaves its rows and figures in the cache;
+# they are stored here as a private File on the Report and the job is marked
+# Completed. Progress and the outcome are pushed to the user as the
+# cash_bank_background_run realtime event, which the Client Scripts listen
+# for: on completion they open the report again with the job's key as
+# filters.background_job, so the result is shown even when entries posted
+# while it ran have changed the key since.
+#
+# Rows are stored packed, the keys once and then each row's values, which
+# leaves out the key names repeated on every row: a Server Script has no gzip.
+# The newest 50 results are kept; older Files are deleted.
+#
+# The status of one of your own jobs, from the browser console:
+#   frappe.xcall("cash_bank_background_run", {key: "cash_bank_background|..."})
+
+token = frappe.form_dict.get("token")
+
+if not token:
+    key = frappe.form_dict.get("key") or ""
+    job = frappe.cache.get_value(key) if key.startswith("cash_bank_background|") else None
+    if not isinstance(job, dict) or job.get("user") != frappe.session.user:
+        frappe.throw("Background run not found or expired")
+    frappe.response["message"] = job
+else:
+    key = frappe.cache.get_value(f"cash_bank_background_token|{token}")
+    job = frappe.cache.get_value(key) if key else None
+    if not isinstance(job, dict) or job.get("status") != "Queued" or job.get("user") != frappe.session.user:
+        frappe.throw("This background run is not valid")
+    report_name = job["report_name"]
+    filters = json.loads(job["filters"])
+    filters["background_token"] = token
+
+    job["status"] = "Running"
+    job["progress"] = 5
+    frappe.cache.set_value(key, job)
+    frappe.publish_realtime("cash_bank_background_run", {
+        "report_name": report_name, "key": key, "status": "Running", "progress": 5,
+    }, user=frappe.session.user)
+
+    try:
+        frappe.call(
+            "frappe.desk.query_report.run",
+            report_name=report_name,
+            filters=filters,
+            ignore_prepared_report=True,
+        )
+        artifact = frappe.cache.get_value(key + "|artifact")
+        if not artifact:
+            frappe.throw("The report left no result to store")
+        stored_file = frappe.get_doc({
+            "doctype": "File",
+            "file_name": f"{report_name} {frappe.utils.now_datetime().strftime('%Y%m%d%H%M%S%f')}.json",
+            "is_private": 1,
+            "attached_to_doctype": "Report",
+            "attached_to_name": report_name,
+            "content": json.dumps(artifact, default=str, separators=(",", ":")),
+        }).insert(ignore_permissions=True)
+        frappe.cache.delete_value(key + "|artifact")
+
+        stored = frappe.cache.get_value("cash_bank_background|stored") or []
+        stored.append({"key": key, "file": stored_file.name})
+        while len(stored) > 50:
+            oldest = stored.pop(0)
+            frappe.cache.delete_value(oldest["key"])
+            if frappe.db.exists("File", oldest["file"]):
+                frappe.delete_doc("File", oldest["file"], ignore_permissions=True)
+        frappe.cache.set_value("cash_bank_background|stored", stored)
+        frappe.db.commit()
+
+        job["status"] = "Completed"
+        job["progress"] = 100
+        job["file"] = stored_file.name
+        job["completed"] = str(frappe.utils.now_datetime())
+    except Exception as e:
+        frappe.log_error("Cash & Bank background run failed", f"{report_name}\n{key}\n{e}")
+        job["status"] = "Failed"
+        job["error"] = str(e)
+
+    frappe.cache.delete_value(f"cash_bank_background_token|{token}")
+    frappe.cache.set_value(key, job)
+    frappe.publish_realtime("cash_bank_background_run", {
+        "report_name": report_name,
+        "key": key,
+        "status": job["status"],
+        "progress": job["progress"],
+        "error": job.get("error"),
+    }, user=frappe.session.user)
+    frappe.response["message"] = job
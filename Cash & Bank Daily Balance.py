@@ -0,0 +1,304 @@
+# Keep the Cash Bank Daily Balance row for this account and day in step with
+# tabGL Entry. The day is re-aggregated from the ledger instead of adjusting it
+# by this row's amounts, so the mirror rows ERPNext writes on cancellation (and
+# the originals it flags is_cancelled = 1) are counted exactly like the reports
+# count them. A change to a past day is rolled forward into every later day.
+# Account type comes from the cached tree (Cash & Bank Account Tree.py), so
+# GL rows of other accounts cost no query at all.
+tree = frappe.cache.get_value("cash_bank_account_tree")
+if tree:
+    account_type = (tree["accounts"].get(doc.account) or {}).get("account_type")
+else:
+    account_type = frappe.db.get_value("Account", doc.account, "account_type")
+
+if account_type in ("Cash", "Bank"):
+    day = frappe.db.sql("""
+        SELECT
+            COALESCE(SUM(debit), 0) AS debit_total,
+            COALESCE(SUM(credit), 0) AS credit_total
+        FROM `tabGL Entry`
+        WHERE is_cancelled = 0
+          AND account = %s
+          AND posting_date = %s
+    """, (doc.account, doc.posting_date), as_dict=True)[0]
+
+    # The account's snapshot is written one posting at a time: its Account row
+    # is locked first, so two vouchers posting to the account at once queue
+    # here instead of both inserting the same day (or the same history) into
+    # the unique (account, posting_date) index. The reads below lock too, so
+    # they see what the voucher before this one committed.
+    frappe.db.sql("SELECT name FROM `tabAccount` WHERE name = %s FOR UPDATE", (doc.account,))
+    has_snapshot = frappe.db.sql("""
+        SELECT name
+        FROM `tabCash Bank Daily Balance`
+        WHERE account = %s
+        LIMIT 1
+        FOR UPDATE
+    """, (doc.account,))
+
+    if not has_snapshot:
+        # First posting since the snapshot was installed: build this account's
+        # history once so later lookups can trust it.
+        history = frappe.db.sql("""
+            SELECT
+                posting_date,
+                SUM(debit) AS debit_total,
+                SUM(credit) AS credit_total,
+                SUM(SUM(debit) - SUM(credit)) OVER (ORDER BY posting_date) AS cumulative_balance
+            FROM `tabGL Entry`
+            WHERE is_cancelled = 0
+              AND account = %s
+            GROUP BY posting_date
+            ORDER BY posting_date
+        """, (doc.account,), as_dict=True)
+        for row in history:
+            frappe.get_doc({
+                "doctype": "Cash Bank Daily Balance",
+                "account": doc.account,
+                "posting_date": row.posting_date,
+                "debit_total": row.debit_total,
+                "credit_total": row.credit_total,
+                "cumulative_balance": row.cumulative_balance,
+            }).insert(ignore_permissions=True)
+    else:
+        current = frappe.db.get_value(
+            "Cash Bank Daily Balance",
+            {"account": doc.account, "posting_date": doc.posting_date},
+            ["name", "debit_total", "credit_total", "cumulative_balance"],
+            as_dict=True,
+            for_update=True,
+        )
+        if current:
+            delta = (day.debit_total - day.credit_total) - (current.debit_total - current.credit_total)
+            frappe.db.set_value("Cash Bank Daily Balance", current.name, {
+                "debit_total": day.debit_total,
+                "credit_total": day.credit_total,
+                "cumulative_balance": current.cumulative_balance + delta,
+            }, update_modified=False)
+        else:
+            previous = frappe.db.sql("""
+                SELECT cumulative_balance
+                FROM `tabCash Bank Daily Balance`
+                WHERE account = %s
+                  AND posting_date < %s
+                ORDER BY posting_date DESC
+                LIMIT 1
+                FOR UPDATE
+            """, (doc.account, doc.posting_date), as_dict=True)
+            delta = day.debit_total - day.credit_total
+            frappe.get_doc({
+                "doctype": "Cash Bank Daily Balance",
+                "account": doc.account,
+                "posting_date": doc.posting_date,
+                "debit_total": day.debit_total,
+                "credit_total": day.credit_total,
+                "cumulative_balance": (previous[0].cumulative_balance if previous else 0) + delta,
+            }).insert(ignore_permissions=True)
+
+        # Backdated entry: re-roll the running balance of every later day. The
+        # rows are locked as they are read, like the day's own row above, so a
+        # posting on a later day waits instead of having its update overwritten.
+        if delta:
+            later_days = frappe.db.sql("""
+                SELECT name, cumulative_balance
+                FROM `tabCash Bank Daily Balance`
+                WHERE account = %s
+                  AND posting_date > %s
+                ORDER BY posting_date
+                FOR UPDATE
+            """, (doc.account, doc.posting_date), as_dict=True)
+            for later in later_days:
+                frappe.db.set_value(
+                    "Cash Bank Daily Balance", later.name,
+                    "cumulative_balance", later.cumulative_balance + delta,
+                    update_modified=False,
+                )
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash Bank Daily Balance - GL Submit
+#   Script Type: DocType Event
+#   Reference Document Type: GL Entry
+#   DocType Event: After Submit
+#
+# And a second Server Script with the same code above
+#   Name: Cash Bank Daily Balance - GL Cancel
+#   Script Type: DocType Event
+#   Reference Document Type: GL Entry
+#   DocType Event: After Cancel
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash Bank Daily Balance - Rebuild
+#   Script Type: API
+#   API Method: cash_bank_daily_balance_rebuild
+#
+# Rebuilds (or repairs) Cash Bank Daily Balance from tabGL Entry, writing only
+# the rows that differ. Run once on existing sites:
+#   frappe.call("cash_bank_daily_balance_rebuild")
+#   frappe.call("cash_bank_daily_balance_rebuild", {account: "Cash with Anam - CCL"})
+
+if frappe.session.user != "Administrator" and not frappe.db.exists(
+    "Has Role", {"parent": frappe.session.user, "parenttype": "User", "role": "System Manager"}
+):
+    frappe.throw("Only a System Manager can rebuild the Cash Bank Daily Balance snapshot")
+
+frappe.db.add_unique("Cash Bank Daily Balance", ["account", "posting_date"], constraint_name="unique_account_posting_date")
+
+account = frappe.form_dict.get("account")
+if account:
+    accounts = [account]
+else:
+    accounts = [d.name for d in frappe.get_all(
+        "Account",
+        filters={"account_type": ["in", ["Cash", "Bank"]], "is_group": 0},
+        fields=["name"],
+        order_by="name",
+    )]
+
+inserted = updated = deleted = 0
+for account in accounts:
+    ledger = frappe.db.sql("""
+        SELECT
+            posting_date,
+            SUM(debit) AS debit_total,
+            SUM(credit) AS credit_total,
+            SUM(SUM(debit) - SUM(credit)) OVER (ORDER BY posting_date) AS cumulative_balance
+        FROM `tabGL Entry`
+        WHERE is_cancelled = 0
+          AND account = %s
+        GROUP BY posting_date
+        ORDER BY posting_date
+    """, (account,), as_dict=True)
+
+    existing = {}
+    for row in frappe.get_all(
+        "Cash Bank Daily Balance",
+        filters={"account": account},
+        fields=["name", "posting_date", "debit_total", "credit_total", "cumulative_balance"],
+    ):
+        existing[str(row.posting_date)] = row
+
+    for row in ledger:
+        current = existing.pop(str(row.posting_date), None)
+        if not current:
+            frappe.get_doc({
+                "doctype": "Cash Bank Daily Balance",
+                "account": account,
+                "posting_date": row.posting_date,
+                "debit_total": row.debit_total,
+                "credit_total": row.credit_total,
+                "cumulative_balance": row.cumulative_balance,
+            }).insert(ignore_permissions=True)
+            inserted += 1
+        elif (
+            current.debit_total != row.debit_total
+            or current.credit_total != row.credit_total
+            or current.cumulative_balance != row.cumulative_balance
+        ):
+            frappe.db.set_value("Cash Bank Daily Balance", current.name, {
+                "debit_total": row.debit_total,
+                "credit_total": row.credit_total,
+                "cumulative_balance": row.cumulative_balance,
+            }, update_modified=False)
+            updated += 1
+
+    # Days left over have no uncancelled GL rows any more
+    for stale in existing.values():
+        frappe.delete_doc("Cash Bank Daily Balance", stale.name, ignore_permissions=True)
+        deleted += 1
+
+frappe.response["message"] = {
+    "accounts": len(accounts),
+    "inserted": inserted,
+    "updated": updated,
+    "deleted": deleted,
+}
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash Bank Daily Balance - Check
+#   Script Type: API
+#   API Method: cash_bank_daily_balance_check
+#
+# Compares every snapshot row with the figures aggregated from raw tabGL Entry
+# and returns the rows that disagree. Nothing is written.
+#   frappe.call("cash_bank_daily_balance_check")
+#   frappe.call("cash_bank_daily_balance_check", {account: "Cash with Anam - CCL"})
+
+if frappe.session.user != "Administrator" and not frappe.db.exists(
+    "Has Role", {"parent": frappe.session.user, "parenttype": "User", "role": "System Manager"}
+):
+    frappe.throw("Only a System Manager can check the Cash Bank Daily Balance snapshot")
+
+account = frappe.form_dict.get("account")
+if account:
+    accounts = [account]
+else:
+    accounts = [d.name for d in frappe.get_all(
+        "Account",
+        filters={"account_type": ["in", ["Cash", "Bank"]], "is_group": 0},
+        fields=["name"],
+        order_by="name",
+    )]
+
+mismatches = []
+for account in accounts:
+    ledger = {}
+    for row in frappe.db.sql("""
+        SELECT
+            posting_date,
+            SUM(debit) AS debit_total,
+            SUM(credit) AS credit_total
+        FROM `tabGL Entry`
+        WHERE is_cancelled = 0
+          AND account = %s
+        GROUP BY posting_date
+    """, (account,), as_dict=True):
+        ledger[str(row.posting_date)] = row
+
+    snapshot = {}
+    for row in frappe.get_all(
+        "Cash Bank Daily Balance",
+        filters={"account": account},
+        fields=["posting_date", "debit_total", "credit_total", "cumulative_balance"],
+    ):
+        snapshot[str(row.posting_date)] = row
+
+    # A snapshot day may legitimately sum to zero after a cancellation, so
+    # walk the union of both sides and carry the ledger running balance.
+    running = 0
+    for posting_date in sorted(set(ledger) | set(snapshot)):
+        expected = ledger.get(posting_date) or {"debit_total": 0, "credit_total": 0}
+        running += expected["debit_total"] - expected["credit_total"]
+        actual = snapshot.get(posting_date)
+        if not actual:
+            mismatches.append({"account": account, "posting_date": posting_date, "field": "missing"})
+            continue
+        for field, value in (
+            ("debit_total", expected["debit_total"]),
+            ("credit_total", expected["credit_total"]),
+            ("cumulative_balance", running),
+        ):
+            if frappe.utils.flt(actual[field], 2) != frappe.utils.flt(value, 2):
+                mismatches.append({
+                    "account": account,
+                    "posting_date": posting_date,
+                    "field": field,
+                    "snapshot": actual[field],
+                    "ledger": value,
+                })
+
+frappe.response["message"] = {
+    "accounts": len(accounts),
+    "mismatches": mismatches,
+}
@@ -0,0 +1,217 @@
+# Add in Server Script
+#   Name: Cash & Bank Day Close
+#   Script Type: API
+#   API Method: cash_bank_day_close
+#
+# Day-close pack: the printed Cash & Bank Report (V3) page of every Cash/Bank
+# account for one day, in one document. The accounts are dealt round-robin
+# into at most `workers` parts (default 4, at most 8) and each part is its own
+# job on the long queue, so the parts run side by side on separate workers,
+# each with its own database connection, and the pack takes about as long as
+# its slowest part instead of the sum of all accounts. The last part to finish
+# puts the pages together in account-name order, whichever part printed them.
+#   frappe.xcall("cash_bank_day_close", {date: "2025-01-31"})
+#   frappe.xcall("cash_bank_day_close", {date: "2025-01-31", accounts: JSON.stringify(["Cash with Anam - CCL", ...]), workers: 6})
+#   -> {run: "cash_bank_day_close|...", parts: 4, accounts: [...]}
+#   frappe.xcall("cash_bank_day_close", {run: "cash_bank_day_close|..."})
+#   -> {status: "Running" | "Completed", done, total, failed, html (once Completed)}
+#
+# The Client Script polls the run for progress. An account that cannot be
+# printed gets a page saying so and is listed in `failed`. A part killed at
+# the queue timeout, or never started, never reports back: once it has been
+# running longer than that (or the run has, for a part that never started),
+# the pack is put together without its remaining accounts, which are listed in
+# `failed` too. Only the accounts the user's Account and Company User
+# Permissions allow are printed. Each page comes from cash_bank_print
+# (Cash & Bank Print.py), so a closed day's page that is already stored is not
+# rendered again.
+#
+# Each part's job carries only a one-time token that leads to its run and
+# part number; the token is spent when the part starts, and the part runs
+# only for the user who started the run.
+
+run = frappe.form_dict.get("run") or ""
+token = frappe.form_dict.get("token")
+
+
+def not_printed(account, reason):
+    text = f"{account}: not printed ({reason})".replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return f"<html><head></head><body><p>{text}</p></body></html>"
+
+
+def build_pack(run, state, not_printed=not_printed):
+    # Pages in account-name order; an account without a page is one whose
+    # part did not finish
+    head = None
+    pages = []
+    failed = []
+    for account in state["accounts"]:
+        html = frappe.cache.get_value(f"{run}|{account}")
+        if html is None:
+            html = not_printed(account, "its part did not finish")
+            failed.append(account)
+        elif frappe.cache.get_value(f"{run}|failed|{account}"):
+            failed.append(account)
+        # the styles come from a printed page, not a placeholder
+        if head is None and account not in failed and "<body>" in html:
+            head = html.split("<body>", 1)[0]
+        pages.append(html.split("<body>", 1)[-1].rsplit("</body>", 1)[0])
+    frappe.cache.set_value(
+        f"{run}|pack",
+        (head or "<html><head></head>") + "<body>"
+        + '<div style="page-break-after: always;"></div>'.join(pages)
+        + "</body></html>",
+        expires_in_sec=86400,
+    )
+    state["status"] = "Completed"
+    state["failed"] = failed
+    frappe.cache.set_value(run, state, expires_in_sec=86400)
+
+
+def parts_finished(run, state):
+    # A part is finished once it has marked itself done, or once it has been
+    # running longer than the queue timeout and so was killed. A part that
+    # never started (lost from the queue, or its worker died first) is timed
+    # from the start of the run.
+    for part in range(state["parts"]):
+        if frappe.cache.get_value(f"{run}|part|{part}"):
+            continue
+        started = frappe.cache.get_value(f"{run}|part|{part}|started") or state["started"]
+        if (
+            frappe.utils.now_datetime() - frappe.utils.get_datetime(started)
+        ).total_seconds() <= 3600:
+            return False
+    return True
+
+if not token and not run:
+    if not frappe.get_doc("Report", "Cash & Bank Report").is_permitted():
+        frappe.throw("You are not permitted to print the Cash & Bank Report")
+    day = str(frappe.utils.getdate(frappe.form_dict.get("date") or frappe.utils.nowdate()))
+
+    # a JSON list: account names can contain commas
+    accounts = frappe.form_dict.get("accounts") or []
+    if isinstance(accounts, str):
+        accounts = json.loads(accounts)
+    # Chart of accounts, cached until an Account changes
+    # (Cash & Bank Account Tree.py)
+    tree = frappe.cache.get_value("cash_bank_account_tree")
+    if not tree:
+        tree = {"accounts": {}, "cash_bank": []}
+        for acc in frappe.db.sql("""
+            SELECT name, parent_account, lft, rgt, account_type, company, is_group
+            FROM `tabAccount`
+            ORDER BY lft
+        """, as_dict=True):
+            tree["accounts"][acc.name] = {
+                "name": acc.name,
+                "parent_account": acc.parent_account,
+                "lft": acc.lft,
+                "rgt": acc.rgt,
+                "account_type": acc.account_type,
+                "company": acc.company,
+                "is_group": acc.is_group,
+            }
+            if not acc.is_group and acc.account_type in ("Cash", "Bank"):
+                tree["cash_bank"].append(acc.name)
+        tree["cash_bank"].sort()
+        frappe.cache.set_value("cash_bank_account_tree", tree, expires_in_sec=86400)
+    if not accounts:
+        accounts = tree["cash_bank"]
+
+    # Only the accounts the user's Account and Company User Permissions allow,
+    # as in the account picker (Cash & Bank Account Tree.py)
+    permissions = frappe.db.sql("""
+        SELECT allow, for_value
+        FROM `tabUser Permission`
+        WHERE user = %(user)s
+          AND allow IN ('Account', 'Company')
+          AND (apply_to_all_doctypes = 1 OR applicable_for = 'Account')
+    """, {"user": frappe.session.user}, as_dict=True)
+    allowed_accounts = set(p.for_value for p in permissions if p.allow == "Account")
+    allowed_companies = set(p.for_value for p in permissions if p.allow == "Company")
+    permitted = []
+    for name in accounts:
+        acc = tree["accounts"].get(name)
+        if not acc:
+            continue
+        if allowed_accounts and name not in allowed_accounts:
+            continue
+        if allowed_companies and acc["company"] not in allowed_companies:
+            continue
+        permitted.append(name)
+    accounts = permitted
+    if not accounts:
+        frappe.throw("No Cash or Bank accounts found")
+    # the order of the pack, whatever order the parts finish in
+    accounts = sorted(set(accounts))
+
+    workers = min(max(frappe.utils.cint(frappe.form_dict.get("workers")) or 4, 1), 8, len(accounts))
+    run = f"cash_bank_day_close|{day}|{frappe.utils.now_datetime().strftime('%Y%m%d%H%M%S%f')}"
+    frappe.cache.set_value(run, {
+        "date": day,
+        "accounts": accounts,
+        "parts": workers,
+        "status": "Running",
+        "started": str(frappe.utils.now_datetime()),
+        "user": frappe.session.user,
+    }, expires_in_sec=86400)
+    for part in range(workers):
+        token = frappe.generate_hash(length=20)
+        frappe.cache.set_value(
+            f"cash_bank_day_close_token|{token}", {"run": run, "part": part}, expires_in_sec=7200
+        )
+        frappe.enqueue("cash_bank_day_close", queue="long", timeout=3600, token=token)
+    frappe.response["message"] = {"run": run, "parts": workers, "accounts": accounts}
+
+elif not token:
+    state = frappe.cache.get_value(run) if run.startswith("cash_bank_day_close|") else None
+    if not isinstance(state, dict) or state.get("user") != frappe.session.user:
+        frappe.throw("Day close run not found or expired")
+    if state["status"] != "Completed" and parts_finished(run, state):
+        build_pack(run, state)
+    done = 0
+    for account in state["accounts"]:
+        if frappe.cache.get_value(f"{run}|{account}") is not None:
+            done += 1
+    frappe.response["message"] = {
+        "status": state["status"],
+        "done": done,
+        "total": len(state["accounts"]),
+        "failed": state.get("failed") or [],
+        "html": frappe.cache.get_value(f"{run}|pack") if state["status"] == "Completed" else None,
+    }
+
+else:
+    # One part: print its accounts one after another on this worker
+    queued = frappe.cache.get_value(f"cash_bank_day_close_token|{token}")
+    state = frappe.cache.get_value(queued["run"]) if queued else None
+    if not isinstance(state, dict) or state.get("user") != frappe.session.user:
+        frappe.throw("This day close part is not valid")
+    frappe.cache.delete_value(f"cash_bank_day_close_token|{token}")
+    run = queued["run"]
+    part = queued["part"]
+    frappe.cache.set_value(f"{run}|part|{part}|started", str(frappe.utils.now_datetime()), expires_in_sec=86400)
+    try:
+        for account in state["accounts"][part::state["parts"]]:
+            try:
+                frappe.call(
+                    "cash_bank_print",
+                    report_name="Cash & Bank Report",
+                    filters={"from_date": state["date"], "to_date": state["date"], "account": account},
+                )
+                # an API Server Script leaves its result in frappe.response
+                html = frappe.response["message"]["html"]
+            except Exception as e:
+                frappe.log_error("Cash & Bank day close failed", f"{run}\n{account}\n{e}")
+                frappe.cache.set_value(f"{run}|failed|{account}", str(e), expires_in_sec=86400)
+                html = not_printed(account, e)
+            frappe.cache.set_value(f"{run}|{account}", html, expires_in_sec=86400)
+    finally:
+        # Marked done however the part ends, so the pack is never left waiting on it
+        frappe.cache.set_value(f"{run}|part|{part}", 1, expires_in_sec=86400)
+
+    # Every part marks itself done before it looks at the others, so at least
+    # the last one to finish sees them all; two finishing together both build
+    # the same pack.
+    if parts_finished(run, state):
+        build_pack(run, state)
@@ -0,0 +1,345 @@
+# Add in Server Script
+#   Name: Cash & Bank Export
+#   Script Type: API
+#   API Method: cash_bank_export
+#
+# Writes the Cash & Bank Report (V3) ledger of one or more accounts over a
+# date range, with each account's opening balance, the running balance on
+# every row, a Day Total after each day and a Closing Balance row, as a job on
+# the long queue, so no web worker waits for it:
+#   frappe.xcall("cash_bank_export", {accounts: JSON.stringify(["MBL 0103525749 - CCL"]), from_date: "2025-01-01", to_date: "2025-12-31"})
+#   frappe.xcall("cash_bank_export", {accounts: ..., from_date: ..., to_date: ..., format: "xls"})
+#   -> {job: "cash_bank_export|..."}
+#   frappe.xcall("cash_bank_export", {job: "cash_bank_export|..."})
+#   -> {status: "Queued" | "Running" | "Completed" | "Failed", progress, filename, content_type, parts}
+#
+# format=csv (default) or xls. The ledger is read in windows of chunk_days
+# (default 31) per account, the way V3 streams long ranges, and every row is
+# written out as text as soon as it is merged: no report row dicts are built.
+# The text is stored as private Files of about 1 MB each ("parts", attached
+# to the Report) as it is written, so the job holds one window of GL rows and
+# at most one part of text whatever the range. The Client Script joins the
+# parts into one download in the browser. xls is Excel's XML Spreadsheet
+# format; a Server Script has no zip writer for xlsx. The newest 20 exports
+# are kept; older parts are deleted.
+#
+# Only a one-time token travels with the queued job; it leads to the job,
+# whose stored filters the worker reads, and it is spent when the worker
+# starts. The worker runs only for the user who started the export and checks
+# the report permission again.
+
+job = frappe.form_dict.get("job") or ""
+token = frappe.form_dict.get("token")
+
+if not token and job:
+    state = frappe.cache.get_value(job) if job.startswith("cash_bank_export|") else None
+    if not isinstance(state, dict) or state.get("user") != frappe.session.user:
+        frappe.throw("Export not found or expired")
+    frappe.response["message"] = state
+
+elif not token:
+    if not frappe.get_doc("Report", "Cash & Bank Report").is_permitted():
+        frappe.throw("You are not permitted to export the Cash & Bank Report")
+
+    from_date = frappe.form_dict.get("from_date")
+    to_date = frappe.form_dict.get("to_date") or from_date
+    if not from_date:
+        frappe.throw("Please select From Date and To Date")
+    if frappe.utils.getdate(from_date) > frappe.utils.getdate(to_date):
+        frappe.throw("From Date cannot be after To Date")
+
+    # a JSON list: account names can contain commas
+    accounts = frappe.form_dict.get("accounts") or []
+    if isinstance(accounts, str):
+        accounts = json.loads(accounts)
+    if frappe.form_dict.get("account"):
+        accounts = [frappe.form_dict.get("account")]
+    if not accounts:
+        frappe.throw("Please select an Account")
+
+    file_format = frappe.form_dict.get("format") or "csv"
+    if file_format not in ("csv", "xls"):
+        frappe.throw("Format must be csv or xls")
+
+    job = f"cash_bank_export|{frappe.session.user}|{frappe.utils.now_datetime().strftime('%Y%m%d%H%M%S%f')}"
+    frappe.cache.set_value(job, {
+        "status": "Queued",
+        "progress": 0,
+        "user": frappe.session.user,
+        "filename": f"Cash & Bank Ledger {from_date} to {to_date}.{file_format}",
+        "content_type": "text/csv" if file_format == "csv" else "application/vnd.ms-excel",
+        "parts": [],
+        "accounts": accounts,
+        "from_date": from_date,
+        "to_date": to_date,
+        "format": file_format,
+        "chunk_days": frappe.utils.cint(frappe.form_dict.get("chunk_days")),
+    }, expires_in_sec=86400)
+    token = frappe.generate_hash(length=20)
+    frappe.cache.set_value(f"cash_bank_export_token|{token}", job, expires_in_sec=7200)
+    frappe.enqueue("cash_bank_export", queue="long", timeout=3600, token=token)
+    frappe.response["message"] = {"job": job}
+
+else:
+    job = frappe.cache.get_value(f"cash_bank_export_token|{token}")
+    state = frappe.cache.get_value(job) if job else None
+    if not isinstance(state, dict) or state.get("status") != "Queued" or state.get("user") != frappe.session.user:
+        frappe.throw("This export is not valid")
+    frappe.cache.delete_value(f"cash_bank_export_token|{token}")
+    if not frappe.get_doc("Report", "Cash & Bank Report").is_permitted():
+        frappe.throw("You are not permitted to export the Cash & Bank Report")
+    state["status"] = "Running"
+    frappe.cache.set_value(job, state, expires_in_sec=86400)
+
+    from_date = state["from_date"]
+    to_date = state["to_date"]
+    accounts = state["accounts"]
+    file_format = state["format"]
+    chunk_days = max(1, state["chunk_days"] or 31)
+
+    try:
+        # Opening balance per account: the snapshot (Cash & Bank Daily Balance.py) or
+        # the last period close plus the GL rows after it, as in V3
+        if frappe.db.exists("DocType", "Account Closing Balance"):
+            closing_base = """
+                SELECT
+                    sel.account,
+                    COALESCE(last_close.closing_date, DATE '1900-01-01') AS closing_date,
+                    COALESCE(SUM(acb.debit) - SUM(acb.credit), 0) AS balance
+                FROM selected sel
+                LEFT JOIN (
+                    SELECT account, MAX(closing_date) AS closing_date
+                    FROM `tabAccount Closing Balance`
+                    WHERE account IN %(accounts)s
+                      AND closing_date < %(from_date)s
+                    GROUP BY account
+                ) last_close ON last_close.account = sel.account
+                LEFT JOIN `tabAccount Closing Balance` acb
+                    ON acb.account = sel.account
+                    AND acb.closing_date = last_close.closing_date
+                GROUP BY sel.account, last_close.closing_date
+            """
+        else:
+            closing_base = "SELECT account, DATE '1900-01-01' AS closing_date, 0 AS balance FROM selected"
+
+        openings = frappe.db.sql("""
+            WITH selected AS (
+                SELECT name AS account FROM `tabAccount` WHERE name IN %(accounts)s
+            ),
+
+            closing_base AS (""" + closing_base + """),
+
+            snapshot AS (
+                SELECT
+                    sel.account,
+                    EXISTS(
+                        SELECT 1 FROM `tabCash Bank Daily Balance` s WHERE s.account = sel.account
+                    ) AS maintained,
+                    (
+                        SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                        WHERE s.account = sel.account AND s.posting_date < %(from_date)s
+                        ORDER BY s.posting_date DESC LIMIT 1
+                    ) AS opening
+                FROM selected sel
+            )
+
+            SELECT
+                s.account,
+                CASE
+                    WHEN s.maintained THEN COALESCE(s.opening, 0)
+                    ELSE b.balance + COALESCE(SUM(gl.debit - gl.credit), 0)
+                END AS opening
+            FROM snapshot s
+            JOIN closing_base b ON b.account = s.account
+            -- only scanned for accounts the snapshot does not cover
+            LEFT JOIN `tabGL Entry` gl
+                ON NOT s.maintained
+                AND gl.is_cancelled = 0
+                AND gl.account = s.account
+                AND gl.posting_date > b.closing_date
+                AND gl.posting_date < %(from_date)s
+            GROUP BY s.account, s.maintained, s.opening, b.balance
+            ORDER BY s.account
+        """, {"accounts": tuple(accounts), "from_date": from_date}, as_dict=True)
+
+        def store_part(job, state, lines):
+            # The next piece of the file; the Client Script joins them in order
+            stored_file = frappe.get_doc({
+                "doctype": "File",
+                "file_name": f"{state['filename']}.part{len(state['parts']) + 1}",
+                "is_private": 1,
+                "attached_to_doctype": "Report",
+                "attached_to_name": "Cash & Bank Report",
+                "content": "\n".join(lines) + "\n",
+            }).insert(ignore_permissions=True)
+            state["parts"].append({"name": stored_file.name, "file_url": stored_file.file_url})
+
+        def concat_ws(separator, *values):
+            # CONCAT_WS: NULLs are skipped, empty strings are kept
+            return separator.join(value for value in values if value is not None)
+
+        def csv_line(values):
+            fields = []
+            for value in values:
+                text = "" if value is None else str(value)
+                if "," in text or '"' in text or "\n" in text or "\r" in text:
+                    text = '"' + text.replace('"', '""') + '"'
+                fields.append(text)
+            return ",".join(fields)
+
+        def xls_line(values):
+            # Expense, Payments, Receipts and Balance (the last four) are numbers
+            cells = []
+            for index, value in enumerate(values):
+                if value is None or value == "":
+                    cells.append("<Cell/>")
+                elif index >= len(values) - 4:
+                    cells.append('<Cell><Data ss:Type="Number">' + str(value) + "</Data></Cell>")
+                else:
+                    text = str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                    cells.append('<Cell><Data ss:Type="String">' + text + "</Data></Cell>")
+            return "<Row>" + "".join(cells) + "</Row>"
+
+        write_line = csv_line if file_format == "csv" else xls_line
+        lines = []
+        if file_format == "xls":
+            lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+            lines.append('<Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet"'
+                         ' xmlns:ss="urn:schemas-microsoft-com:office:spreadsheet">')
+            lines.append('<Worksheet ss:Name="Ledger"><Table>')
+        header = [
+            "Account", "Posting Date", "Voucher No", "Against / Account", "Remarks / Description",
+            "Expense", "Payments", "Receipts", "Balance",
+        ]
+        if file_format == "csv":
+            lines.append(csv_line(header))
+        else:
+            lines.append("<Row>" + "".join('<Cell><Data ss:Type="String">' + label + "</Data></Cell>" for label in header) + "</Row>")
+
+        for number, opening_row in enumerate(openings):
+            account = opening_row.account
+            running = opening_row.opening or 0
+            lines.append(write_line([account, from_date, "", "", "Opening Balance", "", "", "", running]))
+
+            day = None
+            window_start = frappe.utils.getdate(from_date)
+            while window_start <= frappe.utils.getdate(to_date):
+                window_end = min(
+                    frappe.utils.getdate(frappe.utils.add_days(window_start, chunk_days - 1)),
+                    frappe.utils.getdate(to_date),
+                )
+                gl_rows = frappe.db.sql("""
+                    SELECT
+                        gl.name AS gl_name,
+                        gl.posting_date,
+                        gl.voucher_type,
+                        gl.voucher_no,
+                        gl.against,
+                        gl.remarks,
+                        ROUND(gl.credit, 0) AS payments,
+                        ROUND(gl.debit, 0) AS receipts,
+                        gl.debit - gl.credit AS movement
+                    FROM `tabGL Entry` gl
+                    WHERE gl.account = %(account)s
+                      AND gl.is_cancelled = 0
+                      AND gl.posting_date BETWEEN %(window_start)s AND %(window_end)s
+                    ORDER BY gl.posting_date, gl.voucher_no, gl.name
+                """, {"account": account, "window_start": window_start, "window_end": window_end}, as_dict=True)
+
+                claim_vouchers = set()
+                for row in gl_rows:
+                    if row.voucher_type == "Expense Claim":
+                        claim_vouchers.add(row.voucher_no)
+                expense_details = {}
+                if claim_vouchers:
+                    for detail in frappe.db.sql("""
+                        SELECT
+                            parent,
+                            default_account,
+                            ROUND(COALESCE(amount, 0), 0) AS expense,
+                            COALESCE(description_text, REGEXP_REPLACE(description, '<[^>]*>', '')) AS description
+                        FROM `tabExpense Claim Detail`
+                        WHERE parent IN %(vouchers)s
+                        ORDER BY parent, name
+                    """, {"vouchers": tuple(claim_vouchers)}, as_dict=True):
+                        expense_details.setdefault(detail.parent, []).append(detail)
+
+                # GL rows of each voucher, in query order
+                vouchers = []
+                for row in gl_rows:
+                    if vouchers and vouchers[-1][0].posting_date == row.posting_date and vouchers[-1][0].voucher_no == row.voucher_no:
+                        vouchers[-1].append(row)
+                    else:
+                        vouchers.append([row])
+
+                # Same expansion as V3: expense row x GL row, payment once per claim
+                for voucher_rows in vouchers:
+                    if voucher_rows[0].posting_date != day:
+                        if day is not None:
+                            lines.append(write_line([account, day, "", "", "Day Total",
+                                                     day_expense, day_payments, day_receipts, running]))
+                        day = voucher_rows[0].posting_date
+                        day_expense = day_payments = day_receipts = 0
+
+                    hr_exp = voucher_rows[0].voucher_no.upper().startswith("HR-EXP")
+                    rn = 0
+                    for index, detail in enumerate(expense_details.get(voucher_rows[0].voucher_no) or [None]):
+                        for gl in voucher_rows:
+                            rn += 1
+                            expense = detail.expense if detail else 0
+                            payments = gl.payments if not hr_exp or rn == 1 else 0
+                            if index == 0:
+                                running += gl.movement
+                            lines.append(write_line([
+                                account,
+                                gl.posting_date,
+                                gl.voucher_no,
+                                concat_ws(" / ", gl.against, detail.default_account if detail else None),
+                                concat_ws(" | ", gl.remarks, detail.description if detail else None),
+                                expense,
+                                payments,
+                                gl.receipts,
+                                running,
+                            ]))
+                            day_expense += expense
+                            day_payments += payments
+                            day_receipts += gl.receipts
+
+                window_start = frappe.utils.getdate(frappe.utils.add_days(window_end, 1))
+
+                # Each window goes into the current part as it is read; the part is
+                # stored once it holds about 1 MB of text
+                if sum(len(line) + 1 for line in lines) >= 1048576:
+                    store_part(job, state, lines)
+                    lines = []
+
+            if day is not None:
+                lines.append(write_line([account, day, "", "", "Day Total", day_expense, day_payments, day_receipts, running]))
+            lines.append(write_line([account, to_date, "", "", "Closing Balance", "", "", "", running]))
+
+            state["progress"] = 5 + 90 * (number + 1) // len(openings)
+            frappe.cache.set_value(job, state, expires_in_sec=86400)
+
+        if file_format == "xls":
+            lines.append("</Table></Worksheet></Workbook>")
+        store_part(job, state, lines)
+
+        # The newest 20 exports are kept
+        stored = frappe.cache.get_value("cash_bank_export|stored") or []
+        stored.append({"job": job, "files": [part["name"] for part in state["parts"]]})
+        while len(stored) > 20:
+            oldest = stored.pop(0)
+            frappe.cache.delete_value(oldest["job"])
+            for name in oldest["files"]:
+                if frappe.db.exists("File", name):
+                    frappe.delete_doc("File", name, ignore_permissions=True)
+        frappe.cache.set_value("cash_bank_export|stored", stored)
+        frappe.db.commit()
+
+        state["status"] = "Completed"
+        state["progress"] = 100
+    except Exception as e:
+        frappe.log_error("Cash & Bank export failed", f"{job}\n{e}")
+        state["status"] = "Failed"
+        state["error"] = str(e)
+    frappe.cache.set_value(job, state, expires_in_sec=86400)
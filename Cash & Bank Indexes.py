@@ -0,0 +1,65 @@
+# Composite indexes the cash and bank reports and the snapshot scripts rely on.
+# Safe to run again: frappe.db.add_index / add_unique skip an index that
+# already exists under the same name.
+#
+#   tabGL Entry (account, is_cancelled, posting_date)
+#       V1/V2/V3 ledger rows, opening/closing aggregates, Cash Flow Statement
+#       balances, the GL Entry snapshot hooks and the snapshot rebuild.
+#   tabGL Entry (account, is_cancelled, posting_date, voucher_no)
+#       Keyset pages of the ledger (Cash & Bank Ledger Page.py): with the
+#       primary key InnoDB appends, it is already in (posting_date,
+#       voucher_no, name) order, so a page is read without a filesort.
+#   tabGL Entry (account, modified)
+#       Last change per account, which versions the stored print pages.
+#   tabExpense Claim Detail (parent)
+#       Expense detail fetch by parent; Frappe creates it for every child
+#       table, listed here so a customised site gets it back.
+#   tabAccount Closing Balance (account, closing_date)
+#       Latest period closing figure per account.
+#   tabCash Bank Daily Balance UNIQUE (account, posting_date)
+#       Opening/closing snapshot lookups.
+
+if frappe.session.user != "Administrator" and not frappe.db.exists(
+    "Has Role", {"parent": frappe.session.user, "parenttype": "User", "role": "System Manager"}
+):
+    frappe.throw("Only a System Manager can add the cash and bank report indexes")
+
+indexes = []
+
+frappe.db.add_index("GL Entry", ["account", "is_cancelled", "posting_date"], "cash_bank_account_posting_date")
+indexes.append("tabGL Entry.cash_bank_account_posting_date")
+
+frappe.db.add_index("GL Entry", ["account", "is_cancelled", "posting_date", "voucher_no"], "cash_bank_account_posting_voucher")
+indexes.append("tabGL Entry.cash_bank_account_posting_voucher")
+
+frappe.db.add_index("GL Entry", ["account", "modified"], "cash_bank_account_modified")
+indexes.append("tabGL Entry.cash_bank_account_modified")
+
+frappe.db.add_index("Expense Claim Detail", ["parent"], "parent")
+indexes.append("tabExpense Claim Detail.parent")
+
+if frappe.db.exists("DocType", "Account Closing Balance"):
+    frappe.db.add_index("Account Closing Balance", ["account", "closing_date"], "cash_bank_account_closing_date")
+    indexes.append("tabAccount Closing Balance.cash_bank_account_closing_date")
+
+if frappe.db.exists("DocType", "Cash Bank Daily Balance"):
+    frappe.db.add_unique("Cash Bank Daily Balance", ["account", "posting_date"], constraint_name="unique_account_posting_date")
+    indexes.append("tabCash Bank Daily Balance.unique_account_posting_date")
+
+frappe.response["message"] = indexes
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Indexes
+#   Script Type: API
+#   API Method: cash_bank_provision_indexes
+#
+# Run once after installing the reports and again after every bench migrate
+# (or keep a copy as a Scheduler Event, Daily, to re-check on its own):
+#   frappe.call("cash_bank_provision_indexes")
+#
+# The query plans are verified with tools/check_plans.py against a seeded
+# local MariaDB.
@@ -0,0 +1,298 @@
+# Add in Server Script
+#   Name: Cash & Bank Ledger Page
+#   Script Type: API
+#   API Method: cash_bank_ledger_page
+#
+# One page of an account's Cash & Bank Report (V3) ledger, for grids that load
+# rows as the user scrolls:
+#   frappe.xcall("cash_bank_ledger_page", {account: "MBL 0103525749 - CCL",
+#       from_date: "2025-01-01", to_date: "2025-12-31", page_length: 500})
+#   -> {rows: [...], cursor: {...}, summary: [...], totals: {opening: ..., closing: ..., ...}}
+#   frappe.xcall("cash_bank_ledger_page", {account: ..., from_date: ..., to_date: ...,
+#       cursor: <cursor of the previous page>})
+#   -> {rows: [...], cursor: {...} or null when the ledger is done}
+#
+# Pages are keyed on (posting_date, voucher_no, rn), the order V3 shows: the
+# cursor is the last row sent plus the running balance after it, so a page
+# reads only the GL rows from that voucher on (an ordered range of the
+# cash_bank_account_posting_voucher index) and never re-runs the opening and
+# closing aggregation. The first page also returns the summary cards, from
+# one aggregate over the range. Day frames are not sent.
+
+if not frappe.get_doc("Report", "Cash & Bank Report").is_permitted():
+    frappe.throw("You are not permitted to read the Cash & Bank Report")
+
+account = frappe.form_dict.get("account")
+from_date = frappe.form_dict.get("from_date")
+to_date = frappe.form_dict.get("to_date") or from_date
+if not account or not from_date:
+    frappe.throw("Please select From Date, To Date and Account")
+if frappe.utils.getdate(from_date) > frappe.utils.getdate(to_date):
+    frappe.throw("From Date cannot be after To Date")
+page_length = min(frappe.utils.cint(frappe.form_dict.get("page_length")) or 500, 5000)
+
+cursor = frappe.form_dict.get("cursor")
+if isinstance(cursor, str):
+    cursor = json.loads(cursor) if cursor else None
+
+def format_with_comma(val):
+    val = int(val)
+    s = str(val)
+    if len(s) <= 3:
+        return s
+    parts = []
+    while len(s) > 3:
+        parts.insert(0, s[-3:])
+        s = s[:-3]
+    parts.insert(0, s)
+    return ",".join(parts)
+
+summary = totals = None
+if not cursor:
+    # Opening and closing as V3 works them out: the snapshot (Cash & Bank
+    # Daily Balance.py), or the last period close plus the GL rows after it
+    if frappe.db.exists("DocType", "Account Closing Balance"):
+        closing_base = """
+            SELECT
+                COALESCE(last_close.closing_date, DATE '1900-01-01') AS closing_date,
+                COALESCE((
+                    SELECT SUM(acb.debit) - SUM(acb.credit)
+                    FROM `tabAccount Closing Balance` acb
+                    WHERE acb.account = %(account)s
+                      AND acb.closing_date = last_close.closing_date
+                ), 0) AS balance
+            FROM (
+                SELECT MAX(closing_date) AS closing_date
+                FROM `tabAccount Closing Balance`
+                WHERE account = %(account)s
+                  AND closing_date < %(from_date)s
+            ) last_close
+        """
+    else:
+        closing_base = "SELECT DATE '1900-01-01' AS closing_date, 0 AS balance"
+
+    balances = frappe.db.sql("""
+        WITH closing_base AS (""" + closing_base + """)
+
+        SELECT
+            EXISTS(
+                SELECT 1 FROM `tabCash Bank Daily Balance` s WHERE s.account = %(account)s
+            ) AS maintained,
+            (
+                SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                WHERE s.account = %(account)s AND s.posting_date < %(from_date)s
+                ORDER BY s.posting_date DESC LIMIT 1
+            ) AS snapshot_opening,
+            (
+                SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                WHERE s.account = %(account)s AND s.posting_date <= %(to_date)s
+                ORDER BY s.posting_date DESC LIMIT 1
+            ) AS snapshot_closing,
+            b.balance + COALESCE((
+                SELECT SUM(gl.debit - gl.credit) FROM `tabGL Entry` gl
+                WHERE gl.account = %(account)s
+                  AND gl.is_cancelled = 0
+                  AND gl.posting_date > b.closing_date
+                  AND gl.posting_date < %(from_date)s
+            ), 0) AS gl_opening,
+            b.balance + COALESCE((
+                SELECT SUM(gl.debit - gl.credit) FROM `tabGL Entry` gl
+                WHERE gl.account = %(account)s
+                  AND gl.is_cancelled = 0
+                  AND gl.posting_date > b.closing_date
+                  AND gl.posting_date <= %(to_date)s
+            ), 0) AS gl_closing
+        FROM closing_base b
+    """, {"account": account, "from_date": from_date, "to_date": to_date}, as_dict=True)[0]
+    if balances.maintained:
+        opening = balances.snapshot_opening or 0
+        closing = balances.snapshot_closing or 0
+    else:
+        opening = balances.gl_opening or 0
+        closing = balances.gl_closing or 0
+
+    # The figures V3's merge adds up, in one pass over the range: every GL row
+    # repeats once per expense row of its claim, and an HR-EXP claim's payment
+    # counts once, on its first GL row of the day
+    figures = frappe.db.sql("""
+        WITH gl AS (
+            SELECT
+                voucher_type,
+                voucher_no,
+                ROUND(credit, 0) AS payments,
+                ROUND(debit, 0) AS receipts,
+                ROW_NUMBER() OVER (PARTITION BY posting_date, voucher_no ORDER BY name) AS gl_rn
+            FROM `tabGL Entry`
+            WHERE account = %(account)s
+              AND is_cancelled = 0
+              AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+        ),
+
+        details AS (
+            SELECT parent, COUNT(*) AS detail_rows, SUM(ROUND(COALESCE(amount, 0), 0)) AS expense
+            FROM `tabExpense Claim Detail`
+            WHERE parent IN (SELECT voucher_no FROM gl WHERE voucher_type = 'Expense Claim')
+            GROUP BY parent
+        )
+
+        SELECT
+            COALESCE(SUM(COALESCE(d.expense, 0)), 0) AS total_expense,
+            COALESCE(SUM(CASE
+                WHEN gl.voucher_no LIKE 'HR-EXP%%' THEN IF(gl.gl_rn = 1, gl.payments, 0)
+                ELSE gl.payments * COALESCE(d.detail_rows, 1)
+            END), 0) AS total_payments,
+            COALESCE(SUM(gl.receipts * COALESCE(d.detail_rows, 1)), 0) AS total_receipts
+        FROM gl
+        LEFT JOIN details d ON d.parent = gl.voucher_no AND gl.voucher_type = 'Expense Claim'
+    """, {"account": account, "from_date": from_date, "to_date": to_date}, as_dict=True)[0]
+    totals = {
+        "opening": opening,
+        "closing": closing,
+        "total_expense": figures.total_expense,
+        "total_payments": figures.total_payments,
+        "total_receipts": figures.total_receipts,
+    }
+
+    summary = [
+        {"label": "Opening Balance", "value": format_with_comma(opening), "indicator": "Orange"},
+        {"label": "Today Receipts", "value": format_with_comma(figures.total_receipts), "indicator": "Green"},
+        {"label": "Total Balance", "value": format_with_comma(opening + figures.total_receipts), "indicator": "Blue"},
+        {"label": "Net Cash Flow", "value": format_with_comma(figures.total_receipts - figures.total_payments), "indicator": "Blue"},
+        {"label": "Total Payments", "value": format_with_comma(figures.total_payments), "indicator": "Red"},
+        {"label": "Total Expense", "value": format_with_comma(figures.total_expense), "indicator": "Red"},
+        {"label": "Other Payments", "value": format_with_comma(figures.total_payments - figures.total_expense), "indicator": "Red"},
+        {"label": "Closing Balance", "value": format_with_comma(closing), "indicator": "Green"},
+    ]
+    cursor = {"posting_date": from_date, "voucher_no": "", "rn": 0, "balance": opening}
+
+def concat_ws(separator, *values):
+    # CONCAT_WS: NULLs are skipped, empty strings are kept
+    return separator.join(value for value in values if value is not None)
+
+# Read GL rows in keyset batches until the page is full. The cursor's own
+# voucher is read again and its rows up to the cursor's rn are skipped.
+# The balance travels through the browser as a JSON number, so it is carried
+# as a float rounded to the ledger's 9 decimals.
+rows = []
+running = frappe.utils.flt(cursor["balance"], 9)
+position = {"posting_date": cursor["posting_date"], "voucher_no": cursor["voucher_no"]}
+voucher_condition = "voucher_no >= %(voucher_no)s"
+next_cursor = None
+while len(rows) < page_length:
+    batch = frappe.db.sql("""
+        SELECT
+            name AS gl_name,
+            posting_date,
+            voucher_type,
+            voucher_no,
+            against,
+            remarks,
+            ROUND(credit, 0) AS payments,
+            ROUND(debit, 0) AS receipts,
+            debit - credit AS movement
+        FROM `tabGL Entry`
+        WHERE account = %(account)s
+          AND is_cancelled = 0
+          AND posting_date BETWEEN %(posting_date)s AND %(to_date)s
+          AND (posting_date > %(posting_date)s OR """ + voucher_condition + """)
+        ORDER BY posting_date, voucher_no, name
+        LIMIT %(limit)s
+    """, {
+        "account": account,
+        "posting_date": position["posting_date"],
+        "voucher_no": position["voucher_no"],
+        "to_date": to_date,
+        "limit": page_length + 1,
+    }, as_dict=True)
+    if not batch:
+        break
+
+    vouchers = []
+    for row in batch:
+        if vouchers and vouchers[-1][0].posting_date == row.posting_date and vouchers[-1][0].voucher_no == row.voucher_no:
+            vouchers[-1].append(row)
+        else:
+            vouchers.append([row])
+    more = len(batch) > page_length
+    if more and len(vouchers) > 1:
+        # the last voucher may be cut off by the LIMIT; the next batch starts at it
+        vouchers.pop()
+    elif more:
+        vouchers[0] = frappe.db.sql("""
+            SELECT
+                name AS gl_name,
+                posting_date,
+                voucher_type,
+                voucher_no,
+                against,
+                remarks,
+                ROUND(credit, 0) AS payments,
+                ROUND(debit, 0) AS receipts,
+                debit - credit AS movement
+            FROM `tabGL Entry`
+            WHERE account = %(account)s
+              AND is_cancelled = 0
+              AND posting_date = %(posting_date)s
+              AND voucher_no = %(voucher_no)s
+            ORDER BY name
+        """, {"account": account, "posting_date": batch[0].posting_date, "voucher_no": batch[0].voucher_no}, as_dict=True)
+
+    claim_vouchers = set()
+    for voucher_rows in vouchers:
+        if voucher_rows[0].voucher_type == "Expense Claim":
+            claim_vouchers.add(voucher_rows[0].voucher_no)
+    expense_details = {}
+    if claim_vouchers:
+        for detail in frappe.db.sql("""
+            SELECT
+                parent,
+                default_account,
+                ROUND(COALESCE(amount, 0), 0) AS expense,
+                COALESCE(description_text, REGEXP_REPLACE(description, '<[^>]*>', '')) AS description
+            FROM `tabExpense Claim Detail`
+            WHERE parent IN %(vouchers)s
+            ORDER BY parent, name
+        """, {"vouchers": tuple(claim_vouchers)}, as_dict=True):
+            expense_details.setdefault(detail.parent, []).append(detail)
+
+    # Same expansion as V3: expense row x GL row, payment once per claim
+    for voucher_rows in vouchers:
+        first = voucher_rows[0]
+        skip = cursor["rn"] if (
+            str(first.posting_date) == str(cursor["posting_date"]) and first.voucher_no == cursor["voucher_no"]
+        ) else 0
+        hr_exp = first.voucher_no.upper().startswith("HR-EXP")
+        rn = 0
+        for index, detail in enumerate(expense_details.get(first.voucher_no) or [None]):
+            for gl in voucher_rows:
+                rn += 1
+                if rn <= skip or len(rows) >= page_length:
+                    continue
+                if index == 0:
+                    running = frappe.utils.flt(running + frappe.utils.flt(gl.movement), 9)
+                rows.append({
+                    "posting_date": gl.posting_date,
+                    "voucher_no": gl.voucher_no,
+                    "against_account": concat_ws(" / ", gl.against, detail.default_account if detail else None),
+                    "description": concat_ws(" | ", gl.remarks, detail.description if detail else None),
+                    "expense": detail.expense if detail else 0,
+                    "payments": gl.payments if not hr_exp or rn == 1 else 0,
+                    "receipts": gl.receipts,
+                    "balance": running,
+                })
+                next_cursor = {
+                    "posting_date": str(gl.posting_date),
+                    "voucher_no": gl.voucher_no,
+                    "rn": rn,
+                    "balance": running,
+                }
+
+    last = vouchers[-1][0]
+    position = {"posting_date": last.posting_date, "voucher_no": last.voucher_no}
+    voucher_condition = "voucher_no > %(voucher_no)s"
+    if not more:
+        if len(rows) < page_length:
+            next_cursor = None
+        break
+
+frappe.response["message"] = {"rows": rows, "cursor": next_cursor, "summary": summary, "totals": totals}
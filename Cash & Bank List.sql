@@ -1,22 +1,91 @@
-SELECT 
-    name, 
-    account_type,
-    account_name
-FROM 
-    tabAccount 
-WHERE 
-    account_type = %(account_type)s;
+WITH selected AS (
+    SELECT
+        name,
+        account_type,
+        account_name
+    FROM
+        tabAccount
+    WHERE
+        account_type IN ('Cash', 'Bank')
+        AND is_group = 0
+        AND (%(account_type)s = 'All' OR account_type = %(account_type)s)
+),
+
+-- Accounts kept by Cash Bank Daily Balance (Cash & Bank Daily Balance.py) are
+-- read from their snapshot rows: the latest one up to the date for the
+-- balance, the date's own row for its receipts and payments
+snapshot AS (
+    SELECT
+        sel.name AS account,
+        EXISTS(
+            SELECT 1 FROM `tabCash Bank Daily Balance` s WHERE s.account = sel.name
+        ) AS maintained,
+        (
+            SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+            WHERE s.account = sel.name AND s.posting_date <= %(as_on_date)s
+            ORDER BY s.posting_date DESC LIMIT 1
+        ) AS balance,
+        (
+            SELECT s.debit_total FROM `tabCash Bank Daily Balance` s
+            WHERE s.account = sel.name AND s.posting_date = %(as_on_date)s
+        ) AS receipts,
+        (
+            SELECT s.credit_total FROM `tabCash Bank Daily Balance` s
+            WHERE s.account = sel.name AND s.posting_date = %(as_on_date)s
+        ) AS payments
+    FROM selected sel
+)
+
+-- Every other account from one grouped aggregate over its GL rows
+SELECT
+    sel.name,
+    sel.account_type,
+    sel.account_name,
+    CASE
+        WHEN s.maintained THEN COALESCE(s.balance, 0)
+        ELSE COALESCE(SUM(gl.debit - gl.credit), 0)
+    END AS current_balance,
+    CASE
+        WHEN s.maintained THEN COALESCE(s.receipts, 0)
+        ELSE COALESCE(SUM(IF(gl.posting_date = %(as_on_date)s, gl.debit, 0)), 0)
+    END AS today_receipts,
+    CASE
+        WHEN s.maintained THEN COALESCE(s.payments, 0)
+        ELSE COALESCE(SUM(IF(gl.posting_date = %(as_on_date)s, gl.credit, 0)), 0)
+    END AS today_payments
+FROM
+    selected sel
+JOIN
+    snapshot s ON s.account = sel.name
+-- only scanned for accounts the snapshot does not cover
+LEFT JOIN
+    `tabGL Entry` gl
+    ON NOT s.maintained
+    AND gl.is_cancelled = 0
+    AND gl.account = sel.name
+    AND gl.posting_date <= %(as_on_date)s
+GROUP BY
+    sel.name, sel.account_type, sel.account_name, s.maintained, s.balance, s.receipts, s.payments
+ORDER BY
+    sel.account_type, sel.name;
 
 
 
 ==============================
 #//Set Filters:
     {
-        'label': 'Account',        
+        'label': 'Account',
         'fieldtype': 'Select',
         'fieldname': 'account_type',
-        'options': 'Cash, Bank',
-        'default': 'Cash',
+        'options': 'All\nCash\nBank',
+        'default': 'All',
+    }
+    {
+        'label': 'As On Date',
+        'fieldtype': 'Date',
+        'fieldname': 'as_on_date',
+        'default': 'Today',
+        'reqd': 1,
     }
 
 /////////////////////////////
@@ -43,5 +112,26 @@ WHERE
         'options': '',
         'width': 500
     }
---------------
+    {
+        'fieldname': 'current_balance',
+        'label': 'Current Balance',
+        'fieldtype': 'Currency',
+        'options': '',
+        'width': 160
+    }
+    {
+        'fieldname': 'today_receipts',
+        'label': 'Today Receipts',
+        'fieldtype': 'Currency',
+        'options': '',
+        'width': 140
+    }
+    {
+        'fieldname': 'today_payments',
+        'label': 'Today Payments',
+        'fieldtype': 'Currency',
+        'options': '',
+        'width': 140
+    }
 
+    Tick "Add Total Row" on the Report to see the cash and bank held in total.
@@ -0,0 +1,51 @@
+# Add in Server Script
+#   Name: Cash & Bank Perf
+#   Script Type: API
+#   API Method: cash_bank_perf
+#
+# Switches the report instrumentation on or off for a user and reads the last
+# runs it recorded. Off by default; the per-user switch expires on its own.
+#   frappe.xcall("cash_bank_perf", {action: "enable"})                  // you, 60 minutes
+#   frappe.xcall("cash_bank_perf", {action: "enable", user: "a@b.com", minutes: 240})
+#   frappe.xcall("cash_bank_perf", {action: "disable"})
+#   frappe.xcall("cash_bank_perf", {action: "log"})                     // last 50 runs
+#   frappe.xcall("cash_bank_perf", {action: "clear"})
+#
+# A single run can be instrumented without the switch by adding perf: 1 to
+# its filters:
+#   frappe.xcall("frappe.desk.query_report.run", {
+#       report_name: "Cash Flow Statement",
+#       filters: {posting_date: "2025-01-31", perf: 1},
+#   })
+
+system_manager = frappe.session.user == "Administrator" or frappe.db.exists(
+    "Has Role", {"parent": frappe.session.user, "parenttype": "User", "role": "System Manager"}
+)
+
+action = frappe.form_dict.get("action") or "log"
+user = frappe.form_dict.get("user") or frappe.session.user
+if user != frappe.session.user and not system_manager:
+    frappe.throw("Only a System Manager can change instrumentation for another user")
+
+if action == "enable":
+    minutes = frappe.utils.cint(frappe.form_dict.get("minutes")) or 60
+    frappe.cache.set_value("cash_bank_perf_user|" + user, 1, expires_in_sec=minutes * 60)
+    frappe.response["message"] = {"user": user, "minutes": minutes}
+
+elif action == "disable":
+    frappe.cache.delete_value("cash_bank_perf_user|" + user)
+    frappe.response["message"] = {"user": user}
+
+elif action == "clear":
+    if not system_manager:
+        frappe.throw("Only a System Manager can clear the instrumentation log")
+    frappe.cache.delete_value("cash_bank_perf_log")
+    frappe.response["message"] = []
+
+else:
+    # Users see their own runs, a System Manager sees everyone's
+    runs = []
+    for run in frappe.cache.get_value("cash_bank_perf_log") or []:
+        if system_manager or run["user"] == frappe.session.user:
+            runs.append(run)
+    frappe.response["message"] = runs
@@ -0,0 +1,53 @@
+# Build yesterday's Cash & Bank Report (V3) for every Cash/Bank account before
+# the cashiers open it. One consolidated run fetches all the accounts in a
+# single statement; with precompute set it stores each account's own result in
+# the result cache (Cash & Bank Result Cache.py) under the key a single-account
+# run for that day looks up, so those opens read the stored rows, opening,
+# closing and summary figures and do not touch tabGL Entry. A posting to a
+# stored day afterwards changes the account's GL version and that account is
+# computed again on its next open.
+yesterday = str(frappe.utils.getdate(frappe.utils.add_days(frappe.utils.nowdate(), -1)))
+
+# The Cash & Bank List.sql set, both types, ledger accounts only
+accounts = [
+    row.name
+    for row in frappe.db.sql("""
+        SELECT name
+        FROM tabAccount
+        WHERE account_type IN ('Cash', 'Bank')
+          AND is_group = 0
+        ORDER BY name
+    """, as_dict=True)
+]
+
+if accounts:
+    frappe.call(
+        "frappe.desk.query_report.run",
+        report_name="Cash & Bank Report",
+        filters={
+            "from_date": yesterday,
+            "to_date": yesterday,
+            "consolidated": 1,
+            "accounts": accounts,
+            "precompute": 1,
+        },
+        ignore_prepared_report=True,
+    )
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Precompute
+#   Script Type: Scheduler Event
+#   Event Frequency: Cron
+#   Cron Format: 15 0 * * *
+#
+# Runs at 00:15, after the day has closed. The stored entries count towards the
+# result cache's 200-entry bound: one per account plus the consolidated run.
+# To fill a day by hand, run the report with the same filters:
+#   frappe.xcall("frappe.desk.query_report.run", {
+#       report_name: "Cash & Bank Report",
+#       filters: {from_date: "2025-01-31", to_date: "2025-01-31", consolidated: 1, precompute: 1},
+#   })
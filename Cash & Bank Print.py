@@ -0,0 +1,375 @@
+# Printable page of "Cash & Bank Report" (V3) and "Cash Flow Statement",
+# rendered here instead of in the browser. A closed day (before today) is
+# rendered once per ledger state and kept in frappe.cache; printing it again
+# returns the stored page without running the report. The stored page holds a
+# placeholder where the "Created By" user goes, filled in for each caller.
+
+template = """<html>
+  <head>
+    <title>{{ report_name }}</title>
+    <style>
+      @media print {
+        @page { size: landscape; margin: 10mm; }
+      }
+      body { font-family: sans-serif; font-size: 12px; margin: 10px; }
+      .header { display: flex; justify-content: space-between; align-items: center; }
+      .header-left { text-align: left; }
+      .header-right img { max-width: 70px; }
+      .cards { margin-bottom: 20px; display: inline-block; vertical-align: top; }
+      .cards + .cards { margin-left: 20px; }
+      .cards table { width: 300px; }
+      .cards th { border: 2px solid #0d0405; padding: 8px; background-color: #f2f2f2; text-align: center; }
+      .cards td { border: 1px solid #050000; padding: 5px; }
+      .cards td.value { padding: 6px; text-align: right; }
+      table {
+        width: 100%;
+        border-collapse: collapse;
+        font-size: 12px;
+        margin-top: 5px;
+        table-layout: fixed;
+        word-wrap: break-word;
+      }
+      .ledger th, .ledger td {
+        border: 1px solid #444;
+        padding: 5px;
+        text-align: left;
+      }
+      .ledger th { background-color: #f8facf; font-weight: bold; }
+      .ledger .num { text-align: right; }
+      .ledger tr.bold td { font-weight: bold; }
+      .footer {
+        margin-top: 80px;
+        font-size: 12px;
+        color: black;
+        display: flex;
+        justify-content: space-between;
+      }
+      .footer-left, .footer-center, .footer-right {
+        width: 30%;
+        text-align: left;
+      }
+      .footer-center {
+        text-align: center;
+      }
+      .footer-right {
+        text-align: right;
+      }
+    </style>
+  </head>
+  <body>
+    <div class="header">
+      <div class="header-left">
+        <h2>{{ company_name | e }}</h2>
+        {% for label, value in header %}
+        <p><strong>{{ label }}:</strong> {{ value | e }}</p>
+        {% endfor %}
+      </div>
+      <div class="header-right">
+        <img src="{{ logo_url | e }}" alt="Company Logo">
+      </div>
+    </div>
+    <hr>
+    <div class="cards">
+      <table>
+        <thead><tr><th colspan="2">Opening Balance, Receipts & Cashflow</th></tr></thead>
+        <tbody>
+          {% for label in ["Opening Balance", "Today Receipts", "Total Balance", "Net Cash Flow"] %}
+          <tr><td>{{ label }}</td><td class="value">{{ cards[label] }}</td></tr>
+          {% endfor %}
+        </tbody>
+      </table>
+    </div>
+    <div class="cards">
+      <table>
+        <thead><tr><th colspan="2">Expenses, Payments & Closing Balance</th></tr></thead>
+        <tbody>
+          {% for label in ["Total Payments", "Total Expense", "Other Payments", "Closing Balance"] %}
+          <tr><td>{{ label }}</td><td class="value">{{ cards[label] }}</td></tr>
+          {% endfor %}
+        </tbody>
+      </table>
+    </div>
+    <h2>Detailed Ledger Transactions Report</h2>
+    <table class="ledger">
+      <thead>
+        <tr>
+          {% for column in columns %}
+          <th style="width: {{ column.width }}px;">{{ column.label }}</th>
+          {% endfor %}
+        </tr>
+      </thead>
+      <tbody>
+        {% for row in rows %}
+        <tr{% if row.bold %} class="bold"{% endif %}>
+          {% for column in columns %}
+          <td{% if column.numeric %} class="num"{% endif %}>{{ row[column.fieldname] | e }}</td>
+          {% endfor %}
+        </tr>
+        {% endfor %}
+      </tbody>
+      <tfoot>
+        <tr>
+          {% for column in columns %}
+          {% if loop.first %}
+          <th colspan="{{ columns | length - totals | length - (1 if has_balance else 0) }}" class="num">Total</th>
+          {% elif column.fieldname in totals %}
+          <th class="num">{{ totals[column.fieldname] }}</th>
+          {% endif %}
+          {% endfor %}
+          {% if has_balance %}<th></th>{% endif %}
+        </tr>
+      </tfoot>
+    </table>
+
+    <div class="footer">
+      <div class="footer-left">
+        <strong>Created By:</strong><br>
+        {{ user | e }}
+      </div>
+      <div class="footer-center">
+        <strong>Submitted By:</strong><br>
+        Accountant
+      </div>
+      <div class="footer-right">
+        <strong>Approved By:</strong><br>
+        Director
+      </div>
+    </div>
+  </body>
+</html>
+"""
+
+report_name = frappe.form_dict.get("report_name")
+if report_name not in ("Cash & Bank Report", "Cash Flow Statement"):
+    frappe.throw("Printing is available for Cash & Bank Report and Cash Flow Statement only")
+
+filters = frappe.form_dict.get("filters") or {}
+if isinstance(filters, str):
+    filters = json.loads(filters)
+loaded = frappe.form_dict.get("data")
+if isinstance(loaded, str):
+    loaded = json.loads(loaded)
+
+consolidated = frappe.utils.cint(filters.get("consolidated"))
+selected = filters.get("accounts") or []
+if isinstance(selected, str):
+    selected = [name.strip() for name in selected.split(",") if name.strip()]
+
+if report_name == "Cash Flow Statement":
+    last_date = filters.get("posting_date")
+else:
+    last_date = filters.get("to_date") or filters.get("from_date") or filters.get("posting_date")
+closed = bool(last_date) and frappe.utils.getdate(last_date) < frappe.utils.getdate(frappe.utils.nowdate())
+
+# A closed day's page is stored under the filters and the latest change to
+# any GL row of the accounts it covers: a backdated or cancelled entry moves
+# MAX(modified), so the page is rendered again.
+artifact_key = None
+html = None
+if closed:
+    tree = frappe.cache.get_value("cash_bank_account_tree")
+    if not tree:
+        tree = {"accounts": {}, "cash_bank": []}
+        for acc in frappe.db.sql("""
+            SELECT name, parent_account, lft, rgt, account_type, company, is_group
+            FROM `tabAccount`
+            ORDER BY lft
+        """, as_dict=True):
+            tree["accounts"][acc.name] = {
+                "name": acc.name,
+                "parent_account": acc.parent_account,
+                "lft": acc.lft,
+                "rgt": acc.rgt,
+                "account_type": acc.account_type,
+                "company": acc.company,
+                "is_group": acc.is_group,
+            }
+            if not acc.is_group and acc.account_type in ("Cash", "Bank"):
+                tree["cash_bank"].append(acc.name)
+        tree["cash_bank"].sort()
+        frappe.cache.set_value("cash_bank_account_tree", tree, expires_in_sec=86400)
+
+    if report_name == "Cash Flow Statement":
+        parent = tree["accounts"].get(filters.get("parent_account")) if filters.get("parent_account") else None
+        accounts = []
+        for acc in tree["accounts"].values():
+            if acc["is_group"]:
+                continue
+            if parent and not (acc["lft"] > parent["lft"] and acc["rgt"] < parent["rgt"]):
+                continue
+            accounts.append(acc["name"])
+    elif consolidated:
+        accounts = selected or tree["cash_bank"]
+    else:
+        accounts = [filters.get("account")]
+
+    version = None
+    if accounts:
+        for row in frappe.db.sql("""
+            SELECT account, MAX(modified) AS modified
+            FROM `tabGL Entry`
+            WHERE account IN %(accounts)s
+            GROUP BY account
+        """, {"accounts": tuple(accounts)}, as_dict=True):
+            if version is None or row.modified > version:
+                version = row.modified
+
+    artifact_key = f"cash_bank_print_page|{report_name}|{json.dumps(filters, sort_keys=True, default=str)}|{version}"
+    html = frappe.cache.get_value(artifact_key)
+
+if not html:
+    # The open day prints the rows already on screen when the browser sends
+    # them (they are not stored); a closed day is always run here, and so is a
+    # grid still waiting for its background run, which has no summary yet.
+    if loaded and not closed and loaded.get("summary"):
+        rows = loaded.get("result") or []
+        summary = loaded.get("summary") or []
+    else:
+        frappe.response["cash_bank_background"] = None
+        output = frappe.call("frappe.desk.query_report.run", report_name=report_name, filters=filters)
+        rows = output.get("result") or []
+        summary = output.get("report_summary") or output.get("summary") or []
+
+        # Heavy filters are queued by the report (Cash & Bank Background
+        # Run.py): nothing is printed until the stored result is there, and a
+        # stale stored result is printed but not kept.
+        background = frappe.response.get("cash_bank_background") or {}
+        if background.get("pending"):
+            frappe.throw("This report is still being prepared in the background. Print it once it has opened.")
+        if background.get("stale"):
+            artifact_key = None
+
+    def format_with_comma(val):
+        try:
+            val = int(val or 0)
+            s = str(val)
+            if len(s) <= 3:
+                return s
+            parts = []
+            while len(s) > 3:
+                parts.insert(0, s[-3:])
+                s = s[:-3]
+            parts.insert(0, s)
+            return ",".join(parts)
+        except Exception:
+            return "0"
+
+    if report_name == "Cash Flow Statement":
+        columns = [
+            {"fieldname": "posting_date", "label": "Posting Date", "width": 100},
+            {"fieldname": "voucher_no", "label": "Voucher No", "width": 130},
+            {"fieldname": "against_account", "label": "Against / Account", "width": 180},
+            {"fieldname": "parent_account", "label": "Parent Account", "width": 200},
+            {"fieldname": "account", "label": "Account", "width": 200},
+            {"fieldname": "description", "label": "Description", "width": 250},
+            {"fieldname": "expense", "label": "Expense", "width": 90, "numeric": 1},
+            {"fieldname": "payments", "label": "Payments", "width": 90, "numeric": 1},
+            {"fieldname": "receipts", "label": "Receipts", "width": 90, "numeric": 1},
+        ]
+        header = [
+            ("Posting Date", filters.get("posting_date")),
+            ("Parent Account", filters.get("parent_account") or "All"),
+        ]
+    else:
+        columns = [
+            {"fieldname": "posting_date", "label": "Posting Date", "width": 100},
+            {"fieldname": "voucher_no", "label": "Voucher No", "width": 130},
+            {"fieldname": "against_account", "label": "Against / Account", "width": 180},
+            {"fieldname": "description", "label": "Description", "width": 250},
+            {"fieldname": "expense", "label": "Expense", "width": 90, "numeric": 1},
+            {"fieldname": "payments", "label": "Payments", "width": 90, "numeric": 1},
+            {"fieldname": "receipts", "label": "Receipts", "width": 90, "numeric": 1},
+            {"fieldname": "balance", "label": "Balance", "width": 100, "numeric": 1},
+        ]
+        from_date = filters.get("from_date") or filters.get("posting_date")
+        to_date = filters.get("to_date") or from_date
+        header = [
+            ("Posting Date", from_date if from_date == to_date else f"{from_date} to {to_date}"),
+            ("Account", (", ".join(selected) or "All Cash & Bank Accounts") if consolidated else filters.get("account")),
+        ]
+
+    # Opening and day total rows of a date range are not ledger rows
+    total_expense = total_payments = total_receipts = 0
+    lines = []
+    for row in rows:
+        if not row.get("bold"):
+            total_expense += frappe.utils.flt(row.get("expense"))
+            total_payments += frappe.utils.flt(row.get("payments"))
+            total_receipts += frappe.utils.flt(row.get("receipts"))
+        lines.append({
+            "bold": row.get("bold"),
+            "posting_date": row.get("posting_date") or "",
+            "voucher_no": row.get("voucher_no") or "",
+            # consolidated opening/total rows name their account here
+            "against_account": row.get("against_account") or (row.get("account") if consolidated and row.get("bold") else "") or "",
+            "parent_account": row.get("parent_account") or "",
+            "account": row.get("account") or "",
+            "description": row.get("description") or "",
+            "expense": format_with_comma(row.get("expense")),
+            "payments": format_with_comma(row.get("payments")),
+            "receipts": format_with_comma(row.get("receipts")),
+            "balance": format_with_comma(row.get("balance")),
+        })
+
+    cards = {}
+    for label in (
+        "Opening Balance", "Today Receipts", "Total Balance", "Net Cash Flow",
+        "Total Payments", "Total Expense", "Other Payments", "Closing Balance",
+    ):
+        cards[label] = "0"
+    for item in summary:
+        if item.get("label") in cards and item.get("value") is not None:
+            cards[item.get("label")] = str(item.get("value"))
+
+    company_name = frappe.db.get_single_value("Global Defaults", "default_company") or ""
+    logo_url = (company_name and frappe.db.get_value("Company", company_name, "company_logo")) or "/files/logo CCL.JPG"
+
+    html = frappe.render_template(template, {
+        "report_name": report_name,
+        "company_name": company_name,
+        "logo_url": logo_url,
+        "header": header,
+        "cards": cards,
+        "columns": columns,
+        "rows": lines,
+        "has_balance": report_name != "Cash Flow Statement",
+        "totals": {
+            "expense": format_with_comma(total_expense),
+            "payments": format_with_comma(total_payments),
+            "receipts": format_with_comma(total_receipts),
+        },
+        "user": "{{cash_bank_print_user}}",
+    })
+
+    if artifact_key:
+        frappe.cache.set_value(artifact_key, html, expires_in_sec=30 * 86400)
+
+user = frappe.session.user.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+frappe.response["message"] = {
+    "html": html.replace("{{cash_bank_print_user}}", user),
+    "stored": bool(artifact_key),
+}
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Print
+#   Script Type: API
+#   API Method: cash_bank_print
+#
+#   frappe.xcall("cash_bank_print", {report_name: "Cash & Bank Report", filters: {...}})
+#   frappe.xcall("cash_bank_print", {report_name: "Cash Flow Statement", filters: {...}, data: {result, summary}})
+#
+# Returns {html, stored}. The report's Print button opens the html in a new
+# tab; its PDF button hands the same html to frappe.render_pdf, which posts it
+# to frappe.utils.print_format.report_to_pdf (Server Scripts cannot call the
+# PDF generator themselves).
+#
+# Filters the report runs in the background (Cash & Bank Background Run.py)
+# print from its stored result; while that run is pending the print is refused
+# rather than a blank page being rendered and stored.
+#
+# Stored pages live in frappe.cache for 30 days. The MAX(modified) lookup
+# reads the (account, modified) index from "Cash & Bank Indexes.py".
@@ -24,7 +24,7 @@ result = frappe.db.sql("""
             gl.credit,
             ecd.default_account,
             ecd.amount AS expense_amount,
-            REGEXP_REPLACE(ecd.description, '<[^>]*>', '') AS ecd_description,
+            COALESCE(ecd.description_text, REGEXP_REPLACE(ecd.description, '<[^>]*>', '')) AS ecd_description,
             ecd.name AS ecd_name
         FROM `tabGL Entry` gl
         LEFT JOIN `tabExpense Claim Detail` ecd ON gl.voucher_no = ecd.parent
@@ -63,10 +63,12 @@ result = frappe.db.sql("""
     ORDER BY posting_date, voucher_no, rn
 """, (account, posting_date), as_dict=True)
 
-# Totals
-total_expense = sum(row.expense or 0 for row in result)
-total_payments = sum(row.payments or 0 for row in result)
-total_receipts = sum(row.receipts or 0 for row in result)
+# Totals in one pass over the rows
+total_expense = total_payments = total_receipts = 0
+for row in result:
+    total_expense += row.expense or 0
+    total_payments += row.payments or 0
+    total_receipts += row.receipts or 0
 
 # Opening and Closing Balances
 opening = frappe.db.sql("""
@@ -117,6 +119,27 @@ data = columns, result, message, None, summary, None
 
 Javascript
 
+// Cash/Bank accounts the user may see (Cash & Bank Account Tree.py), fetched
+// once per session. The list kept from an earlier session is sent back by its
+// etag and reused when the server reports it unchanged.
+function cash_bank_accounts() {
+  if (!frappe.cash_bank_accounts) {
+    const key = "cash_bank_accounts|" + frappe.session.user;
+    const stored = JSON.parse(localStorage.getItem(key) || "null");
+    frappe.cash_bank_accounts = frappe.xcall("cash_bank_account_tree", { etag: stored ? stored.etag : "" })
+      .then(response => {
+        if (response.not_modified) return stored.accounts;
+        localStorage.setItem(key, JSON.stringify(response));
+        return response.accounts;
+      })
+      .catch(err => {
+        frappe.cash_bank_accounts = null;
+        throw err;
+      });
+  }
+  return frappe.cash_bank_accounts;
+}
+
 frappe.query_reports["Cash & Bank Report"] = {
   filters: [
     {
@@ -130,25 +153,24 @@ frappe.query_reports["Cash & Bank Report"] = {
       fieldname: "account",
       label: "Account",
       fieldtype: "Select",
-      options: [
-        "Cash with Anam - CCL",
-        "Cash with Azhar - CCL",
-        "Cash with Boota - CCL",
-        "Cash with Khalil - CCL",
-        "Cash with Salman Sarwar - CCL",
-        "Cash with Suwaib - CCL",
-        "MBL 0103525749 - CCL",
-        "Bank Clearance - CCL",
-        "MBL Abdul Rehman - 083 - CCL",
-        "MBL Abdul Rehman - CCL",
-        "MBL Rutab Ahmad - CCL"
-      ],
-      default: "Cash with Anam - CCL",
+      options: [],
       reqd: 1
     }
   ],
 
+  after_datatable_render: function() {
+    // Filters the grid on screen was loaded for, checked by Print
+    frappe.query_report.loaded_filters = JSON.stringify(frappe.query_report.get_filter_values());
+  },
   onload: function(report) {
+    // Account options are filled in once the session's list is loaded
+    cash_bank_accounts().then(accounts => {
+      const filter = report.get_filter("account");
+      filter.df.options = accounts.map(account => account.value);
+      filter.refresh();
+      if (!filter.get_value() && accounts.length) filter.set_value(accounts[0].value);
+    });
+
     // Add Printable HTML button only once
     if (!report.page.inner_toolbar_buttons || !report.page.inner_toolbar_buttons["Printable HTML"]) {
       report.page.add_inner_button("Printable HTML", async () => {
@@ -160,29 +182,35 @@ frappe.query_reports["Cash & Bank Report"] = {
         }
 
         try {
-          // Run the report
-          const result = await new Promise((resolve, reject) => {
-            frappe.call({
-              method: "frappe.desk.query_report.run",
-              args: {
-                report_name: "Cash & Bank Report",
-                filters: filters
-              },
-              callback: function(r) {
-                if (r.exc) {
-                  reject(r.exc);
-                } else {
-                  resolve(r);
+          // Print the rows already on screen when they were loaded for these
+          // filters; run the report again only when they are stale
+          let message;
+          if (report.raw_data && report.loaded_filters === JSON.stringify(filters)) {
+            message = report.raw_data;
+          } else {
+            const result = await new Promise((resolve, reject) => {
+              frappe.call({
+                method: "frappe.desk.query_report.run",
+                args: {
+                  report_name: "Cash & Bank Report",
+                  filters: filters
+                },
+                callback: function(r) {
+                  if (r.exc) {
+                    reject(r.exc);
+                  } else {
+                    resolve(r);
+                  }
                 }
-              }
+              });
             });
-          });
-
-          const data = result.message.result || [];
-          const summary = result.message.summary || [];
+            message = result.message;
+          }
+          const data = message.result || [];
+          const summary = message.summary || message.report_summary || [];
 
           // Log for debugging
-          console.log("Full Result:", JSON.stringify(result, null, 2));
+          console.log("Full Result:", JSON.stringify(message, null, 2));
           console.log("Summary:", summary);
           console.log("Data:", data);
 
@@ -7,83 +7,581 @@ columns = [
     {"fieldname": "expense", "label": "Expense", "fieldtype": "Currency", "width": 125},
     {"fieldname": "payments", "label": "Payments", "fieldtype": "Currency", "width": 125},
     {"fieldname": "receipts", "label": "Receipts", "fieldtype": "Currency", "width": 125},
+    {"fieldname": "balance", "label": "Balance", "fieldtype": "Currency", "width": 140},
 ]
 
-posting_date = filters.get("posting_date")
-account = filters.get("account")
+# posting_date is still accepted for links and prints saved before the range
+from_date = filters.get("from_date") or filters.get("posting_date")
+to_date = filters.get("to_date") or from_date
+consolidated = frappe.utils.cint(filters.get("consolidated"))
 
-result = frappe.db.sql("""
-    WITH gl_data AS (
+if frappe.utils.getdate(from_date) > frappe.utils.getdate(to_date):
+    frappe.throw("From Date cannot be after To Date")
+range_mode = frappe.utils.getdate(from_date) != frappe.utils.getdate(to_date)
+
+# Streaming mode reads the ledger in windows of chunk_days per account and
+# merges each window before fetching the next, so only one window's GL and
+# expense rows are held at a time. Used for ranges over 31 days, or on request.
+chunk_days = max(1, frappe.utils.cint(filters.get("chunk_days")) or 31)
+stream = frappe.utils.cint(filters.get("stream")) or (
+    frappe.utils.getdate(to_date) - frappe.utils.getdate(from_date)
+).days >= 31
+
+# Paged mode (one account) sends the first page of Cash & Bank Ledger Page.py,
+# without day frames; the grid asks for the following pages as it is scrolled.
+paged = not consolidated and frappe.utils.cint(filters.get("paged"))
+
+# Chart of accounts, cached until an Account changes
+# (Cash & Bank Account Tree.py)
+tree = frappe.cache.get_value("cash_bank_account_tree")
+if not tree:
+    tree = {"accounts": {}, "cash_bank": []}
+    for acc in frappe.db.sql("""
+        SELECT name, parent_account, lft, rgt, account_type, company, is_group
+        FROM `tabAccount`
+        ORDER BY lft
+    """, as_dict=True):
+        tree["accounts"][acc.name] = {
+            "name": acc.name,
+            "parent_account": acc.parent_account,
+            "lft": acc.lft,
+            "rgt": acc.rgt,
+            "account_type": acc.account_type,
+            "company": acc.company,
+            "is_group": acc.is_group,
+        }
+        if not acc.is_group and acc.account_type in ("Cash", "Bank"):
+            tree["cash_bank"].append(acc.name)
+    tree["cash_bank"].sort()
+    frappe.cache.set_value("cash_bank_account_tree", tree, expires_in_sec=86400)
+
+# Consolidated mode covers the chosen accounts, or every Cash/Bank ledger
+# account in the tree, in one grouped statement.
+if consolidated:
+    accounts = filters.get("accounts") or []
+    if isinstance(accounts, str):
+        accounts = [name.strip() for name in accounts.split(",") if name.strip()]
+    if not accounts:
+        accounts = list(tree["cash_bank"])
+    if not accounts:
+        frappe.throw("No Cash or Bank accounts found")
+    columns.insert(1, {"fieldname": "account", "label": "Account", "fieldtype": "Link", "options": "Account", "width": 220})
+else:
+    if not filters.get("account"):
+        frappe.throw("Please select an Account")
+    accounts = [filters.get("account")]
+
+def result_cache_get(key):
+    # Hit/miss counts only feed the hit rate of cash_bank_result_cache; two
+    # runs updating them at once can lose a count, never an entry
+    stats = frappe.cache.get_value("cash_bank_result_cache|stats") or {"hits": 0, "misses": 0, "evictions": 0}
+    value = frappe.cache.get_value(key)
+    if value is None:
+        stats["misses"] = stats["misses"] + 1
+    else:
+        stats["hits"] = stats["hits"] + 1
+    frappe.cache.set_value("cash_bank_result_cache|stats", stats)
+    return value
+
+def result_cache_set(key, value, size=200):
+    # Each entry expires a week after it is stored, and the index of stored
+    # keys caps the cache at `size` entries, the oldest stored dropped first.
+    # Two runs storing at once can lose a key from the index; that entry is
+    # then left to its expiry, so the cap may be passed briefly, never for long.
+    frappe.cache.set_value(key, value, expires_in_sec=7 * 86400)
+    index = frappe.cache.get_value("cash_bank_result_cache|index") or []
+    if key in index:
+        index.remove(key)
+    index.append(key)
+    evicted = 0
+    while len(index) > size:
+        frappe.cache.delete_value(index.pop(0))
+        evicted += 1
+    frappe.cache.set_value("cash_bank_result_cache|index", index, expires_in_sec=7 * 86400)
+    if evicted:
+        stats = frappe.cache.get_value("cash_bank_result_cache|stats") or {"hits": 0, "misses": 0, "evictions": 0}
+        stats["evictions"] = (stats.get("evictions") or 0) + evicted
+        frappe.cache.set_value("cash_bank_result_cache|stats", stats)
+
+# Closed days come from the result cache (Cash & Bank Result Cache.py). The
+# key carries every account's GL version, which the GL Entry hooks replace on
+# each posting (backdated ones included), so a changed ledger never matches.
+# A consolidated run with precompute set (the nightly job, Cash & Bank
+# Precompute.py) also stores each account's own single-account result.
+cache_key = None
+cached = None
+account_keys = {}
+if paged:
+    frappe.call(
+        "cash_bank_ledger_page",
+        account=accounts[0],
+        from_date=from_date,
+        to_date=to_date,
+        page_length=filters.get("page_length") or 500,
+    )
+    page = frappe.response["message"]
+    if page["rows"]:
+        # where the next page starts, read back by the Client Script
+        page["rows"][-1]["cursor"] = page["cursor"]
+    cached = dict(page["totals"], result=page["rows"])
+elif frappe.utils.getdate(to_date) < frappe.utils.getdate(frappe.utils.nowdate()):
+    # bumped by "clear" in Cash & Bank Result Cache.py
+    generation = frappe.cache.get_value("cash_bank_result_cache|generation") or 0
+    versions = []
+    from_day = frappe.utils.getdate(from_date)
+    to_day = frappe.utils.getdate(to_date)
+    for account in accounts:
+        version = frappe.cache.get_value("cash_bank_gl_version|" + account)
+        if not version:
+            version = frappe.utils.now_datetime().strftime("%Y%m%d%H%M%S%f")
+            frappe.cache.set_value("cash_bank_gl_version|" + account, version)
+        versions.append(version)
+        if consolidated and frappe.utils.cint(filters.get("precompute")):
+            company = (tree["accounts"].get(account) or {}).get("company")
+            account_keys[account] = (
+                f"cash_bank_result|{generation}|Cash & Bank Report|{company}|{account}|{from_day}|{to_day}|0|{version}"
+            )
+    company = (tree["accounts"].get(accounts[0]) or {}).get("company")
+    cache_key = (
+        f"cash_bank_result|{generation}|Cash & Bank Report|{company}|{','.join(accounts)}"
+        f"|{from_day}|{to_day}|{consolidated}|{','.join(versions)}"
+    )
+    if not account_keys:
+        cached = result_cache_get(cache_key)
+
+# Heavy runs (92 days or more, a consolidated range, or filters.background) are
+# not merged on the web worker: they are queued on the long queue (Cash & Bank
+# Background Run.py), which runs this report again with the job's token and
+# stores the finished rows and figures as a File. The job is keyed by the
+# filters and every account's GL version, so later opens with the same
+# filters read that File back until the ledger changes.
+def background_read(file_name):
+    # rows are packed as one list of keys plus each row's values in that order
+    packed = json.loads(frappe.get_doc("File", file_name).get_content())
+    packed["result"] = [
+        {key: value for key, value in zip(packed["keys"], values) if value is not None}
+        for values in packed["rows"]
+    ]
+    return packed
+
+def background_progress(key, progress):
+    job = frappe.cache.get_value(key) or {}
+    job["progress"] = progress
+    frappe.cache.set_value(key, job)
+    frappe.publish_realtime("cash_bank_background_run", {
+        "report_name": "Cash & Bank Report",
+        "key": key,
+        "status": "Running",
+        "progress": progress,
+    }, user=frappe.session.user)
+
+# A run from the queue carries the job's one-time token (Cash & Bank
+# Background Run.py); the job key is looked up from it here, never taken from
+# the filters, and the job must be running for the user who queued it.
+in_background = 0
+background_key = None
+pending = None
+if filters.get("background_token"):
+    background_key = frappe.cache.get_value(f"cash_bank_background_token|{filters.get('background_token')}")
+    job = frappe.cache.get_value(background_key) if background_key else None
+    if not isinstance(job, dict) or job.get("status") != "Running" or job.get("user") != frappe.session.user:
+        frappe.throw("This background run is not valid")
+    in_background = 1
+if in_background or not cached and not paged and (
+    frappe.utils.cint(filters.get("background"))
+    or (frappe.utils.getdate(to_date) - frappe.utils.getdate(from_date)).days >= 92
+    or (consolidated and range_mode)
+):
+    job_filters = {}
+    for key, value in filters.items():
+        if key not in ("background_token", "background_job", "perf"):
+            job_filters[key] = value
+    job_filters_json = json.dumps(job_filters, sort_keys=True, default=str)
+    if not in_background:
+        gl_versions = []
+        for account in accounts:
+            gl_versions.append(frappe.cache.get_value("cash_bank_gl_version|" + account) or "")
+        background_key = f"cash_bank_background|Cash & Bank Report|{job_filters_json}|{','.join(gl_versions)}"
+    job = {} if in_background else frappe.cache.get_value(background_key) or {}
+    # The job the Client Script was told has completed (filters.background_job)
+    # is shown even when postings made while it ran have changed the key since:
+    # it is marked stale rather than queued again on every refresh.
+    stale = False
+    finished_key = None if in_background else filters.get("background_job")
+    if (
+        finished_key and finished_key != background_key and job.get("status") != "Completed"
+        and finished_key.startswith("cash_bank_background|Cash & Bank Report|")
+    ):
+        finished = frappe.cache.get_value(finished_key) or {}
+        if (
+            finished.get("status") == "Completed" and finished.get("filters") == job_filters_json
+            and finished.get("user") == frappe.session.user
+        ):
+            job = finished
+            stale = True
+    if job.get("status") == "Completed" and frappe.db.exists("File", job["file"]):
+        cached = background_read(job["file"])
+        if stale:
+            message = (
+                f"Prepared in the background at {str(job.get('completed'))[:16]}; entries posted since are not shown."
+                " Use Prepare Again to bring it up to date."
+            )
+    elif not in_background:
+        # a job still queued after the queue's timeout has been lost
+        if job.get("status") not in ("Queued", "Running") or (
+            frappe.utils.now_datetime() - frappe.utils.get_datetime(job["queued"])
+        ).total_seconds() > 3600:
+            job = {
+                "status": "Queued",
+                "progress": 0,
+                "queued": str(frappe.utils.now_datetime()),
+                "user": frappe.session.user,
+                "report_name": "Cash & Bank Report",
+                "filters": job_filters_json,
+            }
+            frappe.cache.set_value(background_key, job)
+            token = frappe.generate_hash(length=20)
+            frappe.cache.set_value(f"cash_bank_background_token|{token}", background_key, expires_in_sec=7200)
+            frappe.enqueue("cash_bank_background_run", queue="long", timeout=3600, token=token)
+        pending = job
+        cached = {"result": [], "opening": 0, "closing": 0, "total_expense": 0, "total_payments": 0, "total_receipts": 0}
+        message = f"This report is being prepared in the background ({job.get('progress') or 0}% done) and opens here when it is ready."
+    if not in_background:
+        # read back by Cash & Bank Print.py, which runs the report through frappe.call
+        frappe.response["cash_bank_background"] = {"key": background_key, "pending": bool(pending), "stale": stale}
+
+# Latest period closing figure (Account Closing Balance, written by Period
+# Closing Voucher) per account before the report date. Only GL rows posted
+# after that close are aggregated for accounts not covered by Cash Bank Daily
+# Balance.
+if frappe.db.exists("DocType", "Account Closing Balance"):
+    closing_base = """
+        SELECT
+            sel.account,
+            COALESCE(last_close.closing_date, DATE '1900-01-01') AS closing_date,
+            COALESCE(SUM(acb.debit) - SUM(acb.credit), 0) AS balance
+        FROM selected sel
+        LEFT JOIN (
+            SELECT account, MAX(closing_date) AS closing_date
+            FROM `tabAccount Closing Balance`
+            WHERE account IN %(accounts)s
+              AND closing_date < %(from_date)s
+            GROUP BY account
+        ) last_close ON last_close.account = sel.account
+        LEFT JOIN `tabAccount Closing Balance` acb
+            ON acb.account = sel.account
+            AND acb.closing_date = last_close.closing_date
+        GROUP BY sel.account, last_close.closing_date
+    """
+else:
+    closing_base = "SELECT account, DATE '1900-01-01' AS closing_date, 0 AS balance FROM selected"
+
+# Ledger GL rows, opening and closing in one statement, grouped by account.
+# Opening and closing come from the snapshot lookups (see Cash & Bank Daily
+# Balance.py) or, for accounts it does not cover, from one conditional
+# aggregate over the GL rows since the last close. Expense Claim Detail is not
+# joined here; it is fetched below for the Expense Claim vouchers only.
+# Nothing is fetched (and nothing merged below) for a cached day. In
+# streaming mode this statement returns the balances only.
+rows = [] if cached else frappe.db.sql("""
+    WITH selected AS (
+        SELECT name AS account FROM `tabAccount` WHERE name IN %(accounts)s
+    ),
+
+    closing_base AS (""" + closing_base + """),
+
+    snapshot AS (
+        SELECT
+            sel.account,
+            EXISTS(
+                SELECT 1 FROM `tabCash Bank Daily Balance` s WHERE s.account = sel.account
+            ) AS maintained,
+            (
+                SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                WHERE s.account = sel.account AND s.posting_date < %(from_date)s
+                ORDER BY s.posting_date DESC LIMIT 1
+            ) AS opening,
+            (
+                SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                WHERE s.account = sel.account AND s.posting_date <= %(to_date)s
+                ORDER BY s.posting_date DESC LIMIT 1
+            ) AS closing
+        FROM selected sel
+    ),
+
+    balances AS (
+        SELECT
+            s.account,
+            CASE
+                WHEN s.maintained THEN COALESCE(s.opening, 0)
+                ELSE b.balance + COALESCE(SUM(
+                    CASE WHEN gl.posting_date < %(from_date)s THEN gl.debit - gl.credit END
+                ), 0)
+            END AS opening,
+            CASE
+                WHEN s.maintained THEN COALESCE(s.closing, 0)
+                ELSE b.balance + COALESCE(SUM(gl.debit - gl.credit), 0)
+            END AS closing
+        FROM snapshot s
+        JOIN closing_base b ON b.account = s.account
+        -- only scanned for accounts the snapshot does not cover
+        LEFT JOIN `tabGL Entry` gl
+            ON NOT s.maintained
+            AND gl.is_cancelled = 0
+            AND gl.account = s.account
+            AND gl.posting_date > b.closing_date
+            AND gl.posting_date <= %(to_date)s
+        GROUP BY s.account, s.maintained, s.opening, s.closing, b.balance
+    )
+
+    SELECT
+        b.account,
+        b.opening,
+        b.closing,
+        gl.name AS gl_name,
+        gl.posting_date,
+        gl.voucher_type,
+        gl.voucher_no,
+        gl.against,
+        gl.remarks,
+        ROUND(gl.credit, 0) AS payments,
+        ROUND(gl.debit, 0) AS receipts,
+        gl.debit - gl.credit AS movement
+    FROM balances b
+    LEFT JOIN `tabGL Entry` gl
+        ON gl.account = b.account
+        AND gl.is_cancelled = 0
+        AND gl.posting_date BETWEEN %(from_date)s AND %(rows_to)s
+    ORDER BY b.account, gl.posting_date, gl.voucher_no, gl.name
+""", {
+    "accounts": tuple(accounts),
+    "from_date": from_date,
+    "to_date": to_date,
+    "rows_to": frappe.utils.add_days(from_date, -1) if stream else to_date,
+}, as_dict=True)
+
+# Expense Claim Detail rows, fetched only for the Expense Claim vouchers in
+# range (the only vouchers the old LEFT JOIN on parent could ever match)
+def fetch_expense_details(rows):
+    claim_vouchers = set()
+    for row in rows:
+        if row.voucher_type == "Expense Claim":
+            claim_vouchers.add(row.voucher_no)
+
+    expense_details = {}
+    if claim_vouchers:
+        for detail in frappe.db.sql("""
+            SELECT
+                parent,
+                default_account,
+                ROUND(COALESCE(amount, 0), 0) AS expense,
+                -- plain text stored on save (Expense Claim Description Text.py);
+                -- rows the backfill has not reached yet are stripped here
+                COALESCE(description_text, REGEXP_REPLACE(description, '<[^>]*>', '')) AS description
+            FROM `tabExpense Claim Detail`
+            WHERE parent IN %(vouchers)s
+            ORDER BY parent, name
+        """, {"vouchers": tuple(claim_vouchers)}, as_dict=True):
+            expense_details.setdefault(detail.parent, []).append(detail)
+    return expense_details
+
+# Group the GL rows of each voucher per account, keeping the query order
+def group_vouchers(rows):
+    vouchers = {}
+    for row in rows:
+        account_vouchers = vouchers.setdefault(row.account, [])
+        if not row.gl_name:
+            continue
+        if (
+            account_vouchers
+            and account_vouchers[-1]["posting_date"] == row.posting_date
+            and account_vouchers[-1]["voucher_no"] == row.voucher_no
+        ):
+            account_vouchers[-1]["gl_rows"].append(row)
+        else:
+            account_vouchers.append({"posting_date": row.posting_date, "voucher_no": row.voucher_no, "gl_rows": [row]})
+    return vouchers
+
+# One account's GL rows for one streaming window
+def fetch_window(account, window_start, window_end):
+    return frappe.db.sql("""
         SELECT
+            gl.account,
+            gl.name AS gl_name,
             gl.posting_date,
+            gl.voucher_type,
             gl.voucher_no,
-            gl.account,
             gl.against,
             gl.remarks,
-            gl.debit,
-            gl.credit,
-            ecd.default_account,
-            ecd.amount AS expense_amount,
-            REGEXP_REPLACE(ecd.description, '<[^>]*>', '') AS ecd_description,
-            ecd.name AS ecd_name
+            ROUND(gl.credit, 0) AS payments,
+            ROUND(gl.debit, 0) AS receipts,
+            gl.debit - gl.credit AS movement
         FROM `tabGL Entry` gl
-        LEFT JOIN `tabExpense Claim Detail` ecd ON gl.voucher_no = ecd.parent
-        WHERE
-            gl.is_cancelled = 0
-            AND gl.account = %s
-            AND gl.posting_date = %s
-    ),
+        WHERE gl.account = %(account)s
+          AND gl.is_cancelled = 0
+          AND gl.posting_date BETWEEN %(window_start)s AND %(window_end)s
+        ORDER BY gl.posting_date, gl.voucher_no, gl.name
+    """, {"account": account, "window_start": window_start, "window_end": window_end}, as_dict=True)
 
-    numbered AS (
-        SELECT *,
-            CONCAT_WS(' / ', against, default_account) AS against_account,
-            CONCAT_WS(' | ', remarks, ecd_description) AS description,
-            ROW_NUMBER() OVER (
-                PARTITION BY voucher_no
-                ORDER BY ecd_name
-            ) AS rn
-        FROM gl_data
-    )
+balance_rows = []
+for row in rows:
+    if not balance_rows or balance_rows[-1].account != row.account:
+        balance_rows.append(row)
+vouchers = group_vouchers(rows)
+expense_details = {} if stream else fetch_expense_details(rows)
 
-    SELECT
-        posting_date,
-        voucher_no,
-        against_account,
-        description,
-        -- show each expense detail row
-        ROUND(COALESCE(expense_amount, 0), 0) AS expense,
-        -- show payment only once per expense claim
-        CASE
-            WHEN voucher_no LIKE 'HR-EXP%%' AND rn = 1 THEN ROUND(credit, 0)
-            WHEN voucher_no LIKE 'HR-EXP%%' THEN 0
-            ELSE ROUND(credit, 0)
-        END AS payments,
-        ROUND(debit, 0) AS receipts
-    FROM numbered
-    ORDER BY posting_date, voucher_no, rn
-""", (account, posting_date), as_dict=True)
-
-# Totals
-total_expense = sum(row.expense or 0 for row in result)
-total_payments = sum(row.payments or 0 for row in result)
-total_receipts = sum(row.receipts or 0 for row in result)
-
-# Opening and Closing Balances
-opening = frappe.db.sql("""
-    SELECT COALESCE(SUM(debit) - SUM(credit), 0) AS balance
-    FROM `tabGL Entry`
-    WHERE is_cancelled = 0
-      AND account = %s
-      AND posting_date < %s
-""", (account, posting_date), as_dict=True)[0].balance or 0
-
-closing = frappe.db.sql("""
-    SELECT COALESCE(SUM(debit) - SUM(credit), 0) AS balance
-    FROM `tabGL Entry`
-    WHERE is_cancelled = 0
-      AND account = %s
-      AND posting_date <= %s
-""", (account, posting_date), as_dict=True)[0].balance or 0
+def concat_ws(separator, *values):
+    # CONCAT_WS: NULLs are skipped, empty strings are kept
+    return separator.join(value for value in values if value is not None)
+
+# Merge the expense rows in and build the ledger in one pass, window by
+# window in streaming mode, updating every total as rows are added. Each voucher
+# expands to (expense row x GL row) ordered by expense row, the order the old
+# ROW_NUMBER() OVER (PARTITION BY voucher_no ORDER BY ecd_name) produced.
+# Over more than one day each day is framed by its opening balance and a
+# subtotal row; in consolidated mode each account is framed the same way.
+opening = closing = total_expense = total_payments = total_receipts = 0
+result = []
+for number, balance_row in enumerate(balance_rows):
+    account = balance_row.account
+    running = balance_row.opening or 0
+    opening += balance_row.opening or 0
+    closing += balance_row.closing or 0
+    account_expense = account_payments = account_receipts = 0
+    account_start = len(result)
+    if consolidated:
+        result.append({
+            "account": account,
+            "description": "Opening Balance",
+            "balance": running,
+            "bold": 1,
+        })
+
+    day = None
+    window_start = frappe.utils.getdate(from_date)
+    while window_start <= frappe.utils.getdate(to_date):
+        if stream:
+            window_end = min(
+                frappe.utils.getdate(frappe.utils.add_days(window_start, chunk_days - 1)),
+                frappe.utils.getdate(to_date),
+            )
+            window_rows = fetch_window(account, window_start, window_end)
+            account_vouchers = group_vouchers(window_rows).get(account) or []
+            window_details = fetch_expense_details(window_rows)
+        else:
+            window_end = frappe.utils.getdate(to_date)
+            account_vouchers = vouchers[account]
+            window_details = expense_details
+
+        for voucher in account_vouchers:
+            if range_mode and voucher["posting_date"] != day:
+                if day is not None:
+                    result.append({
+                        "account": account,
+                        "posting_date": day,
+                        "description": "Day Total",
+                        "expense": day_expense,
+                        "payments": day_payments,
+                        "receipts": day_receipts,
+                        "balance": running,
+                        "bold": 1,
+                    })
+                day = voucher["posting_date"]
+                day_expense = day_payments = day_receipts = 0
+                result.append({
+                    "account": account,
+                    "posting_date": day,
+                    "description": "Opening Balance",
+                    "balance": running,
+                    "bold": 1,
+                })
+
+            # show payment only once per expense claim
+            hr_exp = voucher["voucher_no"].upper().startswith("HR-EXP")
+            rn = 0
+            for index, detail in enumerate(window_details.get(voucher["voucher_no"]) or [None]):
+                for gl in voucher["gl_rows"]:
+                    rn += 1
+                    expense = detail.expense if detail else 0
+                    payments = gl.payments if not hr_exp or rn == 1 else 0
+                    # each GL row moves the balance once, however many expense rows it joins
+                    if index == 0:
+                        running += gl.movement
+                    result.append({
+                        "account": account,
+                        "posting_date": gl.posting_date,
+                        "voucher_no": gl.voucher_no,
+                        "against_account": concat_ws(" / ", gl.against, detail.default_account if detail else None),
+                        "description": concat_ws(" | ", gl.remarks, detail.description if detail else None),
+                        "expense": expense,
+                        "payments": payments,
+                        "receipts": gl.receipts,
+                        "balance": running,
+                    })
+                    account_expense += expense
+                    account_payments += payments
+                    account_receipts += gl.receipts
+                    if range_mode:
+                        day_expense += expense
+                        day_payments += payments
+                        day_receipts += gl.receipts
+
+        window_start = frappe.utils.getdate(frappe.utils.add_days(window_end, 1))
+
+    if day is not None:
+        result.append({
+            "account": account,
+            "posting_date": day,
+            "description": "Day Total",
+            "expense": day_expense,
+            "payments": day_payments,
+            "receipts": day_receipts,
+            "balance": running,
+            "bold": 1,
+        })
+    if consolidated:
+        result.append({
+            "account": account,
+            "description": "Account Total",
+            "expense": account_expense,
+            "payments": account_payments,
+            "receipts": account_receipts,
+            "balance": balance_row.closing,
+            "bold": 1,
+        })
+    if account in account_keys:
+        # the rows a single-account run shows: this frame without its
+        # Opening Balance and Account Total rows
+        result_cache_set(account_keys[account], {
+            "result": result[account_start + 1:-1],
+            "opening": balance_row.opening or 0,
+            "closing": balance_row.closing or 0,
+            "total_expense": account_expense,
+            "total_payments": account_payments,
+            "total_receipts": account_receipts,
+        })
+    total_expense += account_expense
+    total_payments += account_payments
+    total_receipts += account_receipts
+    if in_background:
+        background_progress(background_key, 10 + 80 * (number + 1) // len(balance_rows))
+
+if cached:
+    result = cached["result"]
+    opening = cached["opening"]
+    closing = cached["closing"]
+    total_expense = cached["total_expense"]
+    total_payments = cached["total_payments"]
+    total_receipts = cached["total_receipts"]
+elif cache_key:
+    result_cache_set(cache_key, {
+        "result": result,
+        "opening": opening,
+        "closing": closing,
+        "total_expense": total_expense,
+        "total_payments": total_payments,
+        "total_receipts": total_receipts,
+    })
 
 def format_with_comma(val):
     val = int(val)
@@ -107,8 +605,34 @@ summary = [
     {"label": "Other Payments", "value": format_with_comma(total_payments - total_expense), "indicator": "Red"},
     {"label": "Closing Balance", "value": format_with_comma(closing), "indicator": "Green"},
 ]
+if pending:
+    summary = []
 
-
+# The background job's output, left for Cash & Bank Background Run.py to store
+if in_background:
+    keys = []
+    for row in result:
+        for key in row:
+            if key not in keys:
+                keys.append(key)
+    packed_rows = []
+    for row in result:
+        values = []
+        for key in keys:
+            value = row.get(key)
+            if value is not None and key in ("expense", "payments", "receipts", "balance"):
+                value = frappe.utils.flt(value, 9)
+            values.append(value)
+        packed_rows.append(values)
+    frappe.cache.set_value(background_key + "|artifact", {
+        "keys": keys,
+        "rows": packed_rows,
+        "opening": frappe.utils.flt(opening, 9),
+        "closing": frappe.utils.flt(closing, 9),
+        "total_expense": frappe.utils.flt(total_expense, 9),
+        "total_payments": frappe.utils.flt(total_payments, 9),
+        "total_receipts": frappe.utils.flt(total_receipts, 9),
+    }, expires_in_sec=86400)
 
 data = columns, result, message, None, summary
 
@@ -120,11 +644,39 @@ data = columns, result, message, None, summary
 
 Javascript
 
+// Cash/Bank accounts the user may see (Cash & Bank Account Tree.py), fetched
+// once per session. The list kept from an earlier session is sent back by its
+// etag and reused when the server reports it unchanged.
+function cash_bank_accounts() {
+  if (!frappe.cash_bank_accounts) {
+    const key = "cash_bank_accounts|" + frappe.session.user;
+    const stored = JSON.parse(localStorage.getItem(key) || "null");
+    frappe.cash_bank_accounts = frappe.xcall("cash_bank_account_tree", { etag: stored ? stored.etag : "" })
+      .then(response => {
+        if (response.not_modified) return stored.accounts;
+        localStorage.setItem(key, JSON.stringify(response));
+        return response.accounts;
+      })
+      .catch(err => {
+        frappe.cash_bank_accounts = null;
+        throw err;
+      });
+  }
+  return frappe.cash_bank_accounts;
+}
+
 frappe.query_reports["Cash & Bank Report"] = {
   filters: [
     {
-      fieldname: "posting_date",
-      label: "Posting Date",
+      fieldname: "from_date",
+      label: "From Date",
+      fieldtype: "Date",
+      default: frappe.datetime.get_today(),
+      reqd: 1,
+    },
+    {
+      fieldname: "to_date",
+      label: "To Date",
       fieldtype: "Date",
       default: frappe.datetime.get_today(),
       reqd: 1,
@@ -133,291 +685,134 @@ frappe.query_reports["Cash & Bank Report"] = {
       fieldname: "account",
       label: "Account",
       fieldtype: "Select",
-      options: [
-        "Cash with Anam - CCL",
-        "Cash with Azhar - CCL",
-        "Cash with Boota - CCL",
-        "Cash with Khalil - CCL",
-        "Cash with Salman Sarwar - CCL",
-        "Cash with Suwaib - CCL",
-        "MBL 0103525749 - CCL",
-        "Bank Clearance - CCL",
-        "MBL Abdul Rehman - 083 - CCL",
-        "MBL Abdul Rehman - CCL",
-        "MBL Rutab Ahmad - CCL"
-      ],
-      default: "Cash with Anam - CCL",
-      reqd: 1
+      options: [],
+      depends_on: "eval:!doc.consolidated",
+      mandatory_depends_on: "eval:!doc.consolidated"
+    },
+    {
+      fieldname: "paged",
+      label: "Load Rows While Scrolling",
+      fieldtype: "Check",
+      default: 0,
+      depends_on: "eval:!doc.consolidated"
+    },
+    {
+      fieldname: "consolidated",
+      label: "All Cash & Bank Accounts",
+      fieldtype: "Check",
+      default: 0
+    },
+    {
+      fieldname: "accounts",
+      label: "Accounts (blank for all)",
+      fieldtype: "MultiSelectList",
+      depends_on: "eval:doc.consolidated",
+      get_data: function(txt) {
+        return cash_bank_accounts().then(accounts => {
+          txt = (txt || "").toLowerCase();
+          return accounts
+            .filter(account => account.value.toLowerCase().includes(txt))
+            .map(account => ({ value: account.value, description: account.account_type }));
+        });
+      }
+    },
+    {
+      // The completed background job to show (Cash & Bank Background Run.py)
+      fieldname: "background_job",
+      fieldtype: "Data",
+      hidden: 1
     }
   ],
+  after_datatable_render: function() {
+    // Filters the grid on screen was loaded for, checked by Print
+    const report = frappe.query_report;
+    const filters = report.get_filter_values();
+    report.loaded_filters = JSON.stringify(filters);
+
+    // A background result on screen can be prepared again from the current ledger
+    report.page.remove_inner_button(__("Prepare Again"));
+    if (filters.background_job) {
+      report.page.add_inner_button(__("Prepare Again"), () => report.set_filter_value("background_job", ""));
+    }
+
+    // Paged mode: the last row carries the cursor of the next page
+    // (Cash & Bank Ledger Page.py), fetched when the grid is scrolled to its end
+    const rows = report.data || [];
+    let cursor = filters.paged && !filters.consolidated && rows.length ? rows[rows.length - 1].cursor : null;
+    const scrollable = report.datatable && report.datatable.bodyScrollable;
+    if (!cursor || !scrollable) return;
+    let loading = false;
+    scrollable.addEventListener("scroll", async () => {
+      if (!cursor || loading) return;
+      if (scrollable.scrollTop + scrollable.clientHeight < scrollable.scrollHeight - 200) return;
+      loading = true;
+      try {
+        const page = await frappe.xcall("cash_bank_ledger_page", {
+          account: filters.account,
+          from_date: filters.from_date,
+          to_date: filters.to_date,
+          cursor: JSON.stringify(cursor)
+        });
+        cursor = page.cursor;
+        report.data.push(...page.rows);
+        report.datatable.appendRows(page.rows);
+      } finally {
+        loading = false;
+      }
+    });
+  },
   onload: function(report) {
-    // Add Print button outside view list
+    // Background runs (Cash & Bank Background Run.py): progress while the job
+    // works, then the report opens again from the stored result
+    if (!report.background_listener) {
+      report.background_listener = true;
+      frappe.realtime.on("cash_bank_background_run", (job) => {
+        if (job.report_name !== "Cash & Bank Report" || frappe.query_report !== report) return;
+        if (job.status === "Running") {
+          frappe.show_progress(__("Cash & Bank Report"), job.progress, 100, __("Preparing in the background"));
+          return;
+        }
+        frappe.hide_progress();
+        // Opened by the job's key, so postings made while it ran do not queue it again
+        if (job.status === "Completed") report.set_filter_value("background_job", job.key);
+        else frappe.msgprint(__("The background run failed: {0}", [job.error]));
+      });
+    }
+
+    // Account options are filled in once the session's list is loaded
+    cash_bank_accounts().then(accounts => {
+      const filter = report.get_filter("account");
+      filter.df.options = accounts.map(account => account.value);
+      filter.refresh();
+      if (!filter.get_value() && accounts.length) filter.set_value(accounts[0].value);
+    });
+
+    // Add Print and PDF buttons outside view list. The page is rendered on
+    // the server (Cash & Bank Print.py); a closed day comes back stored.
     if (!report.page.main_buttons || !report.page.main_buttons["Print"]) {
-      report.page.add_button("Print", async () => {
+      const render = () => {
         const filters = report.get_filter_values();
-        if (!filters.posting_date || !filters.account) {
-          frappe.throw(__("Please select both Posting Date and Account"));
-          return;
+        // A paged grid holds only the pages scrolled so far: print the whole ledger
+        delete filters.paged;
+        if (!filters.from_date || !filters.to_date || (!filters.account && !filters.consolidated)) {
+          frappe.throw(__("Please select From Date, To Date and Account"));
         }
+        const args = { report_name: "Cash & Bank Report", filters: filters };
+        // Send the rows already on screen when they were loaded for these filters
+        if (report.raw_data && report.loaded_filters === JSON.stringify(filters)) {
+          args.data = {
+            result: report.raw_data.result || [],
+            summary: report.raw_data.summary || report.raw_data.report_summary || []
+          };
+        }
+        return frappe.xcall("cash_bank_print", args);
+      };
+
+      report.page.add_button("Print", async () => {
         try {
-          const result = await new Promise((resolve, reject) => {
-            frappe.call({
-              method: "frappe.desk.query_report.run",
-              args: {
-                report_name: "Cash & Bank Report",
-                filters: filters
-              },
-              callback: function(r) {
-                if (r.exc) {
-                  reject(r.exc);
-                } else {
-                  resolve(r);
-                }
-              }
-            });
-          });
-          const data = result.message.result || [];
-          const summary = result.message.summary || [];
-          let total_expense = 0, total_payments = 0, total_receipts = 0;
-          data.forEach(row => {
-            total_expense += parseFloat(row.expense || 0);
-            total_payments += parseFloat(row.payments || 0);
-            total_receipts += parseFloat(row.receipts || 0);
-          });
-
-          function format_number(val) {
-            try {
-              val = parseInt(val) || 0;
-              let s = val.toString();
-              if (s.length <= 3) return s;
-              let parts = [];
-              while (s.length > 3) {
-                parts.unshift(s.slice(-3));
-                s = s.slice(0, -3);
-              }
-              parts.unshift(s);
-              return parts.join(",");
-            } catch (e) {
-              console.error("Error formatting number:", e);
-              return "0";
-            }
-          }
-
-          let summaryMap = {};
-          if (summary && summary.length > 0) {
-            summary.forEach(item => {
-              if (item.label && item.value !== undefined) {
-                summaryMap[item.label] = item.value.toString();
-              } else {
-                console.warn(`Invalid summary item: ${JSON.stringify(item)}`);
-              }
-            });
-          } else {
-            console.warn("Summary array is empty, computing fallback values from data");
-            const openingBalanceRes = await frappe.call({
-              method: "frappe.client.get_value",
-              args: {
-                doctype: "GL Entry",
-                filters: {
-                  is_cancelled: 0,
-                  account: filters.account,
-                  posting_date: ["<", filters.posting_date]
-                },
-                fieldname: "sum(debit) - sum(credit) as balance"
-              }
-            });
-            const opening = openingBalanceRes.message?.balance || 0;
-            const closingBalanceRes = await frappe.call({
-              method: "frappe.client.get_value",
-              args: {
-                doctype: "GL Entry",
-                filters: {
-                  is_cancelled: 0,
-                  account: filters.account,
-                  posting_date: ["<=", filters.posting_date]
-                },
-                fieldname: "sum(debit) - sum(credit) as balance"
-              }
-            });
-            const closing = closingBalanceRes.message?.balance || 0;
-            summaryMap = {
-              "Opening Balance": format_number(opening),
-              "Today Receipts": format_number(total_receipts),
-              "Total Balance": format_number(opening + total_receipts),
-              "Net Cash Flow": format_number(total_receipts - total_payments),
-              "Total Payments": format_number(total_payments),
-              "Total Expense": format_number(total_expense),
-              "Other Payments": format_number(total_payments - total_expense),
-              "Closing Balance": format_number(closing)
-            };
-          }
-
-          const requiredKeys = [
-            "Opening Balance", "Today Receipts", "Total Balance", "Net Cash Flow",
-            "Total Payments", "Total Expense", "Other Payments", "Closing Balance"
-          ];
-          requiredKeys.forEach(key => {
-            if (!summaryMap[key]) {
-              console.warn(`Missing summary key: ${key}`);
-              summaryMap[key] = "0";
-            }
-          });
-
-          const companyRes = await frappe.db.get_value("Company", { name: frappe.defaults.get_default("company") }, "*");
-          const company = companyRes.message || {};
-          const companyName = company.name || "";
-          const logoUrl = company.logo ? company.logo : "/files/logo CCL.JPG";
-
-          const balancesHtml = `
-            <div style="margin-bottom: 20px; display: inline-block; vertical-align: top;">
-              <table style="width: 300px; border-collapse: collapse; table-layout: fixed;">
-                <thead><tr style="background-color: #f2f2f2;"><th colspan="2" style="border: 2px solid #0d0405; padding: 8px;">Opening Balance, Receipts & Cashflow</th></tr></thead>
-                <tbody>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Opening Balance</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Opening Balance"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Today Receipts</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Today Receipts"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Total Balance</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Total Balance"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Net Cash Flow</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Net Cash Flow"]}</td></tr>
-                </tbody>
-              </table>
-            </div>
-          `;
-
-          const summaryHtml = `
-            <div style="margin-bottom: 20px; display: inline-block; vertical-align: top; margin-left: 20px;">
-              <table style="width: 300px; border-collapse: collapse; table-layout: fixed;">
-                <thead><tr style="background-color: #f2f2f2;"><th colspan="2" style="border: 2px solid #0d0405; padding: 8px;">Expenses, Payments & Closing Balance</th></tr></thead>
-                <tbody>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Total Payments</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Total Payments"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Total Expense</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Total Expense"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Other Payments</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Other Payments"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Closing Balance</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Closing Balance"]}</td></tr>
-                </tbody>
-              </table>
-            </div>
-          `;
-
-          const html = `
-            <html>
-              <head>
-                <title>Cash & Bank Report</title>
-                <style>
-                  @media print {
-                    @page { size: landscape; margin: 10mm; }
-                  }
-                  body { font-family: sans-serif; font-size: 12px; margin: 10px; }
-                  .header { display: flex; justify-content: space-between; align-items: center; }
-                  .header-left { text-align: left; }
-                  .header-right img { max-width: 70px; }
-                  table {
-                    width: 100%;
-                    border-collapse: collapse;
-                    font-size: 12px;
-                    margin-top: 5px;
-                    table-layout: fixed;
-                    word-wrap: break-word;
-                  }
-                  th, td {
-                    border: 1px solid #444;
-                    padding: 5px;
-                    text-align: left;
-                  }
-                  th { background-color: #f8facf; font-weight: bold; }
-                  ul { padding-left: 20px; }
-                  .footer {
-                    margin-top: 80px;
-                    font-size: 12px;
-                    color: black;
-                    display: flex;
-                    justify-content: space-between;
-                  }
-                  .footer-left, .footer-center, .footer-right {
-                    width: 30%;
-                    text-align: left;
-                  }
-                  .footer-center {
-                    text-align: center;
-                  }
-                  .footer-right {
-                    text-align: right;
-                  }
-                </style>
-              </head>
-              <body>
-                <div class="header">
-                  <div class="header-left">
-                    <h2>${companyName}</h2>
-                    <p><strong>Posting Date:</strong> ${filters.posting_date}</p>
-                    <p><strong>Account:</strong> ${filters.account}</p>
-                  </div>
-                  <div class="header-right">
-                    <img src="${logoUrl}" alt="Company Logo">
-                  </div>
-                </div>
-                <hr>
-                ${balancesHtml}
-                ${summaryHtml}
-                <h2>Detailed Ledger Transactions Report</h2>
-                <table>
-                  <thead>
-                    <tr>
-                      <th style="width: 100px;">Posting Date</th>
-                      <th style="width: 130px;">Voucher No</th>
-                      <th style="width: 180px;">Against / Account</th>
-                      <th style="width: 250px;">Description</th>
-                      <th style="width: 90px;">Expense</th>
-                      <th style="width: 90px;">Payments</th>
-                      <th style="width: 90px;">Receipts</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    ${data.map(row => `
-                      <tr>
-                        <td>${row.posting_date || ""}</td>
-                        <td>${row.voucher_no || ""}</td>
-                        <td>${row.against_account || ""}</td>
-                        <td>${row.description || ""}</td>
-                        <td style="text-align:right;">${format_number(row.expense)}</td>
-                        <td style="text-align:right;">${format_number(row.payments)}</td>
-                        <td style="text-align:right;">${format_number(row.receipts)}</td>
-                      </tr>
-                    `).join("")}
-                  </tbody>
-                </table>
-
-                <!-- Total Row Moved Outside Table -->
-                <table style="margin-top: -1px;">
-                  <tfoot>
-                    <tr>
-                      <th colspan="7" style="text-align:right;">Total</th>
-                      <th style="text-align:right;">${format_number(total_expense)}</th>
-                      <th style="text-align:right;">${format_number(total_payments)}</th>
-                      <th style="text-align:right;">${format_number(total_receipts)}</th>
-                    </tr>
-                  </tfoot>
-                </table>
-
-                <!-- Footer Section -->
-                <div class="footer">
-                  <div class="footer-left">
-                    <strong>Created By:</strong><br>
-                    ${frappe.session.user}
-                  </div>
-                  <div class="footer-center">
-                    <strong>Submitted By:</strong><br>
-                    Accountant
-                  </div>
-                  <div class="footer-right">
-                    <strong>Approved By:</strong><br>
-                    Director
-                  </div>
-                </div>
-
-              </body>
-            </html>
-          `;
-          const newTab = window.open("", "_blank");
-          newTab.document.write(html);
-          newTab.document.close();
+          const printed = await render();
+          const url = URL.createObjectURL(new Blob([printed.html], { type: "text/html" }));
+          const newTab = window.open(url, "_blank");
           newTab.onload = function () {
             newTab.print();
           };
@@ -426,6 +821,92 @@ frappe.query_reports["Cash & Bank Report"] = {
           frappe.throw(__("Failed to generate Printable HTML. Please check browser console."));
         }
       });
+
+      report.page.add_button("PDF", async () => {
+        const printed = await render();
+        frappe.render_pdf(printed.html, { orientation: "Landscape" });
+      });
+
+      // Ledger file written in parts by a job on the long queue
+      // (Cash & Bank Export.py); the parts are joined into one download here
+      report.page.add_button("Export", async () => {
+        const filters = report.get_filter_values();
+        let accounts = filters.consolidated ? (filters.accounts || []) : [filters.account];
+        if (filters.consolidated && !accounts.length) {
+          accounts = (await cash_bank_accounts()).map(account => account.value);
+        }
+        frappe.prompt(
+          { fieldname: "format", label: "Format", fieldtype: "Select", options: "csv\nxls", default: "csv" },
+          async (values) => {
+            const started = await frappe.xcall("cash_bank_export", {
+              accounts: JSON.stringify(accounts),
+              from_date: filters.from_date,
+              to_date: filters.to_date,
+              format: values.format
+            });
+            const poll = async () => {
+              const job = await frappe.xcall("cash_bank_export", { job: started.job });
+              if (job.status === "Failed") {
+                frappe.hide_progress();
+                frappe.msgprint(__("The export failed: {0}", [job.error]));
+                return;
+              }
+              if (job.status !== "Completed") {
+                frappe.show_progress(__("Export Ledger"), job.progress, 100, __("Writing the ledger"));
+                setTimeout(poll, 2000);
+                return;
+              }
+              frappe.hide_progress();
+              const parts = [];
+              for (const part of job.parts) {
+                const response = await fetch(part.file_url);
+                parts.push(await response.text());
+              }
+              const link = document.createElement("a");
+              link.href = URL.createObjectURL(new Blob(parts, { type: job.content_type }));
+              link.download = job.filename;
+              link.click();
+              setTimeout(() => URL.revokeObjectURL(link.href), 1000);
+            };
+            poll();
+          },
+          __("Export Ledger"),
+          __("Download")
+        );
+      });
+
+      // Every account's printed page for one day, printed on several workers
+      // at once (Cash & Bank Day Close.py)
+      report.page.add_button("Day Close Pack", () => {
+        frappe.prompt(
+          { fieldname: "date", label: "Date", fieldtype: "Date", default: report.get_filter_values().to_date, reqd: 1 },
+          async (values) => {
+            const started = await frappe.xcall("cash_bank_day_close", { date: values.date });
+            // Polled rather than pushed: a part can finish before any listener
+            // is in place, and a part killed at the timeout sends nothing
+            const poll = async () => {
+              const pack = await frappe.xcall("cash_bank_day_close", { run: started.run });
+              if (pack.status !== "Completed") {
+                frappe.show_progress(__("Day Close Pack"), pack.done, pack.total, __("Printing accounts"));
+                setTimeout(poll, 2000);
+                return;
+              }
+              frappe.hide_progress();
+              if (pack.failed.length) {
+                frappe.msgprint(__("Not printed: {0}", [pack.failed.join(", ")]));
+              }
+              const url = URL.createObjectURL(new Blob([pack.html], { type: "text/html" }));
+              const newTab = window.open(url, "_blank");
+              newTab.onload = function () {
+                newTab.print();
+              };
+            };
+            poll();
+          },
+          __("Day Close Pack"),
+          __("Print")
+        );
+      });
       // Prevent duplicate buttons
       if (!report.page.main_buttons) report.page.main_buttons = {};
       report.page.main_buttons["Print"] = true;
@@ -0,0 +1,107 @@
+# Give this GL row's account, every group above it and "*" a new GL version,
+# so cached report results of any day that read them stop matching. A
+# version is a timestamp rather than a running count: if Redis drops a
+# version key the next one can never repeat a value an entry was stored with.
+# The versions are replaced now and again once the posting is committed: a
+# report run in between reads the ledger from before the commit, and whatever
+# it stores under the first new version is never matched after the second.
+tree = frappe.cache.get_value("cash_bank_account_tree")
+if not tree:
+    tree = {"accounts": {}, "cash_bank": []}
+    for acc in frappe.db.sql("""
+        SELECT name, parent_account, lft, rgt, account_type, company, is_group
+        FROM `tabAccount`
+        ORDER BY lft
+    """, as_dict=True):
+        tree["accounts"][acc.name] = {
+            "name": acc.name,
+            "parent_account": acc.parent_account,
+            "lft": acc.lft,
+            "rgt": acc.rgt,
+            "account_type": acc.account_type,
+            "company": acc.company,
+            "is_group": acc.is_group,
+        }
+        if not acc.is_group and acc.account_type in ("Cash", "Bank"):
+            tree["cash_bank"].append(acc.name)
+    tree["cash_bank"].sort()
+    frappe.cache.set_value("cash_bank_account_tree", tree, expires_in_sec=86400)
+
+# The groups above the account, walked up one parent at a time: this runs for
+# every GL row of every voucher, so it never looks at the rest of the chart
+version_keys = ["cash_bank_gl_version|*", "cash_bank_gl_version|" + doc.account]
+parent = (tree["accounts"].get(doc.account) or {}).get("parent_account")
+while parent and "cash_bank_gl_version|" + parent not in version_keys:
+    version_keys.append("cash_bank_gl_version|" + parent)
+    parent = (tree["accounts"].get(parent) or {}).get("parent_account")
+
+def bump_gl_versions(version_keys=version_keys):
+    version = frappe.utils.now_datetime().strftime("%Y%m%d%H%M%S%f")
+    for key in version_keys:
+        frappe.cache.set_value(key, version)
+
+bump_gl_versions()
+frappe.db.after_commit.add(bump_gl_versions)
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Result Cache - GL Submit
+#   Script Type: DocType Event
+#   Reference Document Type: GL Entry
+#   DocType Event: After Submit
+#
+# And a second Server Script with the same code above
+#   Name: Cash & Bank Result Cache - GL Cancel
+#   Script Type: DocType Event
+#   Reference Document Type: GL Entry
+#   DocType Event: After Cancel
+#
+# Cash & Bank Report (V3) and Cash Flow Statement keep the output of a closed
+# day (before today) under
+#   cash_bank_result|<generation>|<report>|<company>|<account(s) or parent>|<dates>|<GL versions>
+# Each entry expires a week after it is stored, and at most 200 are kept: the
+# index cash_bank_result_cache|index lists the stored keys, and the oldest is
+# dropped when a new one goes past the bound. frappe.cache falls back to its
+# in-process store for the request when Redis cannot be reached, so the
+# reports still run, uncached.
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Cash & Bank Result Cache
+#   Script Type: API
+#   API Method: cash_bank_result_cache
+#
+#   frappe.xcall("cash_bank_result_cache")                     // hits, misses, hit rate, evictions, entries
+#   frappe.xcall("cash_bank_result_cache", {action: "clear"})  // start a new generation and reset
+#
+# Clearing moves every report to a new key generation, so no stored entry is
+# read again, and drops the entries the index lists; any it missed expire on
+# their own.
+
+if frappe.form_dict.get("action") == "clear":
+    if frappe.session.user != "Administrator" and not frappe.db.exists(
+        "Has Role", {"parent": frappe.session.user, "parenttype": "User", "role": "System Manager"}
+    ):
+        frappe.throw("Only a System Manager can clear the cash and bank result cache")
+    generation = frappe.cache.get_value("cash_bank_result_cache|generation") or 0
+    frappe.cache.set_value("cash_bank_result_cache|generation", generation + 1)
+    for key in frappe.cache.get_value("cash_bank_result_cache|index") or []:
+        frappe.cache.delete_value(key)
+    frappe.cache.delete_value("cash_bank_result_cache|index")
+    frappe.cache.delete_value("cash_bank_result_cache|stats")
+
+stats = frappe.cache.get_value("cash_bank_result_cache|stats") or {"hits": 0, "misses": 0, "evictions": 0}
+lookups = stats["hits"] + stats["misses"]
+frappe.response["message"] = {
+    "hits": stats["hits"],
+    "misses": stats["misses"],
+    "evictions": stats.get("evictions") or 0,
+    "hit_rate": round(stats["hits"] * 100.0 / lookups, 1) if lookups else 0,
+    "entries": len(frappe.cache.get_value("cash_bank_result_cache|index") or []),
+}
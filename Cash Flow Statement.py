@@ -15,82 +15,431 @@ columns = [
 posting_date = filters.get("posting_date")
 parent_account = filters.get("parent_account")
 
-result = frappe.db.sql("""
-    WITH gl_data AS (
+# Instrumentation is off unless asked for, per request (filters.perf = 1) or
+# per user (Cash & Bank Perf.py). Each query's wall time, rows returned and
+# rows examined are kept with the run's totals in the cash_bank_perf_log ring
+# buffer; nothing is written to the database.
+perf = None
+if frappe.utils.cint(filters.get("perf")) or frappe.cache.get_value("cash_bank_perf_user|" + frappe.session.user):
+    perf = {
+        "report": "Cash Flow Statement",
+        "user": frappe.session.user,
+        "started": frappe.utils.now_datetime(),
+        "filters": dict(filters),
+        "queries": [],
+    }
+
+def perf_sql(perf, label, query, values=()):
+    if perf is None:
+        return frappe.db.sql(query, values, as_dict=True)
+    # Handler_read_* counters of this connection: rows the server examined
+    # (including a few for reading the counters themselves)
+    handler_reads = """
+        SELECT COALESCE(SUM(VARIABLE_VALUE), 0) AS value
+        FROM information_schema.SESSION_STATUS
+        WHERE VARIABLE_NAME LIKE 'HANDLER_READ_%%'
+    """
+    before = frappe.db.sql(handler_reads, (), as_dict=True)[0].value
+    started = frappe.utils.now_datetime()
+    rows = frappe.db.sql(query, values, as_dict=True)
+    elapsed = frappe.utils.now_datetime() - started
+    after = frappe.db.sql(handler_reads, (), as_dict=True)[0].value
+    perf["queries"].append({
+        "label": label,
+        "ms": round(elapsed.total_seconds() * 1000, 1),
+        "rows": len(rows),
+        "examined": int(after - before),
+    })
+    return rows
+
+# Chart of accounts, cached until an Account changes
+# (Cash & Bank Account Tree.py)
+tree = frappe.cache.get_value("cash_bank_account_tree")
+if not tree:
+    tree = {"accounts": {}, "cash_bank": []}
+    for acc in perf_sql(perf, "account tree", """
+        SELECT name, parent_account, lft, rgt, account_type, company, is_group
+        FROM `tabAccount`
+        ORDER BY lft
+    """):
+        tree["accounts"][acc.name] = {
+            "name": acc.name,
+            "parent_account": acc.parent_account,
+            "lft": acc.lft,
+            "rgt": acc.rgt,
+            "account_type": acc.account_type,
+            "company": acc.company,
+            "is_group": acc.is_group,
+        }
+        if not acc.is_group and acc.account_type in ("Cash", "Bank"):
+            tree["cash_bank"].append(acc.name)
+    tree["cash_bank"].sort()
+    frappe.cache.set_value("cash_bank_account_tree", tree, expires_in_sec=86400)
+
+# Ledger accounts anywhere under the selected group, found by its lft/rgt
+# bounds, or every ledger account without one, so tabGL Entry is filtered on
+# account and read through the (account, posting_date) index either way.
+accounts = []
+if parent_account:
+    parent = tree["accounts"].get(parent_account)
+    if parent:
+        for acc in tree["accounts"].values():
+            if not acc["is_group"] and acc["lft"] > parent["lft"] and acc["rgt"] < parent["rgt"]:
+                accounts.append(acc)
+else:
+    for acc in tree["accounts"].values():
+        if not acc["is_group"]:
+            accounts.append(acc)
+
+def result_cache_get(key):
+    # Hit/miss counts only feed the hit rate of cash_bank_result_cache; two
+    # runs updating them at once can lose a count, never an entry
+    stats = frappe.cache.get_value("cash_bank_result_cache|stats") or {"hits": 0, "misses": 0, "evictions": 0}
+    value = frappe.cache.get_value(key)
+    if value is None:
+        stats["misses"] = stats["misses"] + 1
+    else:
+        stats["hits"] = stats["hits"] + 1
+    frappe.cache.set_value("cash_bank_result_cache|stats", stats)
+    return value
+
+def result_cache_set(key, value, size=200):
+    # Each entry expires a week after it is stored, and the index of stored
+    # keys caps the cache at `size` entries, the oldest stored dropped first.
+    # Two runs storing at once can lose a key from the index; that entry is
+    # then left to its expiry, so the cap may be passed briefly, never for long.
+    frappe.cache.set_value(key, value, expires_in_sec=7 * 86400)
+    index = frappe.cache.get_value("cash_bank_result_cache|index") or []
+    if key in index:
+        index.remove(key)
+    index.append(key)
+    evicted = 0
+    while len(index) > size:
+        frappe.cache.delete_value(index.pop(0))
+        evicted += 1
+    frappe.cache.set_value("cash_bank_result_cache|index", index, expires_in_sec=7 * 86400)
+    if evicted:
+        stats = frappe.cache.get_value("cash_bank_result_cache|stats") or {"hits": 0, "misses": 0, "evictions": 0}
+        stats["evictions"] = (stats.get("evictions") or 0) + evicted
+        frappe.cache.set_value("cash_bank_result_cache|stats", stats)
+
+# Closed days come from the result cache (Cash & Bank Result Cache.py). The
+# GL Entry hooks replace the GL version of an account and of every group above
+# it on each posting (backdated ones included); "*" covers all accounts.
+cache_key = None
+cached = None
+if posting_date and frappe.utils.getdate(posting_date) < frappe.utils.getdate(frappe.utils.nowdate()):
+    version_key = "cash_bank_gl_version|" + (parent_account or "*")
+    version = frappe.cache.get_value(version_key)
+    if not version:
+        version = frappe.utils.now_datetime().strftime("%Y%m%d%H%M%S%f")
+        frappe.cache.set_value(version_key, version)
+    # bumped by "clear" in Cash & Bank Result Cache.py
+    generation = frappe.cache.get_value("cash_bank_result_cache|generation") or 0
+    company = (tree["accounts"].get(parent_account) or {}).get("company") if parent_account else ""
+    cache_key = (
+        f"cash_bank_result|{generation}|Cash Flow Statement|{company}|{parent_account or ''}|{posting_date}|{version}"
+    )
+    cached = result_cache_get(cache_key)
+    if perf is not None:
+        perf["result_cache"] = "hit" if cached else "miss"
+
+# Runs with filters.background (a day no one needs on screen right away, such
+# as a print of the whole chart) are not worked out on the web worker: they are
+# queued on the long queue (Cash & Bank Background Run.py), which runs this
+# report again with the job's token and stores the finished rows and figures
+# as a File. The job is keyed by the filters and the GL version, so later
+# opens with the same filters read that File back until the ledger changes.
+def background_read(file_name):
+    # rows are packed as one list of keys plus each row's values in that order
+    packed = json.loads(frappe.get_doc("File", file_name).get_content())
+    packed["result"] = [
+        {key: value for key, value in zip(packed["keys"], values) if value is not None}
+        for values in packed["rows"]
+    ]
+    return packed
+
+# A run from the queue carries the job's one-time token (Cash & Bank
+# Background Run.py); the job key is looked up from it here, never taken from
+# the filters, and the job must be running for the user who queued it.
+in_background = 0
+background_key = None
+pending = None
+if filters.get("background_token"):
+    background_key = frappe.cache.get_value(f"cash_bank_background_token|{filters.get('background_token')}")
+    job = frappe.cache.get_value(background_key) if background_key else None
+    if not isinstance(job, dict) or job.get("status") != "Running" or job.get("user") != frappe.session.user:
+        frappe.throw("This background run is not valid")
+    in_background = 1
+if in_background or not cached and frappe.utils.cint(filters.get("background")):
+    job_filters = {}
+    for key, value in filters.items():
+        if key not in ("background_token", "background_job", "perf"):
+            job_filters[key] = value
+    job_filters_json = json.dumps(job_filters, sort_keys=True, default=str)
+    if not in_background:
+        gl_version = frappe.cache.get_value("cash_bank_gl_version|" + (parent_account or "*")) or ""
+        background_key = f"cash_bank_background|Cash Flow Statement|{job_filters_json}|{gl_version}"
+    job = {} if in_background else frappe.cache.get_value(background_key) or {}
+    # The job the Client Script was told has completed (filters.background_job)
+    # is shown even when postings made while it ran have changed the key since:
+    # it is marked stale rather than queued again on every refresh.
+    stale = False
+    finished_key = None if in_background else filters.get("background_job")
+    if (
+        finished_key and finished_key != background_key and job.get("status") != "Completed"
+        and finished_key.startswith("cash_bank_background|Cash Flow Statement|")
+    ):
+        finished = frappe.cache.get_value(finished_key) or {}
+        if (
+            finished.get("status") == "Completed" and finished.get("filters") == job_filters_json
+            and finished.get("user") == frappe.session.user
+        ):
+            job = finished
+            stale = True
+    if job.get("status") == "Completed" and frappe.db.exists("File", job["file"]):
+        cached = background_read(job["file"])
+        if stale:
+            message = (
+                f"Prepared in the background at {str(job.get('completed'))[:16]}; entries posted since are not shown."
+                " Use Prepare Again to bring it up to date."
+            )
+    elif not in_background:
+        # a job still queued after the queue's timeout has been lost
+        if job.get("status") not in ("Queued", "Running") or (
+            frappe.utils.now_datetime() - frappe.utils.get_datetime(job["queued"])
+        ).total_seconds() > 3600:
+            job = {
+                "status": "Queued",
+                "progress": 0,
+                "queued": str(frappe.utils.now_datetime()),
+                "user": frappe.session.user,
+                "report_name": "Cash Flow Statement",
+                "filters": job_filters_json,
+            }
+            frappe.cache.set_value(background_key, job)
+            token = frappe.generate_hash(length=20)
+            frappe.cache.set_value(f"cash_bank_background_token|{token}", background_key, expires_in_sec=7200)
+            frappe.enqueue("cash_bank_background_run", queue="long", timeout=3600, token=token)
+        pending = job
+        cached = {"result": [], "opening": 0, "closing": 0, "total_expense": 0, "total_payments": 0, "total_receipts": 0}
+        message = f"This report is being prepared in the background ({job.get('progress') or 0}% done) and opens here when it is ready."
+    if not in_background:
+        # read back by Cash & Bank Print.py, which runs the report through frappe.call
+        frappe.response["cash_bank_background"] = {"key": background_key, "pending": bool(pending), "stale": stale}
+    if perf is not None:
+        perf["background"] = "pending" if pending else "stored" if cached else "running"
+
+# GL rows of the day. Expense Claim Detail is not joined here; it is fetched
+# below for the Expense Claim vouchers only. Nothing is fetched (and nothing
+# merged below) for a cached day.
+gl_rows = []
+if accounts and not cached:
+    gl_rows = perf_sql(perf, "ledger", """
         SELECT
+            gl.name AS gl_name,
             gl.posting_date,
+            gl.voucher_type,
             gl.voucher_no,
             gl.account,
             gl.against,
             gl.remarks,
-            gl.debit,
-            gl.credit,
-            ecd.default_account,
-            ecd.amount AS expense_amount,
-            REGEXP_REPLACE(ecd.description, '<[^>]*>', '') AS ecd_description,
-            ecd.name AS ecd_name,
-            acc.parent_account
+            ROUND(gl.credit, 0) AS payments,
+            ROUND(gl.debit, 0) AS receipts
         FROM `tabGL Entry` gl
-        LEFT JOIN `tabExpense Claim Detail` ecd ON gl.voucher_no = ecd.parent
-        LEFT JOIN `tabAccount` acc ON acc.name = gl.account
         WHERE
-            gl.is_cancelled = 0
-            AND gl.posting_date = %s
-            AND (acc.parent_account = %s OR %s IS NULL)
-    ),
-    numbered AS (
-        SELECT *,
-            CONCAT_WS(' / ', against, default_account) AS against_account,
-            CONCAT_WS(' | ', remarks, ecd_description) AS description,
-            ROW_NUMBER() OVER (
-                PARTITION BY voucher_no
-                ORDER BY ecd_name
-            ) AS rn
-        FROM gl_data
-    )
-    SELECT
-        posting_date,
-        voucher_no,
-        against_account,
-        parent_account,
-        account,
-        description,
-        ROUND(COALESCE(expense_amount, 0), 0) AS expense,
-        CASE
-            WHEN voucher_no LIKE 'HR-EXP%%' AND rn = 1 THEN ROUND(credit, 0)
-            WHEN voucher_no LIKE 'HR-EXP%%' THEN 0
-            ELSE ROUND(credit, 0)
-        END AS payments,
-        ROUND(debit, 0) AS receipts
-    FROM numbered
-    WHERE
-        (voucher_no NOT LIKE 'HR-EXP%%' OR expense_amount IS NOT NULL)
-    ORDER BY posting_date, parent_account, voucher_no, rn
-""", (posting_date, parent_account, parent_account), as_dict=True)
-
-# Totals
-total_expense = sum(row.expense or 0 for row in result if row.voucher_no and row.voucher_no.startswith('HR-EXP'))
-total_payments = sum(row.payments or 0 for row in result)
-total_receipts = sum(row.receipts or 0 for row in result)
-
-# Opening and Closing Balances
-opening = frappe.db.sql("""
-    SELECT COALESCE(SUM(debit) - SUM(credit), 0) AS balance
-    FROM `tabGL Entry` gl
-    LEFT JOIN `tabAccount` acc ON acc.name = gl.account
-    WHERE gl.is_cancelled = 0
-      AND gl.posting_date < %s
-      AND (acc.parent_account = %s OR %s IS NULL)
-""", (posting_date, parent_account, parent_account), as_dict=True)[0].balance or 0
-
-closing = frappe.db.sql("""
-    SELECT COALESCE(SUM(debit) - SUM(credit), 0) AS balance
-    FROM `tabGL Entry` gl
-    LEFT JOIN `tabAccount` acc ON acc.name = gl.account
-    WHERE gl.is_cancelled = 0
-      AND gl.posting_date <= %s
-      AND (acc.parent_account = %s OR %s IS NULL)
-""", (posting_date, parent_account, parent_account), as_dict=True)[0].balance or 0
+            gl.account IN %(accounts)s
+            AND gl.is_cancelled = 0
+            AND gl.posting_date = %(posting_date)s
+        ORDER BY gl.posting_date, gl.voucher_no, gl.name
+    """, {"accounts": tuple(acc["name"] for acc in accounts), "posting_date": posting_date})
+
+# Parent account from the tree; the stable sort keeps (posting_date,
+# voucher_no, name) within each parent
+for row in gl_rows:
+    row.parent_account = (tree["accounts"].get(row.account) or {}).get("parent_account")
+gl_rows.sort(key=lambda row: row.parent_account or "")
+
+# Expense Claim Detail rows, fetched only for the Expense Claim vouchers of
+# the day (the only vouchers the old LEFT JOIN on parent could ever match)
+claim_vouchers = set()
+for row in gl_rows:
+    if row.voucher_type == "Expense Claim":
+        claim_vouchers.add(row.voucher_no)
+
+expense_details = {}
+if claim_vouchers:
+    for detail in perf_sql(perf, "expense details", """
+        SELECT
+            parent,
+            default_account,
+            amount AS expense_amount,
+            ROUND(COALESCE(amount, 0), 0) AS expense,
+            -- plain text stored on save (Expense Claim Description Text.py);
+            -- rows the backfill has not reached yet are stripped here
+            COALESCE(description_text, REGEXP_REPLACE(description, '<[^>]*>', '')) AS description
+        FROM `tabExpense Claim Detail`
+        WHERE parent IN %(vouchers)s
+        ORDER BY parent, name
+    """, {"vouchers": tuple(claim_vouchers)}):
+        expense_details.setdefault(detail.parent, []).append(detail)
+
+def concat_ws(separator, *values):
+    # CONCAT_WS: NULLs are skipped, empty strings are kept
+    return separator.join(value for value in values if value is not None)
+
+# Merge the expense rows in. Each voucher expands to (expense row x GL row)
+# ordered by expense row, numbered across the whole voucher the way
+# ROW_NUMBER() OVER (PARTITION BY voucher_no ORDER BY ecd_name) did, then the
+# rows are put back in (posting_date, parent_account, voucher_no, rn) order.
+blocks = {}
+vouchers = {}
+for row in gl_rows:
+    key = (row.posting_date, row.parent_account, row.voucher_no)
+    if key not in blocks:
+        blocks[key] = len(blocks)
+    row.block = blocks[key]
+    vouchers.setdefault(row.voucher_no, []).append(row)
+
+numbered = []
+for voucher_no, voucher_rows in vouchers.items():
+    hr_exp = voucher_no.upper().startswith("HR-EXP")
+    rn = 0
+    for detail in expense_details.get(voucher_no) or [None]:
+        for gl in voucher_rows:
+            rn += 1
+            # HR-EXP rows without an expense amount are left out
+            if hr_exp and (not detail or detail.expense_amount is None):
+                continue
+            numbered.append((gl.block, rn, {
+                "posting_date": gl.posting_date,
+                "voucher_no": gl.voucher_no,
+                "against_account": concat_ws(" / ", gl.against, detail.default_account if detail else None),
+                "parent_account": gl.parent_account,
+                "account": gl.account,
+                "description": concat_ws(" | ", gl.remarks, detail.description if detail else None),
+                "expense": detail.expense if detail else 0,
+                # show payment only once per expense claim
+                "payments": gl.payments if not hr_exp or rn == 1 else 0,
+                "receipts": gl.receipts,
+            }))
+
+# Result and Totals in one pass
+result = []
+total_expense = total_payments = total_receipts = 0
+for block, rn, row in sorted(numbered, key=lambda item: (item[0], item[1])):
+    result.append(row)
+    if row["voucher_no"].startswith("HR-EXP"):
+        total_expense += row["expense"]
+    total_payments += row["payments"]
+    total_receipts += row["receipts"]
+
+# Opening and Closing Balances, per account as in Cash & Bank Report (V3):
+# accounts covered by Cash Bank Daily Balance read their latest snapshot rows,
+# the others add the GL rows posted since their latest period close (Account
+# Closing Balance) to that closing figure, so no account's whole history is
+# aggregated.
+if frappe.db.exists("DocType", "Account Closing Balance"):
+    closing_base = """
+        SELECT
+            sel.account,
+            COALESCE(last_close.closing_date, DATE '1900-01-01') AS closing_date,
+            COALESCE(SUM(acb.debit) - SUM(acb.credit), 0) AS balance
+        FROM selected sel
+        LEFT JOIN (
+            SELECT account, MAX(closing_date) AS closing_date
+            FROM `tabAccount Closing Balance`
+            WHERE account IN %(accounts)s
+              AND closing_date < %(posting_date)s
+            GROUP BY account
+        ) last_close ON last_close.account = sel.account
+        LEFT JOIN `tabAccount Closing Balance` acb
+            ON acb.account = sel.account
+            AND acb.closing_date = last_close.closing_date
+        GROUP BY sel.account, last_close.closing_date
+    """
+else:
+    closing_base = "SELECT account, DATE '1900-01-01' AS closing_date, 0 AS balance FROM selected"
+
+balances = {"opening": 0, "closing": 0}
+if accounts and not cached:
+    balances = perf_sql(perf, "balances", """
+        WITH selected AS (
+            SELECT name AS account FROM `tabAccount` WHERE name IN %(accounts)s
+        ),
+
+        closing_base AS (""" + closing_base + """),
+
+        snapshot AS (
+            SELECT
+                sel.account,
+                EXISTS(
+                    SELECT 1 FROM `tabCash Bank Daily Balance` s WHERE s.account = sel.account
+                ) AS maintained,
+                (
+                    SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                    WHERE s.account = sel.account AND s.posting_date < %(posting_date)s
+                    ORDER BY s.posting_date DESC LIMIT 1
+                ) AS opening,
+                (
+                    SELECT s.cumulative_balance FROM `tabCash Bank Daily Balance` s
+                    WHERE s.account = sel.account AND s.posting_date <= %(posting_date)s
+                    ORDER BY s.posting_date DESC LIMIT 1
+                ) AS closing
+            FROM selected sel
+        ),
+
+        balances AS (
+            SELECT
+                s.account,
+                CASE
+                    WHEN s.maintained THEN COALESCE(s.opening, 0)
+                    ELSE b.balance + COALESCE(SUM(
+                        CASE WHEN gl.posting_date < %(posting_date)s THEN gl.debit - gl.credit END
+                    ), 0)
+                END AS opening,
+                CASE
+                    WHEN s.maintained THEN COALESCE(s.closing, 0)
+                    ELSE b.balance + COALESCE(SUM(gl.debit - gl.credit), 0)
+                END AS closing
+            FROM snapshot s
+            JOIN closing_base b ON b.account = s.account
+            -- only scanned for accounts the snapshot does not cover
+            LEFT JOIN `tabGL Entry` gl
+                ON NOT s.maintained
+                AND gl.is_cancelled = 0
+                AND gl.account = s.account
+                AND gl.posting_date > b.closing_date
+                AND gl.posting_date <= %(posting_date)s
+            GROUP BY s.account, s.maintained, s.opening, s.closing, b.balance
+        )
+
+        SELECT
+            COALESCE(SUM(opening), 0) AS opening,
+            COALESCE(SUM(closing), 0) AS closing
+        FROM balances
+    """, {"accounts": tuple(acc["name"] for acc in accounts), "posting_date": posting_date})[0]
+
+if cached:
+    result = cached["result"]
+    opening = cached["opening"]
+    closing = cached["closing"]
+    total_expense = cached["total_expense"]
+    total_payments = cached["total_payments"]
+    total_receipts = cached["total_receipts"]
+else:
+    opening = balances["opening"]
+    closing = balances["closing"]
+
+if cache_key and not cached:
+    result_cache_set(cache_key, {
+        "result": result,
+        "opening": opening,
+        "closing": closing,
+        "total_expense": total_expense,
+        "total_payments": total_payments,
+        "total_receipts": total_receipts,
+    })
 
 def format_with_comma(val):
     try:
@@ -119,17 +468,48 @@ summary = [
     {"label": "Other Payments", "value": format_with_comma(total_payments - total_expense), "indicator": "Red"},
     {"label": "Closing Balance", "value": format_with_comma(closing), "indicator": "Green"},
 ]
+if pending:
+    summary = []
+
+if perf is not None:
+    perf["ms"] = round((frappe.utils.now_datetime() - perf["started"]).total_seconds() * 1000, 1)
+    perf["summary"] = {
+        "opening": opening,
+        "total_receipts": total_receipts,
+        "total_payments": total_payments,
+        "total_expense": total_expense,
+        "closing": closing,
+        "result_rows": len(result),
+    }
+    perf_log = frappe.cache.get_value("cash_bank_perf_log") or []
+    perf_log.append(perf)
+    frappe.cache.set_value("cash_bank_perf_log", perf_log[-50:])
 
-# Debug Logs
-frappe.log_error("Cash Flow Statement - Intermediate Values:", {
-    "opening": opening,
-    "total_receipts": total_receipts,
-    "total_payments": total_payments,
-    "total_expense": total_expense,
-    "closing": closing,
-    "result_rows": len(result)
-})
-frappe.log_error("Cash Flow Statement - Summary:", str(summary))
+# The background job's output, left for Cash & Bank Background Run.py to store
+if in_background:
+    keys = []
+    for row in result:
+        for key in row:
+            if key not in keys:
+                keys.append(key)
+    packed_rows = []
+    for row in result:
+        values = []
+        for key in keys:
+            value = row.get(key)
+            if value is not None and key in ("expense", "payments", "receipts"):
+                value = frappe.utils.flt(value, 9)
+            values.append(value)
+        packed_rows.append(values)
+    frappe.cache.set_value(background_key + "|artifact", {
+        "keys": keys,
+        "rows": packed_rows,
+        "opening": frappe.utils.flt(opening, 9),
+        "closing": frappe.utils.flt(closing, 9),
+        "total_expense": frappe.utils.flt(total_expense, 9),
+        "total_payments": frappe.utils.flt(total_payments, 9),
+        "total_receipts": frappe.utils.flt(total_receipts, 9),
+    }, expires_in_sec=86400)
 
 data = columns, result, message, None, summary
 
@@ -162,280 +542,76 @@ frappe.query_reports["Cash Flow Statement"] = {
           }
         };
       }
+    },
+    {
+      // Queued on the long queue instead of worked out on screen (Cash & Bank
+      // Background Run.py): for a whole chart no one needs right away
+      fieldname: "background",
+      label: "Prepare in Background",
+      fieldtype: "Check",
+      default: 0
+    },
+    {
+      // The completed background job to show (Cash & Bank Background Run.py)
+      fieldname: "background_job",
+      fieldtype: "Data",
+      hidden: 1
     }
   ],
+  after_datatable_render: function() {
+    // Filters the grid on screen was loaded for, checked by Print
+    const report = frappe.query_report;
+    const filters = report.get_filter_values();
+    report.loaded_filters = JSON.stringify(filters);
+
+    // A background result on screen can be prepared again from the current ledger
+    report.page.remove_inner_button(__("Prepare Again"));
+    if (filters.background_job) {
+      report.page.add_inner_button(__("Prepare Again"), () => report.set_filter_value("background_job", ""));
+    }
+  },
   onload: function(report) {
-    // Add Print button outside view list
+    // Background runs (Cash & Bank Background Run.py): the report opens again
+    // from the stored result when the job is done
+    if (!report.background_listener) {
+      report.background_listener = true;
+      frappe.realtime.on("cash_bank_background_run", (job) => {
+        if (job.report_name !== "Cash Flow Statement" || frappe.query_report !== report) return;
+        if (job.status === "Running") {
+          frappe.show_progress(__("Cash Flow Statement"), job.progress, 100, __("Preparing in the background"));
+          return;
+        }
+        frappe.hide_progress();
+        // Opened by the job's key, so postings made while it ran do not queue it again
+        if (job.status === "Completed") report.set_filter_value("background_job", job.key);
+        else frappe.msgprint(__("The background run failed: {0}", [job.error]));
+      });
+    }
+
+    // Add Print and PDF buttons outside view list. The page is rendered on
+    // the server (Cash & Bank Print.py); a closed day comes back stored.
     if (!report.page.main_buttons || !report.page.main_buttons["Print"]) {
-      report.page.add_button("Print", async () => {
+      const render = () => {
         const filters = report.get_filter_values();
         if (!filters.posting_date) {
           frappe.throw(__("Please select a Posting Date"));
-          return;
         }
-        try {
-          const result = await new Promise((resolve, reject) => {
-            frappe.call({
-              method: "frappe.desk.query_report.run",
-              args: {
-                report_name: "Cash Flow Statement",
-                filters: filters
-              },
-              callback: function(r) {
-                if (r.exc) {
-                  reject(r.exc);
-                } else {
-                  resolve(r);
-                }
-              }
-            });
-          });
-          const data = result.message.result || [];
-          const summary = result.message.summary || [];
-          let total_expense = 0, total_payments = 0, total_receipts = 0;
-          data.forEach(row => {
-            total_expense += parseFloat(row.expense || 0);
-            total_payments += parseFloat(row.payments || 0);
-            total_receipts += parseFloat(row.receipts || 0);
-          });
-
-          function format_number(val) {
-            try {
-              val = parseInt(val) || 0;
-              let s = val.toString();
-              if (s.length <= 3) return s;
-              let parts = [];
-              while (s.length > 3) {
-                parts.unshift(s.slice(-3));
-                s = s.slice(0, -3);
-              }
-              parts.unshift(s);
-              return parts.join(",");
-            } catch (e) {
-              console.error("Error formatting number:", e);
-              return "0";
-            }
-          }
-
-          let summaryMap = {};
-          if (summary && summary.length > 0) {
-            summary.forEach(item => {
-              if (item.label && item.value !== undefined) {
-                summaryMap[item.label] = item.value.toString();
-              } else {
-                console.warn(`Invalid summary item: ${JSON.stringify(item)}`);
-              }
-            });
-          } else {
-            console.warn("Summary array is empty, computing fallback values from data");
-            const openingBalanceRes = await frappe.call({
-              method: "frappe.client.get_value",
-              args: {
-                doctype: "GL Entry",
-                filters: {
-                  is_cancelled: 0,
-                  posting_date: ["<", filters.posting_date]
-                },
-                fieldname: "sum(debit) - sum(credit) as balance"
-              }
-            });
-            const total_opening = openingBalanceRes.message?.balance || 0;
-
-            const closingBalanceRes = await frappe.call({
-              method: "frappe.client.get_value",
-              args: {
-                doctype: "GL Entry",
-                filters: {
-                  is_cancelled: 0,
-                  posting_date: ["<=", filters.posting_date]
-                },
-                fieldname: "sum(debit) - sum(credit) as balance"
-              }
-            });
-            const total_closing = closingBalanceRes.message?.balance || 0;
-
-            summaryMap = {
-              "Opening Balance": format_number(total_opening),
-              "Today Receipts": format_number(total_receipts),
-              "Total Balance": format_number(total_opening + total_receipts),
-              "Net Cash Flow": format_number(total_receipts - total_payments),
-              "Total Payments": format_number(total_payments),
-              "Total Expense": format_number(total_expense),
-              "Other Payments": format_number(total_payments - total_expense),
-              "Closing Balance": format_number(total_closing)
-            };
-          }
+        const args = { report_name: "Cash Flow Statement", filters: filters };
+        // Send the rows already on screen when they were loaded for these filters
+        if (report.raw_data && report.loaded_filters === JSON.stringify(filters)) {
+          args.data = {
+            result: report.raw_data.result || [],
+            summary: report.raw_data.summary || report.raw_data.report_summary || []
+          };
+        }
+        return frappe.xcall("cash_bank_print", args);
+      };
 
-          const requiredKeys = [
-            "Opening Balance", "Today Receipts", "Total Balance", "Net Cash Flow",
-            "Total Payments", "Total Expense", "Other Payments", "Closing Balance"
-          ];
-          requiredKeys.forEach(key => {
-            if (!summaryMap[key]) {
-              console.warn(`Missing summary key: ${key}`);
-              summaryMap[key] = "0";
-            }
-          });
-
-          const companyRes = await frappe.db.get_value("Company", { name: frappe.defaults.get_default("company") }, "*");
-          const company = companyRes.message || {};
-          const companyName = company.name || "";
-          const logoUrl = company.logo ? company.logo : "/files/logo CCL.JPG";
-
-          const balancesHtml = `
-            <div style="margin-bottom: 20px; display: inline-block; vertical-align: top;">
-              <table style="width: 300px; border-collapse: collapse; table-layout: fixed;">
-                <thead><tr style="background-color: #f2f2f2;"><th colspan="2" style="border: 2px solid #0d0405; padding: 8px;">Opening Balance, Receipts & Cashflow</th></tr></thead>
-                <tbody>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Opening Balance</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Opening Balance"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Today Receipts</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Today Receipts"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Total Balance</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Total Balance"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Net Cash Flow</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Net Cash Flow"]}</td></tr>
-                </tbody>
-              </table>
-            </div>
-          `;
-
-          const summaryHtml = `
-            <div style="margin-bottom: 20px; display: inline-block; vertical-align: top; margin-left: 20px;">
-              <table style="width: 300px; border-collapse: collapse; table-layout: fixed;">
-                <thead><tr style="background-color: #f2f2f2;"><th colspan="2" style="border: 2px solid #0d0405; padding: 8px;">Expenses, Payments & Closing Balance</th></tr></thead>
-                <tbody>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Total Payments</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Total Payments"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Total Expense</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Total Expense"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Other Payments</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Other Payments"]}</td></tr>
-                  <tr><td style="border: 1px solid #050000; padding: 5px;">Closing Balance</td><td style="border: 1px solid #050000; padding: 6px; text-align: right;">${summaryMap["Closing Balance"]}</td></tr>
-                </tbody>
-              </table>
-            </div>
-          `;
-
-          const html = `
-            <html>
-              <head>
-                <title>Cash Flow Statement</title>
-                <style>
-                  @media print {
-                    @page { size: landscape; margin: 10mm; }
-                  }
-                  body { font-family: sans-serif; font-size: 12px; margin: 10px; }
-                  .header { display: flex; justify-content: space-between; align-items: center; }
-                  .header-left { text-align: left; }
-                  .header-right img { max-width: 70px; }
-                  table {
-                    width: 100%;
-                    border-collapse: collapse;
-                    font-size: 12px;
-                    margin-top: 5px;
-                    table-layout: fixed;
-                    word-wrap: break-word;
-                  }
-                  th, td {
-                    border: 1px solid #444;
-                    padding: 5px;
-                    text-align: left;
-                  }
-                  th { background-color: #f8facf; font-weight: bold; }
-                  ul { padding-left: 20px; }
-                  .footer {
-                    margin-top: 80px;
-                    font-size: 12px;
-                    color: black;
-                    display: flex;
-                    justify-content: space-between;
-                  }
-                  .footer-left, .footer-center, .footer-right {
-                    width: 30%;
-                    text-align: left;
-                  }
-                  .footer-center {
-                    text-align: center;
-                  }
-                  .footer-right {
-                    text-align: right;
-                  }
-                </style>
-              </head>
-              <body>
-                <div class="header">
-                  <div class="header-left">
-                    <h2>${companyName}</h2>
-                    <p><strong>Posting Date:</strong> ${filters.posting_date}</p>
-                    <p><strong>Parent Account:</strong> ${filters.parent_account || "All"}</p>
-                  </div>
-                  <div class="header-right">
-                    <img src="${logoUrl}" alt="Company Logo">
-                  </div>
-                </div>
-                <hr>
-                ${balancesHtml}
-                ${summaryHtml}
-                <h2>Detailed Ledger Transactions Report</h2>
-                <table>
-                  <thead>
-                    <tr>
-                      <th style="width: 100px;">Posting Date</th>
-                      <th style="width: 130px;">Voucher No</th>
-                      <th style="width: 180px;">Against / Account</th>
-                      <th style="width: 200px;">Parent Account</th>
-                      <th style="width: 200px;">Account</th>
-                      <th style="width: 250px;">Description</th>
-                      <th style="width: 90px;">Expense</th>
-                      <th style="width: 90px;">Payments</th>
-                      <th style="width: 90px;">Receipts</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    ${data.map(row => `
-                      <tr>
-                        <td>${row.posting_date || ""}</td>
-                        <td>${row.voucher_no || ""}</td>
-                        <td>${row.against_account || ""}</td>
-                        <td>${row.parent_account || ""}</td>
-                        <td>${row.account || ""}</td>
-                        <td>${row.description || ""}</td>
-                        <td style="text-align:right;">${format_number(row.expense)}</td>
-                        <td style="text-align:right;">${format_number(row.payments)}</td>
-                        <td style="text-align:right;">${format_number(row.receipts)}</td>
-                      </tr>
-                    `).join("")}
-                  </tbody>
-                </table>
-
-                <!-- Total Row Moved Outside Table -->
-                <table style="margin-top: -1px;">
-                  <tfoot>
-                    <tr>
-                      <th colspan="6" style="text-align:right;">Total</th>
-                      <th style="text-align:right;">${format_number(total_expense)}</th>
-                      <th style="text-align:right;">${format_number(total_payments)}</th>
-                      <th style="text-align:right;">${format_number(total_receipts)}</th>
-                    </tr>
-                  </tfoot>
-                </table>
-
-                <!-- Footer Section -->
-                <div class="footer">
-                  <div class="footer-left">
-                    <strong>Created By:</strong><br>
-                    ${frappe.session.user}
-                  </div>
-                  <div class="footer-center">
-                    <strong>Submitted By:</strong><br>
-                    Accountant
-                  </div>
-                  <div class="footer-right">
-                    <strong>Approved By:</strong><br>
-                    Director
-                  </div>
-                </div>
-
-              </body>
-            </html>
-          `;
-          const newTab = window.open("", "_blank");
-          newTab.document.write(html);
-          newTab.document.close();
+      report.page.add_button("Print", async () => {
+        try {
+          const printed = await render();
+          const url = URL.createObjectURL(new Blob([printed.html], { type: "text/html" }));
+          const newTab = window.open(url, "_blank");
           newTab.onload = function () {
             newTab.print();
           };
@@ -444,6 +620,11 @@ frappe.query_reports["Cash Flow Statement"] = {
           frappe.throw(__("Failed to generate Printable HTML. Please check browser console."));
         }
       });
+
+      report.page.add_button("PDF", async () => {
+        const printed = await render();
+        frappe.render_pdf(printed.html, { orientation: "Landscape" });
+      });
       // Prevent duplicate buttons
       if (!report.page.main_buttons) report.page.main_buttons = {};
       report.page.main_buttons["Print"] = true;
@@ -0,0 +1,72 @@
+# Store the plain-text description the cash and bank reports show, so they no
+# longer strip the HTML with REGEXP_REPLACE on every run. Same pattern as the
+# reports used: everything enclosed in and including <> is removed.
+for row in doc.expenses:
+    if row.description is None:
+        row.description_text = None
+    else:
+        row.description_text = frappe.utils.strip_html(row.description)
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Expense Claim Description Text
+#   Script Type: DocType Event
+#   Reference Document Type: Expense Claim
+#   DocType Event: Before Save
+
+-----------------------------
+
+
+
+# Add in Server Script
+#   Name: Expense Claim Description Text - Backfill
+#   Script Type: API
+#   API Method: cash_bank_description_text_backfill
+#
+# One-time backfill for Expense Claim Detail rows saved before the hook
+# existed. Queues itself on the long queue and works in batches until no row
+# is left; the reports fall back to REGEXP_REPLACE for rows not reached yet.
+#   frappe.call("cash_bank_description_text_backfill")
+#
+# The queued job carries a one-time token stored for the user who queued it;
+# without that token the call only queues, and both sides are System Manager
+# only.
+
+if frappe.session.user != "Administrator" and not frappe.db.exists(
+    "Has Role", {"parent": frappe.session.user, "parenttype": "User", "role": "System Manager"}
+):
+    frappe.throw("Only a System Manager can run the description backfill")
+
+token = frappe.form_dict.get("token")
+if not token:
+    token = frappe.generate_hash(length=20)
+    frappe.cache.set_value(f"cash_bank_description_text_backfill_token|{token}", frappe.session.user, expires_in_sec=7200)
+    frappe.enqueue("cash_bank_description_text_backfill", queue="long", timeout=3600, token=token)
+    frappe.response["message"] = "Queued"
+else:
+    if frappe.cache.get_value(f"cash_bank_description_text_backfill_token|{token}") != frappe.session.user:
+        frappe.throw("This backfill run is not valid")
+    frappe.cache.delete_value(f"cash_bank_description_text_backfill_token|{token}")
+    updated = 0
+    while True:
+        pending = frappe.db.sql("""
+            SELECT name, description
+            FROM `tabExpense Claim Detail`
+            WHERE description_text IS NULL
+              AND description IS NOT NULL
+            LIMIT 500
+        """, as_dict=True)
+        if not pending:
+            break
+        for row in pending:
+            frappe.db.set_value(
+                "Expense Claim Detail", row.name,
+                "description_text", frappe.utils.strip_html(row.description),
+                update_modified=False,
+            )
+        updated += len(pending)
+        frappe.db.commit()
+    frappe.response["message"] = {"updated": updated}
@@ -0,0 +1,170 @@
+"""Time every cash and bank report on a generated ledger and compare the
+figures with a stored baseline.
+
+Seeds a local MariaDB with ``seed_ledger.py`` (or reuses the schema already in
+``--database`` with ``--reuse``, for ledgers that take long to generate), runs
+"Cash & Bank Indexes.py", then runs each case of ``check_plans.py`` (V1, V2,
+V3, Cash Flow Statement and "Cash & Bank Account Report.sql") ``--repeat``
+times. For every case it records p50 and p95 wall time, the rows the server
+examined (the session ``Handler_read%`` counters), the number of statements and
+a digest of the output. Each run starts with an empty ``frappe.cache``.
+
+    python tools/benchmark.py --database cash_bank_test --gl-rows 1000000 --save baseline.json
+    python tools/benchmark.py --database cash_bank_test --reuse --baseline baseline.json
+
+Against a baseline a case fails when its output digest differs, or its p95 or
+rows examined grew by more than ``--tolerance``; the exit status is then 1.
+Requires ``pip install pymysql`` and a MariaDB 10.6+ server.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+import time
+
+import seed_ledger
+from check_plans import cases, path
+from report_runner import Database, report_output, run_query_report, run_script
+
+
+def describe(connection):
+    """The ``seed()`` summary of a ledger generated earlier."""
+    db = Database(connection)
+    accounts = [row.name for row in db.sql("""
+        SELECT name FROM `tabAccount`
+        WHERE account_type IN ('Cash', 'Bank') AND is_group = 0
+        ORDER BY lft
+    """, as_dict=True)]
+    ledger = db.sql("""
+        SELECT MIN(posting_date) AS start, MAX(posting_date) AS end, COUNT(*) AS gl_rows
+        FROM `tabGL Entry`
+    """, as_dict=True)[0]
+    return {
+        "accounts": accounts,
+        "parent_account": f"Cash In Hand - {seed_ledger.ABBR}",
+        "company": seed_ledger.COMPANY,
+        "start": ledger.start,
+        "end": ledger.end,
+        "gl_rows": ledger.gl_rows,
+        "expense_rows": db.sql("SELECT COUNT(*) FROM `tabExpense Claim Detail`")[0][0],
+    }
+
+
+def rows_examined(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+        return sum(int(value) for _, value in cursor.fetchall())
+
+
+def percentile(values, share):
+    # nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def digest(output):
+    text = json.dumps(output, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def run_case(connection, report, kind, filters):
+    statements = []
+
+    def count(query, values):
+        statements.append(query)
+
+    if kind == "query":
+        rows = run_query_report(path(f"{report}.sql"), connection, filters, on_query=count)
+        return rows, len(statements)
+    local_vars, _ = run_script(path(f"{report}.py"), connection, filters=filters, on_query=count)
+    _, result, _, _, summary = report_output(local_vars)
+    return {"result": result, "summary": summary}, len(statements)
+
+
+def measure(connection, info, repeat):
+    measured = {}
+    for report, label, kind, filters in cases(info):
+        timings, examined, outputs = [], [], set()
+        for _ in range(repeat):
+            before = rows_examined(connection)
+            started = time.perf_counter()
+            output, statements = run_case(connection, report, kind, filters)
+            timings.append(time.perf_counter() - started)
+            examined.append(rows_examined(connection) - before)
+            outputs.add(digest(output))
+            connection.rollback()
+        measured[f"{report} [{label}]"] = {
+            "p50_ms": round(percentile(timings, 0.5) * 1000, 1),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 1),
+            "rows_examined": max(examined),
+            "statements": statements,
+            "digest": ",".join(sorted(outputs)),
+        }
+    return measured
+
+
+def compare(measured, baseline, tolerance):
+    failures = 0
+    for case, current in measured.items():
+        previous = baseline.get(case)
+        if not previous:
+            print(f"new  {case}")
+            continue
+        problems = []
+        if current["digest"] != previous["digest"]:
+            problems.append("output differs")
+        for metric in ("p95_ms", "rows_examined"):
+            if current[metric] > previous[metric] * (1 + tolerance) and current[metric] - previous[metric] > 1:
+                problems.append(f"{metric} {previous[metric]} -> {current[metric]}")
+        print(f"{'FAIL' if problems else 'ok':4} {case}" + (": " + "; ".join(problems) if problems else ""))
+        failures += bool(problems)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    seed_ledger.add_connection_arguments(parser)
+    seed_ledger.add_seed_arguments(parser)
+    parser.add_argument("--reuse", action="store_true", help="benchmark the ledger already in --database")
+    parser.add_argument("--no-indexes", action="store_true",
+                        help="skip Cash & Bank Indexes.py to time the stock ERPNext plans")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", help="JSON file written by --save to compare against")
+    parser.add_argument("--save", help="write the measurements to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed growth of p95 and rows examined over the baseline (default 0.25)")
+    args = parser.parse_args()
+
+    connection = seed_ledger.connect_and_create(args)
+    if args.reuse:
+        info = describe(connection)
+    else:
+        info = seed_ledger.seed(connection, seed=args.seed, gl_rows=args.gl_rows, days=args.days,
+                                closing=args.closing, snapshot=args.snapshot, hr_exp_share=args.hr_exp_share)
+    if not args.no_indexes:
+        run_script(path("Cash & Bank Indexes.py"), connection)
+    print(f"{info['gl_rows']} GL rows, {info['expense_rows']} expense rows, "
+          f"{len(info['accounts'])} cash/bank accounts, {info['start']} .. {info['end']}")
+
+    measured = measure(connection, info, args.repeat)
+    for case, current in measured.items():
+        print("{:55} p50 {:>9} ms  p95 {:>9} ms  {:>12} rows  {:>3} statements".format(
+            case, current["p50_ms"], current["p95_ms"], current["rows_examined"], current["statements"]
+        ))
+
+    ledger = {key: str(info[key]) for key in ("gl_rows", "expense_rows", "start", "end")}
+    failures = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["ledger"] != ledger:
+            print(f"baseline was measured on another ledger: {baseline['ledger']}")
+            sys.exit(2)
+        failures = compare(measured, baseline["cases"], args.tolerance)
+        print(f"{failures} case(s) regressed")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"ledger": ledger, "cases": measured}, f, indent=2, sort_keys=True)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,171 @@
+"""EXPLAIN every query the cash and bank reports run and fail on full scans.
+
+Seeds a local MariaDB with ``seed_ledger.py``, runs "Cash & Bank Indexes.py"
+the way the API script runs on a site, then executes each report for a
+representative filter set, and the API scripts that read the ledger on their
+own: the keyset Ledger Page (first and next page), the Export job and Print's
+GL version lookup for a closed day. Every SELECT / WITH statement sent is
+re-run under EXPLAIN and the plan is rejected when a base table with at least
+``--min-rows`` estimated rows is read with ``type = ALL`` or needs a filesort.
+The Ledger Page relies on reading the cash_bank_account_posting_voucher index
+in order, so a filesort on tabGL Entry is rejected there at any size.
+
+    python tools/check_plans.py --database cash_bank_test --gl-rows 200000
+
+Exits 1 when a plan is rejected, so it can gate a change to any of the SQL.
+Requires ``pip install pymysql`` and a MariaDB 10.6+ server.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+import seed_ledger
+from report_runner import Cache, Database, run_query_report, run_script
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def path(name):
+    return os.path.join(ROOT, name)
+
+
+def cases(info):
+    account = info["accounts"][0]
+    day = info["end"].isoformat()
+    month_start = info["end"].replace(day=1).isoformat()
+    quarter_start = (info["end"] - datetime.timedelta(days=90)).isoformat()
+    return [
+        ("Cash & Bank Report V1", "single day", "script", {"posting_date": day, "account": account}),
+        ("Cash & Bank Report V2", "single day", "script", {"posting_date": day, "account": account}),
+        ("Cash & Bank Report V3", "single day", "script", {"from_date": day, "to_date": day, "account": account}),
+        ("Cash & Bank Report V3", "range", "script", {"from_date": month_start, "to_date": day, "account": account}),
+        ("Cash & Bank Report V3", "streaming", "script", {"from_date": quarter_start, "to_date": day, "account": account}),
+        ("Cash & Bank Report V3", "consolidated", "script", {"from_date": day, "to_date": day, "consolidated": 1}),
+        ("Cash Flow Statement", "parent", "script", {"posting_date": day, "parent_account": info["parent_account"]}),
+        ("Cash Flow Statement", "no parent", "script", {"posting_date": day}),
+        ("Cash & Bank Account Report", "range", "query", {
+            "start_date": month_start, "end_date": day, "account": account, "company": info["company"],
+        }),
+        ("Cash & Bank List", "balances", "query", {"account_type": "All", "as_on_date": day}),
+        ("Cash & Bank Ledger Page", "first page", "api", {
+            "account": account, "from_date": quarter_start, "to_date": day, "page_length": 200,
+        }),
+        ("Cash & Bank Ledger Page", "next page", "next page", {
+            "account": account, "from_date": quarter_start, "to_date": day, "page_length": 200,
+        }),
+        ("Cash & Bank Export", "range", "job", {
+            "accounts": json.dumps(info["accounts"][:2]), "from_date": month_start, "to_date": day, "chunk_days": 7,
+        }),
+        ("Cash & Bank Print", "closed day", "api", {
+            "report_name": "Cash & Bank Report",
+            "filters": json.dumps({"from_date": day, "to_date": day, "account": account}),
+        }),
+    ]
+
+# Reports whose plans must never sort tabGL Entry, whatever its size
+ORDERED_READS = ("Cash & Bank Ledger Page",)
+
+
+def explain(connection, query, values):
+    db = Database(connection)
+    return db.sql("EXPLAIN " + query, values, as_dict=True)
+
+
+def rejected(plan, min_rows, ordered=False):
+    problems = []
+    for step in plan:
+        table = step.get("table") or ""
+        if table.startswith("<"):
+            # <derived2>, <subquery3>, <union1,2>: CTE output, not a base table
+            continue
+        rows = int(step.get("rows") or 0)
+        extra = step.get("Extra") or ""
+        if ordered and table in ("gl", "tabGL Entry") and "Using filesort" in extra:
+            problems.append(f"filesort on {table} (~{rows} rows), expected an index read in order")
+            continue
+        if rows < min_rows:
+            continue
+        if step.get("type") == "ALL":
+            problems.append(f"full scan of {table} (~{rows} rows)")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {table} (~{rows} rows)")
+    return problems
+
+
+def run_api(connection, report, form_dict, kind, capture):
+    """Run an API script the way its caller does; only the statements of the
+    call being checked are captured."""
+    script = path(f"{report}.py")
+    if kind == "next page":
+        # the second page, read from the cursor the first one returned
+        _, frappe = run_script(script, connection, form_dict=form_dict)
+        form_dict = dict(form_dict, cursor=json.dumps(frappe.response["message"]["cursor"], default=str))
+    if kind == "job":
+        # the start call queues the job; the job reads the ledger
+        cache = Cache()
+        _, frappe = run_script(script, connection, form_dict=form_dict, cache=cache)
+        for _, kwargs in frappe.enqueued:
+            run_script(script, connection, form_dict=kwargs, cache=cache, on_query=capture)
+        return
+    run_script(script, connection, form_dict=form_dict, on_query=capture)
+
+
+def check(connection, info, min_rows, verbose=False):
+    failures = 0
+    for report, label, kind, filters in cases(info):
+        queries = []
+
+        def capture(query, values):
+            if query.lstrip().upper().startswith(("SELECT", "WITH")):
+                queries.append((query, values))
+
+        if kind == "query":
+            run_query_report(path(f"{report}.sql"), connection, filters, on_query=capture)
+        elif kind == "script":
+            run_script(path(f"{report}.py"), connection, filters=filters, on_query=capture)
+        else:
+            run_api(connection, report, filters, kind, capture)
+
+        for number, (query, values) in enumerate(queries, 1):
+            plan = explain(connection, query, values)
+            problems = rejected(plan, min_rows, ordered=report in ORDERED_READS)
+            status = "FAIL" if problems else "ok"
+            print(f"{status:4} {report} [{label}] query {number}")
+            for problem in problems:
+                print(f"       {problem}")
+            if verbose or problems:
+                for step in plan:
+                    print("       {id} {select_type} {table} type={type} key={key} rows={rows} {Extra}".format(
+                        **{k: step.get(k) for k in ("id", "select_type", "table", "type", "key", "rows", "Extra")}
+                    ))
+            failures += bool(problems)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    seed_ledger.add_connection_arguments(parser)
+    seed_ledger.add_seed_arguments(parser)
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="ignore plan steps estimated below this many rows")
+    parser.add_argument("--no-indexes", action="store_true",
+                        help="skip Cash & Bank Indexes.py to see the stock ERPNext plans")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    connection = seed_ledger.connect_and_create(args)
+    info = seed_ledger.seed(connection, seed=args.seed, gl_rows=args.gl_rows, days=args.days,
+                            closing=args.closing, snapshot=args.snapshot)
+    if not args.no_indexes:
+        _, frappe = run_script(path("Cash & Bank Indexes.py"), connection)
+        print("indexes:", ", ".join(frappe.response["message"]))
+        with connection.cursor() as cursor:
+            for table in seed_ledger.TABLES:
+                cursor.execute(f"ANALYZE TABLE `{table}`")
+                cursor.fetchall()
+
+    failures = check(connection, info, args.min_rows, args.verbose)
+    print(f"{failures} plan(s) rejected")
+    sys.exit(1 if failures else 0)
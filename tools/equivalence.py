@@ -0,0 +1,569 @@
+"""Run the report engines next to the original SQL on randomized ledgers and
+report every figure that differs.
+
+The reference is the statement the reports started from: V2's single-day
+ledger query (ROW_NUMBER() per voucher, HR-EXP payment on rn = 1 only) with
+its two whole-history balance aggregates, and the original Cash Flow
+Statement query (the ``expense_amount IS NOT NULL`` filter, HR-EXP-only
+expense total). The one change to either is a tie-break in ROW_NUMBER(),
+whose order the original left to the server whenever a voucher had several GL
+rows for the same expense row: ``gl.name`` for the ledger, and the statement's
+own row order, ``parent_account`` then ``gl.name``, for Cash Flow Statement.
+
+Each iteration seeds a ledger with ``seed_ledger.py`` under a random seed,
+random size, HR-EXP share, cancellations, closings and snapshot, then damages
+it the way real data is damaged: expense rows with no amount or no
+description, claims with no expense rows, claim payments split over several
+GL rows. On that ledger it compares, for random accounts and days:
+
+  V3 single day             rows, opening/closing, summary cards, balance column
+  V3 cached                 the same figures read back from the result cache
+  V3 range                  each day's rows and Day Total against the day's reference
+  V3 streaming              the same over 31+ days, and a short range in small windows
+  Export                    the exported rows, Day Totals and balances against V3
+  Ledger pages              pages joined up, totals and summary against V3 over the range
+  V3 consolidated           each account's rows and Account Total
+  V3 precompute             single-account opens served by the nightly job's entries
+  Cash & Bank List          every account's balance, receipts and payments on the day
+  Cash Flow Statement       with a parent and without one, fresh and cached
+
+    python tools/equivalence.py --database cash_bank_equivalence --iterations 20
+
+Exits 1 on any difference. Requires ``pip install pymysql`` and MariaDB 10.6+.
+"""
+
+import argparse
+import csv
+import datetime
+import io
+import json
+import random
+import sys
+
+import seed_ledger
+from check_plans import path
+from report_runner import FILES, Cache, Database, report_output, run_query_report, run_script
+
+FIELDS = ("posting_date", "voucher_no", "against_account", "description", "expense", "payments", "receipts")
+CFS_FIELDS = FIELDS + ("parent_account", "account")
+
+REFERENCE_LEDGER = """
+    WITH gl_data AS (
+        SELECT
+            gl.name AS gl_name,
+            gl.posting_date,
+            gl.voucher_no,
+            gl.account,
+            gl.against,
+            gl.remarks,
+            gl.debit,
+            gl.credit,
+            ecd.default_account,
+            ecd.amount AS expense_amount,
+            COALESCE(ecd.description_text, REGEXP_REPLACE(ecd.description, '<[^>]*>', '')) AS ecd_description,
+            ecd.name AS ecd_name
+        FROM `tabGL Entry` gl
+        LEFT JOIN `tabExpense Claim Detail` ecd ON gl.voucher_no = ecd.parent
+        WHERE
+            gl.is_cancelled = 0
+            AND gl.account = %(account)s
+            AND gl.posting_date = %(day)s
+    ),
+
+    numbered AS (
+        SELECT *,
+            CONCAT_WS(' / ', against, default_account) AS against_account,
+            CONCAT_WS(' | ', remarks, ecd_description) AS description,
+            ROW_NUMBER() OVER (
+                PARTITION BY voucher_no
+                ORDER BY ecd_name, gl_name
+            ) AS rn
+        FROM gl_data
+    )
+
+    SELECT
+        posting_date,
+        voucher_no,
+        against_account,
+        description,
+        ROUND(COALESCE(expense_amount, 0), 0) AS expense,
+        CASE
+            WHEN voucher_no LIKE 'HR-EXP%%' AND rn = 1 THEN ROUND(credit, 0)
+            WHEN voucher_no LIKE 'HR-EXP%%' THEN 0
+            ELSE ROUND(credit, 0)
+        END AS payments,
+        ROUND(debit, 0) AS receipts
+    FROM numbered
+    ORDER BY posting_date, voucher_no, rn
+"""
+
+REFERENCE_BALANCE = """
+    SELECT
+        COALESCE(SUM(CASE WHEN gl.posting_date < %(day)s THEN gl.debit - gl.credit END), 0) AS opening,
+        COALESCE(SUM(gl.debit - gl.credit), 0) AS closing
+    FROM `tabGL Entry` gl
+    LEFT JOIN `tabAccount` acc ON acc.name = gl.account
+    WHERE gl.is_cancelled = 0
+      AND gl.posting_date <= %(day)s
+      AND (gl.account = %(account)s OR %(account)s IS NULL)
+      AND (acc.parent_account = %(parent)s OR %(parent)s IS NULL)
+"""
+
+REFERENCE_CFS = """
+    WITH gl_data AS (
+        SELECT
+            gl.name AS gl_name,
+            gl.posting_date,
+            gl.voucher_no,
+            gl.account,
+            gl.against,
+            gl.remarks,
+            gl.debit,
+            gl.credit,
+            ecd.default_account,
+            ecd.amount AS expense_amount,
+            COALESCE(ecd.description_text, REGEXP_REPLACE(ecd.description, '<[^>]*>', '')) AS ecd_description,
+            ecd.name AS ecd_name,
+            acc.parent_account
+        FROM `tabGL Entry` gl
+        LEFT JOIN `tabExpense Claim Detail` ecd ON gl.voucher_no = ecd.parent
+        LEFT JOIN `tabAccount` acc ON acc.name = gl.account
+        WHERE
+            gl.is_cancelled = 0
+            AND gl.posting_date = %(day)s
+            AND (acc.parent_account = %(parent)s OR %(parent)s IS NULL)
+    ),
+
+    numbered AS (
+        SELECT *,
+            CONCAT_WS(' / ', against, default_account) AS against_account,
+            CONCAT_WS(' | ', remarks, ecd_description) AS description,
+            ROW_NUMBER() OVER (
+                PARTITION BY voucher_no
+                ORDER BY ecd_name, parent_account, gl_name
+            ) AS rn
+        FROM gl_data
+    )
+
+    SELECT
+        posting_date,
+        voucher_no,
+        against_account,
+        parent_account,
+        account,
+        description,
+        ROUND(COALESCE(expense_amount, 0), 0) AS expense,
+        CASE
+            WHEN voucher_no LIKE 'HR-EXP%%' AND rn = 1 THEN ROUND(credit, 0)
+            WHEN voucher_no LIKE 'HR-EXP%%' THEN 0
+            ELSE ROUND(credit, 0)
+        END AS payments,
+        ROUND(debit, 0) AS receipts
+    FROM numbered
+    WHERE
+        (voucher_no NOT LIKE 'HR-EXP%%' OR expense_amount IS NOT NULL)
+    ORDER BY posting_date, parent_account, voucher_no, rn
+"""
+
+
+def format_with_comma(val):
+    # the reports' own formatter
+    val = int(val)
+    s = str(val)
+    if len(s) <= 3:
+        return s
+    parts = []
+    while len(s) > 3:
+        parts.insert(0, s[-3:])
+        s = s[:-3]
+    parts.insert(0, s)
+    return ",".join(parts)
+
+
+def cards(figures):
+    opening, closing = figures["opening"], figures["closing"]
+    receipts, payments, expense = figures["total_receipts"], figures["total_payments"], figures["total_expense"]
+    return [
+        {"label": "Opening Balance", "value": format_with_comma(opening), "indicator": "Orange"},
+        {"label": "Today Receipts", "value": format_with_comma(receipts), "indicator": "Green"},
+        {"label": "Total Balance", "value": format_with_comma(opening + receipts), "indicator": "Blue"},
+        {"label": "Net Cash Flow", "value": format_with_comma(receipts - payments), "indicator": "Blue"},
+        {"label": "Total Payments", "value": format_with_comma(payments), "indicator": "Red"},
+        {"label": "Total Expense", "value": format_with_comma(expense), "indicator": "Red"},
+        {"label": "Other Payments", "value": format_with_comma(payments - expense), "indicator": "Red"},
+        {"label": "Closing Balance", "value": format_with_comma(closing), "indicator": "Green"},
+    ]
+
+
+def reference_ledger(db, account, day):
+    rows = db.sql(REFERENCE_LEDGER, {"account": account, "day": day}, as_dict=True)
+    balance = db.sql(REFERENCE_BALANCE, {"account": account, "parent": None, "day": day}, as_dict=True)[0]
+    return {
+        "rows": [tuple(row[f] for f in FIELDS) for row in rows],
+        "opening": balance.opening,
+        "closing": balance.closing,
+        "total_expense": sum(row.expense for row in rows),
+        "total_payments": sum(row.payments for row in rows),
+        "total_receipts": sum(row.receipts for row in rows),
+    }
+
+
+def reference_cfs(db, parent, day):
+    rows = db.sql(REFERENCE_CFS, {"parent": parent, "day": day}, as_dict=True)
+    balance = db.sql(REFERENCE_BALANCE, {"account": None, "parent": parent, "day": day}, as_dict=True)[0]
+    return {
+        "rows": [tuple(row[f] for f in CFS_FIELDS) for row in rows],
+        "opening": balance.opening,
+        "closing": balance.closing,
+        "total_expense": sum(row.expense for row in rows if row.voucher_no.startswith("HR-EXP")),
+        "total_payments": sum(row.payments for row in rows),
+        "total_receipts": sum(row.receipts for row in rows),
+    }
+
+
+def damage(connection, rng, share=0.1):
+    """Give the ledger the rows the generator never writes on its own."""
+    db = Database(connection)
+    details = [row[0] for row in db.sql("SELECT name FROM `tabExpense Claim Detail` ORDER BY name")]
+    claims = sorted({name.rsplit("-", 1)[0] for name in details})
+    count = int(len(details) * share)
+    for name in rng.sample(details, count):
+        db.sql("UPDATE `tabExpense Claim Detail` SET amount = NULL WHERE name = %s", (name,))
+    for name in rng.sample(details, count):
+        db.sql("UPDATE `tabExpense Claim Detail` SET description = %s WHERE name = %s",
+               (rng.choice([None, "", "<p></p>"]), name))
+    for claim in rng.sample(claims, int(len(claims) * share)):
+        db.sql("DELETE FROM `tabExpense Claim Detail` WHERE parent = %s", (claim,))
+
+    # A claim paid in two instalments from the same account on the same day;
+    # the day's totals, and so closings and snapshot rows, stay the same
+    payments = db.sql("""
+        SELECT name, credit FROM `tabGL Entry`
+        WHERE voucher_type = 'Expense Claim' AND credit > 0 AND is_cancelled = 0
+        ORDER BY name
+    """, as_dict=True)
+    for row in rng.sample(payments, int(len(payments) * share)):
+        part = round(row.credit * rng.choice([1, 2, 3]) / 4, 2)
+        db.sql("""
+            INSERT INTO `tabGL Entry`
+                (name, posting_date, account, against, debit, credit, voucher_type, voucher_no,
+                 remarks, company, is_cancelled, modified)
+            SELECT CONCAT(name, '-2'), posting_date, account, against, 0, %s, voucher_type, voucher_no,
+                   remarks, company, is_cancelled, modified
+            FROM `tabGL Entry` WHERE name = %s
+        """, (part, row.name))
+        db.sql("UPDATE `tabGL Entry` SET credit = credit - %s WHERE name = %s", (part, row.name))
+    connection.commit()
+
+
+class Comparison:
+    def __init__(self, label):
+        self.label = label
+        self.differences = []
+
+    def same(self, what, expected, actual):
+        if expected == actual:
+            return
+        if isinstance(expected, list) and isinstance(actual, list):
+            for index, (left, right) in enumerate(zip(expected, actual)):
+                if left != right:
+                    self.differences.append(f"{what} row {index + 1}: expected {left}, got {right}")
+                    return
+            self.differences.append(f"{what}: expected {len(expected)} rows, got {len(actual)}")
+            return
+        self.differences.append(f"{what}: expected {expected!r}, got {actual!r}")
+
+    def figures(self, expected, local_vars):
+        for name in ("opening", "closing", "total_expense", "total_payments", "total_receipts"):
+            self.same(name, expected[name], local_vars[name])
+        self.same("summary", cards(expected), report_output(local_vars)[4])
+
+
+def run(connection, report, filters, cache=None):
+    local_vars, _ = run_script(path(f"{report}.py"), connection, filters=filters, cache=cache)
+    return local_vars
+
+
+def ledger_rows(result, fields=FIELDS):
+    """Ledger rows of a report result without the bold frame rows."""
+    return [tuple(row.get(f) for f in fields) for row in result if not row.get("bold")]
+
+
+def compare_v3_day(connection, account, day):
+    db = Database(connection)
+    expected = reference_ledger(db, account, day)
+    filters = {"from_date": day, "to_date": day, "account": account}
+    checks = []
+
+    cache = Cache()
+    for label in ("V3 single day", "V3 cached"):
+        check = Comparison(f"{label} {account} {day}")
+        local_vars = run(connection, "Cash & Bank Report V3", filters, cache)
+        check.same("rows", expected["rows"], ledger_rows(local_vars["result"]))
+        check.figures(expected, local_vars)
+        if local_vars["result"]:
+            check.same("last balance", local_vars["closing"], local_vars["result"][-1]["balance"])
+        checks.append(check)
+    return checks
+
+
+def compare_v3_range(connection, account, start, end, **options):
+    """Pass ``stream=1, chunk_days=n`` to compare the windowed read."""
+    db = Database(connection)
+    label = "V3 streaming" if options or (end - start).days >= 31 else "V3 range"
+    check = Comparison(f"{label} {account} {start} .. {end} {options or ''}".rstrip())
+    local_vars = run(connection, "Cash & Bank Report V3",
+                     dict(options, from_date=start, to_date=end, account=account))
+    days, totals = [], {}
+    for row in local_vars["result"]:
+        if row.get("description") == "Day Total":
+            totals[row["posting_date"]] = row
+
+    expected_rows = []
+    day = start
+    while day <= end:
+        expected = reference_ledger(db, account, day)
+        if expected["rows"]:
+            days.append(expected)
+            expected_rows.extend(expected["rows"])
+            total = totals.get(day) or {}
+            for name in ("expense", "payments", "receipts"):
+                check.same(f"{day} Day Total {name}", expected["total_" + name], total.get(name))
+            check.same(f"{day} Day Total balance", expected["closing"], total.get("balance"))
+        day += datetime.timedelta(days=1)
+
+    check.same("rows", expected_rows, ledger_rows(local_vars["result"]))
+    first = reference_ledger(db, account, start)
+    last = reference_ledger(db, account, end)
+    check.figures({
+        "opening": first["opening"],
+        "closing": last["closing"],
+        "total_expense": sum(d["total_expense"] for d in days),
+        "total_payments": sum(d["total_payments"] for d in days),
+        "total_receipts": sum(d["total_receipts"] for d in days),
+    }, local_vars)
+    return [check]
+
+
+def compare_ledger_pages(connection, account, start, end, page_length):
+    """Pages of Cash & Bank Ledger Page.py, joined up, against V3 over the range."""
+    check = Comparison(f"Ledger pages of {page_length} {account} {start} .. {end}")
+    local_vars = run(connection, "Cash & Bank Report V3", {"from_date": start, "to_date": end, "account": account})
+    form_dict = {"account": account, "from_date": start, "to_date": end, "page_length": page_length}
+    _, frappe = run_script(path("Cash & Bank Ledger Page.py"), connection, form_dict=form_dict)
+    first = frappe.response["message"]
+    for name in ("opening", "closing", "total_expense", "total_payments", "total_receipts"):
+        check.same(name, local_vars[name], first["totals"][name])
+    check.same("summary", report_output(local_vars)[4], first["summary"])
+
+    rows, page = list(first["rows"]), first
+    while page["cursor"]:
+        form_dict["cursor"] = json.dumps(page["cursor"], default=str)
+        _, frappe = run_script(path("Cash & Bank Ledger Page.py"), connection, form_dict=form_dict)
+        page = frappe.response["message"]
+        rows.extend(page["rows"])
+    # the page balance is a float, as it comes back from the browser
+    def with_balance(ledger):
+        return [row[:-1] + (round(float(row[-1]), 6),) for row in ledger]
+
+    check.same("rows", with_balance(ledger_rows(local_vars["result"], FIELDS + ("balance",))),
+               with_balance(ledger_rows(rows, FIELDS + ("balance",))))
+    return [check]
+
+
+def export_rows(connection, accounts, start, end, chunk_days):
+    # Start the export, run the job it queues, then join the stored parts the
+    # way the Client Script does
+    cache = Cache()
+    _, frappe = run_script(path("Cash & Bank Export.py"), connection, form_dict={
+        "accounts": json.dumps(accounts),
+        "from_date": start.isoformat(),
+        "to_date": end.isoformat(),
+        "chunk_days": chunk_days,
+    }, cache=cache)
+    for _, kwargs in frappe.enqueued:
+        run_script(path("Cash & Bank Export.py"), connection, form_dict=kwargs, cache=cache)
+    state = cache.get_value(frappe.response["message"]["job"])
+    if state["status"] != "Completed":
+        raise RuntimeError(f"export {state['status']}: {state.get('error')}")
+    content = "".join(FILES[part["name"]].content for part in state["parts"])
+    return list(csv.reader(io.StringIO(content)))[1:]
+
+
+def compare_export(connection, accounts, start, end, chunk_days):
+    """The exported file, row by row, against V3 over the same range."""
+    check = Comparison(f"Export {len(accounts)} account(s) {start} .. {end} in {chunk_days}-day windows")
+    def numbers(rows):
+        # Expense, Payments, Receipts and Balance compared as amounts
+        return [row[:5] + [round(float(value), 6) if value != "" else "" for value in row[5:]] for row in rows]
+
+    def text(value):
+        return "" if value is None else str(value)
+
+    exported = numbers(export_rows(connection, accounts, start, end, chunk_days))
+
+    expected = []
+    for account in sorted(accounts):
+        local_vars = run(connection, "Cash & Bank Report V3", {"from_date": start, "to_date": end, "account": account})
+        expected.append([account, str(start), "", "", "Opening Balance", "", "", "", text(local_vars["opening"])])
+        for row in local_vars["result"]:
+            if row.get("bold") and row.get("description") != "Day Total":
+                continue
+            expected.append([account] + [text(row.get(f)) for f in (
+                "posting_date", "voucher_no", "against_account", "description",
+                "expense", "payments", "receipts", "balance",
+            )])
+        expected.append([account, str(end), "", "", "Closing Balance", "", "", "", text(local_vars["closing"])])
+    check.same("rows", numbers(expected), exported)
+    return [check]
+
+
+def compare_v3_consolidated(connection, accounts, day):
+    db = Database(connection)
+    check = Comparison(f"V3 consolidated {day}")
+    local_vars = run(connection, "Cash & Bank Report V3",
+                     {"from_date": day, "to_date": day, "consolidated": 1, "accounts": accounts})
+    rows, account_totals = {}, {}
+    for row in local_vars["result"]:
+        if row.get("description") == "Account Total":
+            account_totals[row["account"]] = row
+        elif not row.get("bold"):
+            rows.setdefault(row["account"], []).append(tuple(row.get(f) for f in FIELDS))
+
+    overall = {"opening": 0, "closing": 0, "total_expense": 0, "total_payments": 0, "total_receipts": 0}
+    for account in accounts:
+        expected = reference_ledger(db, account, day)
+        check.same(f"{account} rows", expected["rows"], rows.get(account, []))
+        total = account_totals.get(account) or {}
+        for name in ("expense", "payments", "receipts"):
+            check.same(f"{account} Account Total {name}", expected["total_" + name], total.get(name))
+        check.same(f"{account} Account Total balance", expected["closing"], total.get("balance"))
+        for name in overall:
+            overall[name] += expected[name]
+    check.figures(overall, local_vars)
+    return [check]
+
+
+def compare_v3_precompute(connection, accounts, day):
+    db = Database(connection)
+    cache = Cache()
+    run(connection, "Cash & Bank Report V3",
+        {"from_date": day, "to_date": day, "consolidated": 1, "accounts": accounts, "precompute": 1}, cache)
+    checks = []
+    for account in accounts:
+        check = Comparison(f"V3 precompute {account} {day}")
+        hits = (cache.get_value("cash_bank_result_cache|stats") or {}).get("hits", 0)
+        local_vars = run(connection, "Cash & Bank Report V3", {"from_date": day, "to_date": day, "account": account}, cache)
+        check.same("served from the cache", hits + 1, cache.get_value("cash_bank_result_cache|stats")["hits"])
+        expected = reference_ledger(db, account, day)
+        check.same("rows", expected["rows"], ledger_rows(local_vars["result"]))
+        check.figures(expected, local_vars)
+        checks.append(check)
+    return checks
+
+
+def compare_balances(connection, accounts, day):
+    """Cash & Bank List.sql: each account's balance and the day's movements."""
+    db = Database(connection)
+    check = Comparison(f"Cash & Bank List {day}")
+    rows = {row.name: row for row in run_query_report(
+        path("Cash & Bank List.sql"), connection, {"account_type": "All", "as_on_date": day}
+    )}
+    for account in accounts:
+        balance = db.sql(REFERENCE_BALANCE, {"account": account, "parent": None, "day": day}, as_dict=True)[0]
+        movement = db.sql("""
+            SELECT COALESCE(SUM(debit), 0) AS receipts, COALESCE(SUM(credit), 0) AS payments
+            FROM `tabGL Entry`
+            WHERE is_cancelled = 0 AND account = %s AND posting_date = %s
+        """, (account, day), as_dict=True)[0]
+        row = rows.get(account) or {}
+        check.same(f"{account} current_balance", balance.closing, row.get("current_balance"))
+        check.same(f"{account} today_receipts", movement.receipts, row.get("today_receipts"))
+        check.same(f"{account} today_payments", movement.payments, row.get("today_payments"))
+    return [check]
+
+
+def compare_cfs(connection, parent, day):
+    expected = reference_cfs(Database(connection), parent, day)
+    filters = {"posting_date": day}
+    if parent:
+        filters["parent_account"] = parent
+    checks = []
+    cache = Cache()
+    for label in ("Cash Flow Statement", "Cash Flow Statement cached"):
+        check = Comparison(f"{label} {parent or 'no parent'} {day}")
+        local_vars = run(connection, "Cash Flow Statement", filters, cache)
+        check.same("rows", expected["rows"], ledger_rows(local_vars["result"], CFS_FIELDS))
+        check.figures(expected, local_vars)
+        checks.append(check)
+    return checks
+
+
+def iteration(connection, seed, gl_rows, indexes=True):
+    rng = random.Random(seed)
+    days = rng.randint(20, 500)
+    info = seed_ledger.seed(
+        connection,
+        seed=seed,
+        gl_rows=rng.randint(gl_rows // 2, gl_rows),
+        days=days,
+        cancelled_share=rng.choice([0, 0.03, 0.2]),
+        hr_exp_share=rng.choice([0.1, 0.2, 0.5, 0.9]),
+        closing=rng.random() < 0.5,
+        snapshot=rng.random() < 0.5,
+    )
+    damage(connection, rng)
+    if indexes:
+        run_script(path("Cash & Bank Indexes.py"), connection)
+
+    def some_day():
+        return info["start"] + datetime.timedelta(days=rng.randrange(days))
+
+    checks = []
+    for account in rng.sample(info["accounts"], 2):
+        for _ in range(3):
+            checks.extend(compare_v3_day(connection, account, some_day()))
+        start = some_day()
+        end = min(info["end"], start + datetime.timedelta(days=6))
+        checks.extend(compare_v3_range(connection, account, start, end))
+        checks.extend(compare_v3_range(connection, account, start, end, stream=1, chunk_days=rng.choice([1, 2, 3])))
+        checks.extend(compare_ledger_pages(connection, account, start, end, rng.choice([1, 7, 50])))
+        # streamed by default; 92 days and more would be queued
+        long_start = info["start"] + datetime.timedelta(days=rng.randrange(max(1, days - 31)))
+        long_end = min(info["end"], long_start + datetime.timedelta(days=rng.randint(31, 60)))
+        checks.extend(compare_v3_range(connection, account, long_start, long_end))
+    if long_start < long_end:
+        checks.extend(compare_export(connection, rng.sample(info["accounts"], 2), long_start, long_end,
+                                     rng.choice([1, 7, 31])))
+    day = some_day()
+    checks.extend(compare_v3_consolidated(connection, info["accounts"], day))
+    checks.extend(compare_v3_precompute(connection, info["accounts"], day))
+    checks.extend(compare_balances(connection, info["accounts"], day))
+    for _ in range(2):
+        checks.extend(compare_cfs(connection, info["parent_account"], some_day()))
+        checks.extend(compare_cfs(connection, None, some_day()))
+    return checks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    seed_ledger.add_connection_arguments(parser)
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first iteration")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--gl-rows", type=int, default=4000, help="largest ledger generated")
+    parser.add_argument("--no-indexes", action="store_true", help="skip Cash & Bank Indexes.py")
+    args = parser.parse_args()
+
+    connection = seed_ledger.connect_and_create(args)
+    failures = 0
+    for seed in range(args.seed, args.seed + args.iterations):
+        checks = iteration(connection, seed, args.gl_rows, not args.no_indexes)
+        failed = [check for check in checks if check.differences]
+        print(f"seed {seed}: {len(checks) - len(failed)}/{len(checks)} comparisons equal")
+        for check in failed:
+            print(f"  {check.label}")
+            for difference in check.differences[:5]:
+                print(f"    {difference}")
+        failures += len(failed)
+    print(f"{failures} comparison(s) differ")
+    sys.exit(1 if failures else 0)
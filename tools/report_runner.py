@@ -0,0 +1,462 @@
+"""Run the repo's report and server scripts outside a Frappe site.
+
+The scripts are written for Frappe's safe_exec sandbox: ``frappe`` and
+``json`` are globals, ``filters`` (Script Report) or ``doc`` (DocType Event)
+is a local and a report leaves its output in ``data``. ``run_script`` reproduces that calling
+convention on a plain PyMySQL connection with the few ``frappe`` helpers the
+scripts use, so the exact text pasted into ERPNext can be explained, timed and
+compared against a local MariaDB.
+
+Plain ``exec`` is far more permissive than safe_exec, so every script is first
+checked against the sandbox's rules (``check_sandbox``): with RestrictedPython
+when it is installed, and always for the attributes Frappe refuses on top of
+it, such as ``str.format``. To check every script without a database:
+
+    python tools/report_runner.py
+
+Requires ``pip install pymysql``.
+"""
+
+import ast
+import datetime
+import glob
+import json
+import os
+import re
+import sys
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The script behind each report name frappe.call runs
+REPORT_SCRIPTS = {
+    "Cash & Bank Report": "Cash & Bank Report V3.py",
+    "Cash Flow Statement": "Cash Flow Statement.py",
+}
+
+SECTION_BREAK = re.compile(r"^\s*(?:-{5,}|={5,}|/{5,})\s*$", re.MULTILINE)
+HTML_TAGS = re.compile(r"<[^>]*>")
+
+# frappe.utils.safe_exec.UNSAFE_ATTRIBUTES
+UNSAFE_ATTRIBUTES = {
+    "gi_frame", "gi_code", "gi_yieldfrom",
+    "cr_frame", "cr_code", "cr_origin", "cr_await",
+    "ag_code", "ag_frame",
+    "tb_frame", "tb_next",
+    "format", "format_map",
+    "f_back", "f_builtins", "f_code", "f_globals", "f_locals", "f_trace",
+}
+
+
+class ValidationError(Exception):
+    pass
+
+
+class _dict(dict):
+    """frappe._dict: a dict with attribute access."""
+
+    def __getattr__(self, key):
+        return self.get(key)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+def connect(host="127.0.0.1", port=3306, user="root", password="", database=None):
+    import pymysql
+
+    return pymysql.connect(
+        host=host,
+        port=port,
+        user=user,
+        password=password,
+        database=database,
+        charset="utf8mb4",
+        autocommit=False,
+    )
+
+
+def read_section(path, index=0):
+    """Return the ``index``-th block of a script file, split on the
+    ``-----`` / ``=====`` separator lines the repo uses between the server
+    script, the client script and the setup notes."""
+    with open(path, encoding="utf-8") as f:
+        return SECTION_BREAK.split(f.read())[index]
+
+
+def check_sandbox(source, path="<script>"):
+    """Raise ``SyntaxError`` for what safe_exec would refuse in ``source``:
+    RestrictedPython's own rules when it is installed, and in any case the
+    attributes Frappe adds to them, names starting with ``_`` and augmented
+    assignment to a subscript or attribute."""
+    try:
+        from RestrictedPython import compile_restricted_exec
+    except ImportError:
+        compile_restricted_exec = None
+    if compile_restricted_exec:
+        errors = compile_restricted_exec(source, filename=path).errors
+        if errors:
+            raise SyntaxError(f"{path}: " + "; ".join(errors))
+
+    problems = []
+    for node in ast.walk(ast.parse(source, path)):
+        if isinstance(node, ast.Attribute) and (node.attr in UNSAFE_ATTRIBUTES or node.attr.startswith("_")):
+            problems.append(f"line {node.lineno}: attribute .{node.attr} is not allowed")
+        elif isinstance(node, ast.Name) and node.id.startswith("_"):
+            problems.append(f"line {node.lineno}: name {node.id} is not allowed")
+        elif isinstance(node, ast.AugAssign) and not isinstance(node.target, ast.Name):
+            problems.append(f"line {node.lineno}: augmented assignment to a subscript or attribute")
+    if problems:
+        raise SyntaxError(f"{path}: " + "; ".join(problems))
+
+
+def table_name(doctype):
+    return f"tab{doctype}"
+
+
+def _conditions(filters):
+    if not filters:
+        return "", []
+    if isinstance(filters, str):
+        filters = {"name": filters}
+    clauses, values = [], []
+    for field, condition in filters.items():
+        operator, value = "=", condition
+        if isinstance(condition, (list, tuple)):
+            operator, value = condition[0].lower(), condition[1]
+        if operator in ("in", "not in"):
+            clauses.append(f"`{field}` {operator} %s")
+            values.append(tuple(value) or ("",))
+        elif operator == "between":
+            clauses.append(f"`{field}` BETWEEN %s AND %s")
+            values.extend(value)
+        else:
+            clauses.append(f"`{field}` {operator} %s")
+            values.append(value)
+    return " WHERE " + " AND ".join(clauses), values
+
+
+class Callbacks(list):
+    """``frappe.db.after_commit``: callables run once by the next commit."""
+
+    def add(self, func):
+        self.append(func)
+
+    def run(self):
+        while self:
+            self.pop(0)()
+
+
+class Database:
+    """The part of ``frappe.db`` the scripts call."""
+
+    def __init__(self, connection, on_query=None):
+        self.connection = connection
+        self.on_query = on_query
+        self.after_commit = Callbacks()
+
+    def sql(self, query, values=(), as_dict=False, **kwargs):
+        query = str(query)
+        if values is not None and not isinstance(values, (tuple, list, dict)):
+            values = (values,)
+        if self.on_query:
+            self.on_query(query, values)
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, values or None)
+            rows = cursor.fetchall()
+            if as_dict and cursor.description:
+                columns = [column[0] for column in cursor.description]
+                return [_dict(zip(columns, row)) for row in rows]
+            return rows
+
+    def exists(self, doctype, filters=None):
+        if doctype == "File":
+            return filters if filters in FILES else None
+        if doctype == "DocType":
+            return bool(self.sql("SHOW TABLES LIKE %s", (table_name(filters),)))
+        where, values = _conditions(filters)
+        rows = self.sql(f"SELECT name FROM `{table_name(doctype)}`{where} LIMIT 1", values)
+        return rows[0][0] if rows else None
+
+    def get_value(self, doctype, filters, fieldname="name", as_dict=False, for_update=False, **kwargs):
+        fields = fieldname if isinstance(fieldname, (list, tuple)) else [fieldname]
+        where, values = _conditions(filters)
+        rows = self.sql(
+            f"SELECT {', '.join(f'`{f}`' for f in fields)} FROM `{table_name(doctype)}`{where} LIMIT 1"
+            + (" FOR UPDATE" if for_update else ""),
+            values,
+            as_dict=True,
+        )
+        if not rows:
+            return None
+        if as_dict:
+            return rows[0]
+        return rows[0][fields[0]] if len(fields) == 1 else tuple(rows[0].values())
+
+    def set_value(self, doctype, name, fieldname, value=None, update_modified=True):
+        updates = fieldname if isinstance(fieldname, dict) else {fieldname: value}
+        where, values = _conditions(name)
+        assignments = ", ".join(f"`{field}` = %s" for field in updates)
+        self.sql(f"UPDATE `{table_name(doctype)}` SET {assignments}{where}", list(updates.values()) + values)
+
+    def get_all(self, doctype, filters=None, fields=None, order_by=None, limit=None, pluck=None, **kwargs):
+        fields = [pluck] if pluck else (fields or ["name"])
+        where, values = _conditions(filters)
+        query = f"SELECT {', '.join(fields)} FROM `{table_name(doctype)}`{where}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        rows = self.sql(query, values, as_dict=True)
+        return [row[pluck] for row in rows] if pluck else rows
+
+    def has_index(self, table, index_name):
+        return bool(self.sql(f"SHOW INDEX FROM `{table}` WHERE Key_name = %s", (index_name,)))
+
+    def add_index(self, doctype, fields, index_name=None):
+        index_name = index_name or "_".join(fields) + "_index"
+        table = table_name(doctype)
+        if not self.has_index(table, index_name):
+            self.sql(f"ALTER TABLE `{table}` ADD INDEX `{index_name}` ({', '.join(f'`{f}`' for f in fields)})")
+
+    def add_unique(self, doctype, fields, constraint_name=None):
+        constraint_name = constraint_name or "unique_" + "_".join(fields)
+        table = table_name(doctype)
+        if not self.has_index(table, constraint_name):
+            self.sql(
+                f"ALTER TABLE `{table}` ADD UNIQUE `{constraint_name}` ({', '.join(f'`{f}`' for f in fields)})"
+            )
+
+    def get_single_value(self, doctype, fieldname):
+        # Single DocTypes (Global Defaults) are not in the local schema
+        return None
+
+    def commit(self):
+        self.connection.commit()
+        self.after_commit.run()
+
+    def rollback(self):
+        self.connection.rollback()
+        self.after_commit.clear()
+
+
+class Cache:
+    """``frappe.cache`` (Redis on a site) kept in a dict for one run."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get_value(self, key, *args, **kwargs):
+        return self.values.get(key)
+
+    def set_value(self, key, value, *args, **kwargs):
+        self.values[key] = value
+
+    def delete_value(self, keys, *args, **kwargs):
+        for key in keys if isinstance(keys, (list, tuple)) else [keys]:
+            self.values.pop(key, None)
+
+
+# Files the scripts store (exports, background results), by name. The local
+# schema has no tabFile, so they are kept in memory for the process.
+FILES = {}
+
+
+class Document(_dict):
+    """Enough of a Document for ``frappe.get_doc({...}).insert()``."""
+
+    def __init__(self, db, values):
+        super().__init__(values)
+        self._db = db
+
+    def __setattr__(self, key, value):
+        if key == "_db":
+            object.__setattr__(self, key, value)
+        else:
+            self[key] = value
+
+    def is_permitted(self):
+        # run_script runs as Administrator
+        return True
+
+    def get_content(self):
+        return self.content
+
+    def insert(self, ignore_permissions=False):
+        if self.doctype == "File":
+            self["name"] = uuid.uuid4().hex[:10]
+            self["file_url"] = f"/private/files/{self.file_name}"
+            FILES[self.name] = self
+            return self
+        values = {key: value for key, value in self.items() if key != "doctype"}
+        values.setdefault("name", uuid.uuid4().hex[:10])
+        columns = ", ".join(f"`{column}`" for column in values)
+        placeholders = ", ".join(["%s"] * len(values))
+        self._db.sql(
+            f"INSERT INTO `{table_name(self.doctype)}` ({columns}) VALUES ({placeholders})",
+            list(values.values()),
+        )
+        self["name"] = values["name"]
+        return self
+
+
+def _getdate(value=None):
+    if value is None:
+        return datetime.date.today()
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def _cint(value):
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _flt(value, precision=None):
+    try:
+        value = float(value or 0)
+    except (TypeError, ValueError):
+        value = 0.0
+    return round(value, precision) if precision is not None else value
+
+
+class Utils:
+    getdate = staticmethod(_getdate)
+    cint = staticmethod(_cint)
+    flt = staticmethod(_flt)
+
+    @staticmethod
+    def strip_html(text):
+        return HTML_TAGS.sub("", text)
+
+    @staticmethod
+    def add_days(date, days):
+        return _getdate(date) + datetime.timedelta(days=days)
+
+    @staticmethod
+    def now_datetime():
+        return datetime.datetime.now()
+
+    @staticmethod
+    def nowdate():
+        return datetime.date.today().isoformat()
+
+    today = nowdate
+
+
+class Frappe:
+    """The ``frappe`` global the scripts see inside safe_exec."""
+
+    def __init__(self, connection, on_query=None, user="Administrator", form_dict=None, cache=None):
+        self.db = Database(connection, on_query)
+        self.cache = cache or Cache()
+        self.utils = Utils
+        self.session = _dict(user=user)
+        self.form_dict = _dict(form_dict or {})
+        self.response = _dict()
+        self.flags = _dict()
+        self.errors = []
+        self.enqueued = []
+
+    def throw(self, message, *args, **kwargs):
+        raise ValidationError(message)
+
+    def msgprint(self, message, *args, **kwargs):
+        pass
+
+    def log_error(self, title=None, message=None, *args, **kwargs):
+        self.errors.append((title, message))
+
+    def enqueue(self, method, **kwargs):
+        self.enqueued.append((method, kwargs))
+
+    def generate_hash(self, txt=None, length=None):
+        return uuid.uuid4().hex[:length]
+
+    def call(self, method, **kwargs):
+        """A report run, the one method the scripts call: the report script runs
+        here against the same connection and cache, and what it leaves in
+        ``frappe.response`` is seen by the caller, as on a site."""
+        if method != "frappe.desk.query_report.run":
+            raise NotImplementedError(method)
+        local_vars, report = run_script(
+            os.path.join(ROOT, REPORT_SCRIPTS[kwargs["report_name"]]),
+            self.db.connection,
+            filters=kwargs.get("filters"),
+            on_query=self.db.on_query,
+            cache=self.cache,
+        )
+        self.response.update(report.response)
+        columns, result, message, chart, summary = report_output(local_vars)
+        return _dict(columns=columns, result=result, message=message, chart=chart, report_summary=summary)
+
+    def render_template(self, template, context):
+        import jinja2  # a Frappe dependency, needed only by Cash & Bank Print.py
+
+        return jinja2.Environment().from_string(template).render(context)
+
+    def get_all(self, doctype, filters=None, fields=None, order_by=None, limit=None, **kwargs):
+        return self.db.get_all(doctype, filters, fields, order_by, limit, **kwargs)
+
+    get_list = get_all
+
+    def get_doc(self, values, name=None):
+        if values == "Report":
+            # Reports live on the site, not in the local schema
+            return Document(self.db, {"doctype": "Report", "name": name})
+        if values == "File":
+            return FILES[name]
+        if isinstance(values, str):
+            doctype = values
+            values = self.db.get_all(doctype, {"name": name}, ["*"])[0]
+            values["doctype"] = doctype
+        return Document(self.db, values)
+
+    def delete_doc(self, doctype, name, **kwargs):
+        if doctype == "File":
+            FILES.pop(name, None)
+            return
+        self.db.sql(f"DELETE FROM `{table_name(doctype)}` WHERE name = %s", (name,))
+
+
+def run_script(path, connection, filters=None, section=0, on_query=None, form_dict=None, doc=None, cache=None):
+    """Execute one section of a script file the way safe_exec does: ``frappe``
+    in the globals and the script's own names in a separate locals dict.
+    Pass the same ``cache`` to several runs to share ``frappe.cache``.
+    Returns ``(locals, frappe)``."""
+    frappe = Frappe(connection, on_query=on_query, form_dict=form_dict, cache=cache)
+    local_vars = {"filters": _dict(filters or {}), "data": None}
+    if doc is not None:
+        local_vars["doc"] = _dict(doc)
+    source = read_section(path, section)
+    check_sandbox(source, path)
+    exec(compile(source, path, "exec"), {"frappe": frappe, "json": json}, local_vars)
+    return local_vars, frappe
+
+
+def run_query_report(path, connection, filters, on_query=None):
+    """Run a Query Report (.sql) with its %(name)s filters; returns dict rows."""
+    return Database(connection, on_query).sql(read_section(path), filters, as_dict=True)
+
+
+def report_output(local_vars):
+    """``(columns, result, message, chart, summary)`` of a Script Report run."""
+    data = local_vars["data"]
+    columns, result, message, chart, summary = (list(data) + [None] * 5)[:5]
+    return columns, result, message, chart, summary
+
+
+if __name__ == "__main__":
+    failed = False
+    for script in sorted(glob.glob(os.path.join(ROOT, "*.py"))):
+        try:
+            check_sandbox(read_section(script), script)
+        except SyntaxError as e:
+            failed = True
+            print(e)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,395 @@
+"""Create and fill a throwaway MariaDB schema shaped like the ERPNext tables
+the cash and bank reports read.
+
+Only the columns the scripts touch are created, with the indexes a stock
+ERPNext install has (single-column ``account``, ``posting_date`` and
+``voucher_no`` on tabGL Entry; ``parent`` on tabExpense Claim Detail), so
+plans measured here are the plans a site gets before and after
+"Cash & Bank Indexes.py". The ledger is generated from a seeded
+``random.Random``: the same ``--seed`` always produces the same rows. Rows are
+generated and inserted in batches, so ``--gl-rows`` can go to tens of
+millions.
+
+    python tools/seed_ledger.py --database cash_bank_test --gl-rows 200000
+    python tools/seed_ledger.py --database cash_bank_big --gl-rows 20000000 --hr-exp-share 0.15 --snapshot
+
+Requires ``pip install pymysql``.
+"""
+
+import argparse
+import datetime
+import random
+
+from report_runner import connect
+
+COMPANY = "Cash Company Limited"
+ABBR = "CCL"
+
+SCHEMA = [
+    """
+    CREATE TABLE `tabAccount` (
+        name VARCHAR(140) NOT NULL PRIMARY KEY,
+        account_name VARCHAR(140),
+        account_type VARCHAR(140),
+        root_type VARCHAR(140),
+        company VARCHAR(140),
+        parent_account VARCHAR(140),
+        is_group INT NOT NULL DEFAULT 0,
+        lft INT NOT NULL DEFAULT 0,
+        rgt INT NOT NULL DEFAULT 0,
+        modified DATETIME(6),
+        KEY parent_account (parent_account),
+        KEY lft (lft),
+        KEY rgt (rgt)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE `tabGL Entry` (
+        name VARCHAR(140) NOT NULL PRIMARY KEY,
+        posting_date DATE,
+        account VARCHAR(140),
+        against TEXT,
+        debit DECIMAL(21,9) NOT NULL DEFAULT 0,
+        credit DECIMAL(21,9) NOT NULL DEFAULT 0,
+        voucher_type VARCHAR(140),
+        voucher_no VARCHAR(140),
+        remarks TEXT,
+        company VARCHAR(140),
+        is_cancelled INT NOT NULL DEFAULT 0,
+        modified DATETIME(6),
+        KEY posting_date (posting_date),
+        KEY account (account),
+        KEY voucher_no (voucher_no),
+        KEY company (company)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE `tabExpense Claim Detail` (
+        name VARCHAR(140) NOT NULL PRIMARY KEY,
+        parent VARCHAR(140),
+        parenttype VARCHAR(140),
+        idx INT NOT NULL DEFAULT 0,
+        default_account VARCHAR(140),
+        description LONGTEXT,
+        description_text LONGTEXT,
+        amount DECIMAL(21,9),
+        KEY parent (parent)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE `tabAccount Closing Balance` (
+        name VARCHAR(140) NOT NULL PRIMARY KEY,
+        closing_date DATE,
+        account VARCHAR(140),
+        debit DECIMAL(21,9) NOT NULL DEFAULT 0,
+        credit DECIMAL(21,9) NOT NULL DEFAULT 0,
+        company VARCHAR(140),
+        KEY closing_date (closing_date),
+        KEY account (account)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE `tabCash Bank Daily Balance` (
+        name VARCHAR(140) NOT NULL PRIMARY KEY,
+        account VARCHAR(140),
+        posting_date DATE,
+        debit_total DECIMAL(21,9) NOT NULL DEFAULT 0,
+        credit_total DECIMAL(21,9) NOT NULL DEFAULT 0,
+        cumulative_balance DECIMAL(21,9) NOT NULL DEFAULT 0
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE `tabHas Role` (
+        name VARCHAR(140) NOT NULL PRIMARY KEY,
+        parent VARCHAR(140),
+        parenttype VARCHAR(140),
+        role VARCHAR(140)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+TABLES = [
+    "tabAccount",
+    "tabGL Entry",
+    "tabExpense Claim Detail",
+    "tabAccount Closing Balance",
+    "tabCash Bank Daily Balance",
+    "tabHas Role",
+]
+
+DESCRIPTIONS = [
+    "Fuel for delivery van",
+    "Office tea and snacks",
+    "Courier charges",
+    "Printer toner",
+    "Site visit <b>transport</b>",
+    "Mobile recharge",
+    "Stationery & files",
+    "Repair of <i>generator</i>",
+]
+
+
+def account_tree(rng, cash_accounts, bank_accounts):
+    """Return Account rows as a nested set, depth first."""
+    tree = (
+        f"Application of Funds (Assets) - {ABBR}", "Asset", None, [
+            (f"Current Assets - {ABBR}", "Asset", None, [
+                (f"Cash In Hand - {ABBR}", "Asset", "Cash", [
+                    (f"Cash with {name} - {ABBR}", "Asset", "Cash", None)
+                    for name in rng.sample(
+                        ["Anam", "Babul", "Chaity", "Dipu", "Emon", "Farid", "Gazi", "Hasan", "Irin", "Jamal"],
+                        cash_accounts,
+                    )
+                ]),
+                (f"Bank Accounts - {ABBR}", "Asset", "Bank", [
+                    (f"Bank {number:02d} - {ABBR}", "Asset", "Bank", None)
+                    for number in range(1, bank_accounts + 1)
+                ]),
+                (f"Debtors - {ABBR}", "Asset", "Receivable", None),
+            ]),
+        ],
+    )
+    others = [
+        (f"Expenses - {ABBR}", "Expense", None, [
+            (f"{name} - {ABBR}", "Expense", "Expense Account", None)
+            for name in ("Travel Expenses", "Office Expenses", "Repairs", "Telephone Expenses")
+        ]),
+        (f"Income - {ABBR}", "Income", None, [(f"Sales - {ABBR}", "Income", "Income Account", None)]),
+        (f"Creditors - {ABBR}", "Liability", "Payable", None),
+    ]
+
+    rows = []
+    counter = [0]
+
+    def walk(node, parent):
+        name, root_type, account_type, children = node
+        counter[0] += 1
+        row = {
+            "name": name,
+            "account_name": name.rsplit(" - ", 1)[0],
+            "account_type": account_type if not children or account_type in ("Cash", "Bank") else None,
+            "root_type": root_type,
+            "company": COMPANY,
+            "parent_account": parent,
+            "is_group": 1 if children is not None else 0,
+            "lft": counter[0],
+        }
+        rows.append(row)
+        for child in children or []:
+            walk(child, name)
+        counter[0] += 1
+        row["rgt"] = counter[0]
+
+    walk(tree, None)
+    for node in others:
+        walk(node, None)
+    return rows
+
+
+def generate(rng, accounts, gl_rows, days, start, cancelled_share, hr_exp_share=0.2, chunk=50000):
+    """Yield ``(gl, details)`` row batches of about ``chunk`` GL rows until
+    ``gl_rows`` are generated, so tens of millions of rows never sit in memory
+    at once. ``hr_exp_share`` is the share of vouchers that are Expense Claims;
+    the rest are split 5:3 between Journal and Payment Entries."""
+    cash_bank = [a["name"] for a in accounts if a["account_type"] in ("Cash", "Bank") and not a["is_group"]]
+    expense = [a["name"] for a in accounts if a["account_type"] == "Expense Account"]
+    sales = f"Sales - {ABBR}"
+    debtors = f"Debtors - {ABBR}"
+    creditors = f"Creditors - {ABBR}"
+    weights = [(1 - hr_exp_share) * 5 / 8, (1 - hr_exp_share) * 3 / 8, hr_exp_share]
+
+    gl, details = [], []
+    serial = {"JV": 0, "PAY": 0, "HR-EXP": 0}
+    count = 0
+
+    def entry(posting_date, account, against, debit, credit, voucher_type, voucher_no, remarks, cancelled=0):
+        nonlocal count
+        count += 1
+        gl.append((
+            f"ACC-GLE-{count:09d}", posting_date, account, against, debit, credit,
+            voucher_type, voucher_no, remarks, COMPANY, cancelled,
+            datetime.datetime.combine(posting_date, datetime.time(9)) + datetime.timedelta(seconds=count - 1),
+        ))
+
+    while count < gl_rows:
+        posting_date = start + datetime.timedelta(days=rng.randrange(days))
+        kind = rng.choices(["JV", "PAY", "HR-EXP"], weights=weights)[0]
+        serial[kind] += 1
+        account = rng.choice(cash_bank)
+        amount = round(rng.uniform(50, 50000), rng.choice([0, 2]))
+        cancelled = rng.random() < cancelled_share
+
+        if kind == "HR-EXP":
+            voucher_type, voucher_no = "Expense Claim", f"HR-EXP-{posting_date.year}-{serial[kind]:06d}"
+            parts = [round(rng.uniform(50, 5000), 2) for _ in range(rng.randint(1, 4))]
+            amount = round(sum(parts), 2)
+            for idx, part in enumerate(parts, 1):
+                text = rng.choice(DESCRIPTIONS)
+                details.append((
+                    f"{voucher_no}-{idx}", voucher_no, "Expense Claim", idx,
+                    rng.choice(expense), f"<div class=\"ql-editor read-mode\"><p>{text}</p></div>", None, part,
+                ))
+            lines = [
+                (account, creditors, 0, amount),
+                (creditors, account, amount, 0),
+            ]
+            remarks = "Expense claim payment"
+        elif kind == "PAY":
+            voucher_type, voucher_no = "Payment Entry", f"ACC-PAY-{posting_date.year}-{serial[kind]:06d}"
+            lines = [
+                (account, debtors, amount, 0),
+                (debtors, account, 0, amount),
+            ]
+            remarks = f"Amount BDT {amount} received from customer"
+        else:
+            voucher_type, voucher_no = "Journal Entry", f"ACC-JV-{posting_date.year}-{serial[kind]:06d}"
+            other = rng.choice(expense + [sales] + [a for a in cash_bank if a != account])
+            if rng.random() < 0.5:
+                lines = [(account, other, 0, amount), (other, account, amount, 0)]
+            else:
+                lines = [(account, other, amount, 0), (other, account, 0, amount)]
+            remarks = rng.choice(["", None, "Petty cash", "Transfer"])
+
+        for line_account, against, debit, credit in lines:
+            entry(posting_date, line_account, against, debit, credit, voucher_type, voucher_no, remarks, int(cancelled))
+        if cancelled:
+            # ERPNext flags the originals and submits is_cancelled mirror rows
+            for line_account, against, debit, credit in lines:
+                entry(posting_date, line_account, against, credit, debit, voucher_type, voucher_no,
+                      f"On cancellation of {voucher_no}", 1)
+
+        if len(gl) >= chunk:
+            yield gl, details
+            gl, details = [], []
+
+    if gl:
+        yield gl, details
+
+
+def insert(cursor, table, rows, columns, chunk=5000):
+    if not rows:
+        return
+    query = "INSERT INTO `{}` ({}) VALUES ({})".format(
+        table, ", ".join(f"`{c}`" for c in columns), ", ".join(["%s"] * len(columns))
+    )
+    for index in range(0, len(rows), chunk):
+        cursor.executemany(query, rows[index:index + chunk])
+
+
+def seed(connection, seed=1, gl_rows=100000, days=730, start=None, cash_accounts=6, bank_accounts=4,
+         cancelled_share=0.03, closing=False, snapshot=False, hr_exp_share=0.2):
+    rng = random.Random(seed)
+    start = start or datetime.date(2024, 1, 1)
+    accounts = account_tree(rng, cash_accounts, bank_accounts)
+    generated = expense_rows = 0
+
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+        for ddl in SCHEMA:
+            cursor.execute(ddl)
+
+        account_columns = ["name", "account_name", "account_type", "root_type", "company",
+                           "parent_account", "is_group", "lft", "rgt"]
+        insert(cursor, "tabAccount", [tuple(a[c] for c in account_columns) for a in accounts], account_columns)
+        for gl, details in generate(rng, accounts, gl_rows, days, start, cancelled_share, hr_exp_share):
+            insert(cursor, "tabGL Entry", gl, ["name", "posting_date", "account", "against", "debit", "credit",
+                                               "voucher_type", "voucher_no", "remarks", "company",
+                                               "is_cancelled", "modified"])
+            insert(cursor, "tabExpense Claim Detail", details, ["name", "parent", "parenttype", "idx",
+                                                                "default_account", "description",
+                                                                "description_text", "amount"])
+            # one transaction per batch keeps the undo log small at scale
+            connection.commit()
+            generated += len(gl)
+            expense_rows += len(details)
+
+        if closing:
+            # Year-end closings, cumulative like ERPNext v15 writes them
+            cursor.execute("""
+                INSERT INTO `tabAccount Closing Balance` (name, closing_date, account, debit, credit, company)
+                SELECT
+                    CONCAT('ACB-', account, '-', YEAR(posting_date)),
+                    MAKEDATE(YEAR(posting_date), 1) + INTERVAL 1 YEAR - INTERVAL 1 DAY,
+                    account,
+                    SUM(SUM(debit)) OVER (PARTITION BY account ORDER BY YEAR(posting_date)),
+                    SUM(SUM(credit)) OVER (PARTITION BY account ORDER BY YEAR(posting_date)),
+                    company
+                FROM `tabGL Entry`
+                WHERE is_cancelled = 0
+                  AND posting_date < MAKEDATE(YEAR(%s), 1)
+                GROUP BY account, company, YEAR(posting_date)
+            """, (start + datetime.timedelta(days=days),))
+
+        if snapshot:
+            cursor.execute("""
+                INSERT INTO `tabCash Bank Daily Balance`
+                    (name, account, posting_date, debit_total, credit_total, cumulative_balance)
+                SELECT
+                    CONCAT(gl.account, '-', gl.posting_date),
+                    gl.account,
+                    gl.posting_date,
+                    SUM(gl.debit),
+                    SUM(gl.credit),
+                    SUM(SUM(gl.debit) - SUM(gl.credit)) OVER (PARTITION BY gl.account ORDER BY gl.posting_date)
+                FROM `tabGL Entry` gl
+                JOIN `tabAccount` acc ON acc.name = gl.account
+                WHERE gl.is_cancelled = 0
+                  AND acc.account_type IN ('Cash', 'Bank')
+                GROUP BY gl.account, gl.posting_date
+            """)
+
+        for table in TABLES:
+            cursor.execute(f"ANALYZE TABLE `{table}`")
+            cursor.fetchall()
+    connection.commit()
+
+    cash_bank = [a["name"] for a in accounts if a["account_type"] in ("Cash", "Bank") and not a["is_group"]]
+    return {
+        "accounts": cash_bank,
+        "parent_account": f"Cash In Hand - {ABBR}",
+        "company": COMPANY,
+        "start": start,
+        "end": start + datetime.timedelta(days=days - 1),
+        "gl_rows": generated,
+        "expense_rows": expense_rows,
+    }
+
+
+def add_connection_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="cash_bank_test")
+
+
+def add_seed_arguments(parser):
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gl-rows", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--hr-exp-share", type=float, default=0.2,
+                        help="share of vouchers that are Expense Claims (default 0.2)")
+    parser.add_argument("--closing", action="store_true", help="write yearly Account Closing Balance rows")
+    parser.add_argument("--snapshot", action="store_true", help="fill Cash Bank Daily Balance")
+
+
+def connect_and_create(args):
+    connection = connect(args.host, args.port, args.user, args.password)
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}` CHARACTER SET utf8mb4")
+    connection.select_db(args.database)
+    return connection
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    connection = connect_and_create(args)
+    info = seed(connection, seed=args.seed, gl_rows=args.gl_rows, days=args.days,
+                closing=args.closing, snapshot=args.snapshot, hr_exp_share=args.hr_exp_share)
+    print(f"{info['gl_rows']} GL rows, {info['expense_rows']} expense rows, "
+          f"{len(info['accounts'])} cash/bank accounts, {info['start']} .. {info['end']}")